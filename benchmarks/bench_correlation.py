@@ -0,0 +1,89 @@
+# benchmarks/bench_correlation.py
+"""
+Latencia de CorrelationGuard en el camino caliente (update_price +
+can_open_trade) frente al cálculo original (np.corrcoef por par sobre
+la ventana completa en cada chequeo), de 5 a 100 símbolos.
+
+Uso: python -m benchmarks.bench_correlation
+"""
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.correlation import CorrelationGuard
+
+console = Console()
+
+
+def legacy_can_open(history, symbol, current_symbols, threshold=0.8):
+    """Réplica del algoritmo anterior: alinear por longitud y corrcoef por par"""
+    symbols = list(history.keys())
+    min_length = min(len(history[s]) for s in symbols)
+    aligned = {s: list(history[s])[-min_length:] for s in symbols}
+    matrix = {}
+    for i, s1 in enumerate(symbols):
+        for s2 in symbols[i + 1 :]:
+            matrix[(s1, s2)] = np.corrcoef(aligned[s1], aligned[s2])[0, 1]
+    for other in current_symbols:
+        corr = matrix.get((symbol, other), matrix.get((other, symbol)))
+        if corr is not None and abs(corr) > threshold:
+            return False
+    return True
+
+
+def make_prices(n_symbols, n_points, seed=7):
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.5, (n_points, n_symbols))
+    return 1000 + np.cumsum(steps, axis=0)
+
+
+def bench(n_symbols, window, checks):
+    prices = make_prices(n_symbols, window + checks)
+    symbols = [f"S_{i}" for i in range(n_symbols)]
+    guard = CorrelationGuard(maxlen=window, resolution=60)
+    history = {s: deque(maxlen=window) for s in symbols}
+    for k, row in enumerate(prices[:window]):
+        for s, p in zip(symbols, row):
+            guard.update_price(s, p, epoch=k * 60)
+            history[s].append(p)
+
+    open_symbols = symbols[: min(8, n_symbols)]
+    t0 = time.perf_counter()
+    for k, row in enumerate(prices[window:], start=window):
+        for s, p in zip(symbols, row):
+            guard.update_price(s, p, epoch=k * 60)
+        guard.can_open_trade(symbols[-1], open_symbols)
+    new_us = (time.perf_counter() - t0) / checks * 1e6
+
+    t0 = time.perf_counter()
+    for _ in range(max(1, checks // 10)):
+        legacy_can_open(history, symbols[-1], open_symbols)
+    legacy_us = (time.perf_counter() - t0) / max(1, checks // 10) * 1e6
+
+    return new_us, legacy_us
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--window", type=int, default=1000)
+    parser.add_argument("--checks", type=int, default=200)
+    args = parser.parse_args()
+
+    table = Table(title=f"CorrelationGuard (ventana={args.window})")
+    table.add_column("Símbolos", justify="right", style="cyan")
+    table.add_column("Sumas por par µs (N precios + chequeo)", justify="right")
+    table.add_column("Original µs/chequeo", justify="right")
+
+    for n in (5, 10, 25, 50, 100):
+        new_us, legacy_us = bench(n, args.window, args.checks)
+        table.add_row(str(n), f"{new_us:,.0f}", f"{legacy_us:,.0f}")
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# benchmarks/bench_dispatch.py
+"""
+Mensajes por segundo de DerivWS._process_message (decodificación +
+despacho, con handlers vacíos) frente al camino original (json.loads
+completo + cadena if/elif), con json y con orjson si está instalado.
+
+Por defecto usa frames con la forma de los de Deriv (tick, ohlc y tipos
+ignorados); --frames acepta una grabación de core.recorder (una línea por
+frame, opcionalmente 'ts<TAB>frame', .gz soportado).
+
+Uso: python -m benchmarks.bench_dispatch --messages 200000
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+import core.websocket_client_enhanced as ws_client
+from core.recorder import read_frames
+from core.websocket_client_enhanced import DerivWS
+
+console = Console()
+SYMBOLS = ["R_10", "R_25", "R_50", "R_75", "R_100"]
+
+
+def make_frames(n, seed=7):
+    """Mezcla típica de una sesión: ~80% ticks, ~15% ohlc, ~5% ignorados"""
+    rng = random.Random(seed)
+    frames = []
+    epoch = 1_700_000_000
+    for i in range(n):
+        symbol = SYMBOLS[i % len(SYMBOLS)]
+        price = round(1000 + rng.gauss(0, 5), 3)
+        r = rng.random()
+        if r < 0.80:
+            frame = {
+                "echo_req": {"subscribe": 1, "ticks": symbol},
+                "subscription": {"id": f"sub-{symbol}"},
+                "tick": {
+                    "ask": price,
+                    "bid": price,
+                    "epoch": epoch + i,
+                    "id": f"tick-{symbol}",
+                    "pip_size": 3,
+                    "quote": price,
+                    "symbol": symbol,
+                },
+                "msg_type": "tick",
+            }
+        elif r < 0.95:
+            frame = {
+                "echo_req": {
+                    "adjust_start_time": 1,
+                    "end": "latest",
+                    "granularity": 60,
+                    "subscribe": 1,
+                    "ticks_history": symbol,
+                },
+                "ohlc": {
+                    "close": f"{price:.3f}",
+                    "epoch": epoch + i,
+                    "granularity": 60,
+                    "high": f"{price + 0.5:.3f}",
+                    "id": f"ohlc-{symbol}",
+                    "low": f"{price - 0.5:.3f}",
+                    "open": f"{price:.3f}",
+                    "open_time": (epoch + i) // 60 * 60,
+                    "pip_size": 3,
+                    "symbol": symbol,
+                },
+                "subscription": {"id": f"ohlc-{symbol}"},
+                "msg_type": "ohlc",
+            }
+        else:
+            msg_type = rng.choice(["ping", "time", "website_status"])
+            frame = {"echo_req": {msg_type: 1}, msg_type: "pong", "msg_type": msg_type}
+        frames.append(json.dumps(frame))
+    return frames
+
+
+def load_frames(path):
+    return [frame for _, frame in read_frames(path)]
+
+
+def make_client(debug=False):
+    client = DerivWS("1", "", SYMBOLS, None, None, None, None, None)
+    client.debug_mode = debug
+    noop = lambda data: None  # noqa: E731
+    client.handlers = {k: noop for k in client.handlers}
+    return client
+
+
+def legacy_process(frames, debug_print=None):
+    """Réplica del procesador original: parseo completo + if/elif"""
+    noop = lambda data: None  # noqa: E731
+    status = {"messages_count": 0}
+    for count, message in enumerate(frames, 1):
+        status["messages_count"] = count
+        if count % 100 == 0:
+            pass  # log_websocket (sin E/S en la medición)
+        data = json.loads(message)
+        msg_type = data.get("msg_type", "unknown")
+        if count % 10 == 0 and debug_print is not None:
+            debug_print(f"📨 Mensaje #{count}: {msg_type}", "INFO")
+        if msg_type == "authorize":
+            noop(data)
+        elif msg_type == "balance":
+            noop(data)
+        elif msg_type == "candles":
+            noop(data)
+        elif msg_type == "ohlc":
+            noop(data)
+        elif msg_type == "error":
+            noop(data)
+        elif msg_type == "tick":
+            noop(data)
+        elif msg_type == "history":
+            noop(data)
+
+
+def rate(fn, frames):
+    t0 = time.perf_counter()
+    fn(frames)
+    return len(frames) / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--frames", help="grabación de frames a reproducir")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames) if args.frames else make_frames(args.messages)
+    ws_client.log_websocket = lambda *a, **k: None  # sin E/S de archivo
+    ws_client.console = Console(file=io.StringIO())  # render sin terminal
+
+    def run_client(frames, debug=False):
+        process = make_client(debug)._process_message
+        for message in frames:
+            process(message)
+
+    table = Table(title=f"Despacho de mensajes ({len(frames):,} frames)")
+    table.add_column("Camino", style="cyan")
+    table.add_column("Mensajes/s", justify="right")
+
+    table.add_row("Original (json + if/elif)", f"{rate(legacy_process, frames):,.0f}")
+    debug_print = make_client(debug=True).debug_print
+    table.add_row(
+        "Original + debug_print cada 10",
+        f"{rate(lambda f: legacy_process(f, debug_print), frames):,.0f}",
+    )
+
+    # Cada decodificador con el pre-filtro que DerivWS usaría con él
+    decoders = [("json", json.loads, False), ("json", json.loads, True)]
+    if ws_client.ORJSON_AVAILABLE:
+        decoders.append(("orjson", ws_client.orjson.loads, True))
+    for name, decoder, prefilter in decoders:
+        ws_client.loads = decoder
+        ws_client.PREFILTER = prefilter
+        label = f"Tabla + pre-filtro ({name})" if prefilter else f"Tabla ({name})"
+        table.add_row(label, f"{rate(run_client, frames):,.0f}")
+    table.add_row(
+        f"{label} + debug acotado",
+        f"{rate(lambda f: run_client(f, debug=True), frames):,.0f}",
+    )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_export.py
+"""
+Compara tamaño y tiempo de escritura del export de resultados:
+CSV (pandas, ruta original) vs Parquet / Arrow IPC en streaming.
+
+Uso: python -m benchmarks.bench_export --trades 1000000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.backtester import Backtester
+from core.results_io import ARROW_AVAILABLE, load_run
+
+console = Console()
+
+
+def make_backtester(n_trades, seed=42):
+    """Backtester con n_trades sintéticos (sin pasar por simulate_trade)"""
+    rng = np.random.default_rng(seed)
+    bt = Backtester()
+    symbols = np.array(["R_10", "R_25", "R_50", "R_75", "R_100"])
+    sym = symbols[rng.integers(0, len(symbols), n_trades)]
+    direction = np.where(rng.random(n_trades) < 0.5, "CALL", "PUT")
+    stake = np.round(rng.uniform(10, 40, n_trades), 2)
+    win = rng.random(n_trades) < 0.5
+    net_pnl = np.where(win, np.round(stake * 0.9, 2), -stake)
+    entry = 1000 + rng.normal(0, 5, n_trades)
+    epoch = 1_700_000_000 + 60 * np.arange(n_trades)
+
+    bt.trades = [
+        {
+            "symbol": s,
+            "direction": d,
+            "stake": float(st),
+            "entry_epoch": int(e),
+            "entry_price": float(p),
+            "exit_price": float(p + (1 if w else -1) * 0.5),
+            "duration": 2,
+            "pnl": float(pnl),
+            "net_pnl": float(pnl),
+        }
+        for s, d, st, e, p, w, pnl in zip(
+            sym, direction, stake, epoch, entry, win, net_pnl
+        )
+    ]
+    bt.equity_curve = (bt.initial_balance + np.cumsum(net_pnl)).tolist()
+    bt.balance = bt.equity_curve[-1]
+    return bt
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=200_000)
+    args = parser.parse_args()
+
+    bt = make_backtester(args.trades)
+    formats = ["csv"] + (["parquet", "arrow"] if ARROW_AVAILABLE else [])
+
+    table = Table(title=f"Export de {args.trades:,} trades")
+    table.add_column("Formato", style="cyan")
+    table.add_column("Escritura (s)", justify="right")
+    table.add_column("Tamaño (MB)", justify="right")
+    table.add_column("Lectura 2 cols (s)", justify="right")
+
+    root = tempfile.mkdtemp(prefix="bench_export_")
+    try:
+        for fmt in formats:
+            out = os.path.join(root, fmt)
+            t0 = time.perf_counter()
+            bt.export_results(out, fmt=fmt)
+            write_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            load_run(out, trade_columns=["symbol", "net_pnl"])
+            read_s = time.perf_counter() - t0
+
+            table.add_row(
+                fmt,
+                f"{write_s:.2f}",
+                f"{dir_size(out) / 1e6:.1f}",
+                f"{read_s:.2f}",
+            )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
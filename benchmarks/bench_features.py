@@ -0,0 +1,98 @@
+# benchmarks/bench_features.py
+"""
+Coste por evaluación de FeatureEngine.compute_features con el estado
+incremental de indicadores frente al cálculo anterior (RSI, MACD, ATR y
+listas de cierres sobre la ventana completa de cada temporalidad), tras
+añadir una vela 1m, según el tamaño de la ventana.
+
+Uso: python -m benchmarks.bench_features --windows 200 500 1000
+"""
+import argparse
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from utils.indicators import (
+    calc_atr,
+    calc_macd,
+    calc_rsi,
+    detect_divergence,
+    dynamic_sr_levels,
+)
+
+console = Console()
+
+
+def full_features(buffers, symbol):
+    """FeatureEngine.compute_features anterior: todo sobre la ventana"""
+
+    def tf_features(ohlc_deque):
+        arr = list(ohlc_deque)
+        if len(arr) < 35:
+            return None
+        closes = [float(x["close"]) for x in arr]
+        rsi = calc_rsi(closes, 14)
+        _, _, hist = calc_macd(closes, 12, 26, 9)
+        calc_atr(arr, 14)
+        detect_divergence(closes, rsi, lookback=25)
+        detect_divergence(closes, hist, lookback=25)
+        return dynamic_sr_levels(closes, window=min(200, len(closes)))
+
+    return [tf_features(getattr(buffers, tf)[symbol]) for tf in ("m1", "m5", "m15")]
+
+
+def make_candles(n, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    spread = close * rng.uniform(0.0002, 0.001, n)
+    epoch = 1_700_000_000 + 60 * np.arange(n)
+    return [
+        {"open": c, "high": c + s, "low": c - s, "close": c, "epoch": int(e)}
+        for c, s, e in zip(close.tolist(), spread.tolist(), epoch)
+    ]
+
+
+def bench(window, evaluations):
+    candles = make_candles(window + evaluations)
+    results = {}
+    for name in ("full", "incremental"):
+        buffers = OHLCBuffers(maxlen=window)
+        features = FeatureEngine(buffers)
+        for c in candles[:window]:
+            buffers.push_ohlc_1m("R_100", c)
+        evaluate = (
+            (lambda: full_features(buffers, "R_100"))
+            if name == "full"
+            else (lambda: features.compute_features("R_100"))
+        )
+        evaluate()
+        t0 = time.perf_counter()
+        for c in candles[window:]:
+            buffers.push_ohlc_1m("R_100", c)
+            evaluate()
+        results[name] = (time.perf_counter() - t0) / evaluations * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, nargs="+", default=[200, 500, 1000])
+    parser.add_argument("--evaluations", type=int, default=300)
+    args = parser.parse_args()
+
+    table = Table(title="FeatureEngine: vela 1m nueva + compute_features")
+    table.add_column("Ventana 1m", justify="right", style="cyan")
+    table.add_column("Ventana completa µs", justify="right")
+    table.add_column("Incremental µs", justify="right")
+    for window in args.windows:
+        res = bench(window, args.evaluations)
+        table.add_row(str(window), f"{res['full']:,.0f}", f"{res['incremental']:,.0f}")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# benchmarks/bench_load.py
+"""
+Prueba de carga contra benchmarks.mock_deriv_server: el cliente (DerivWS o
+AsyncDerivWS) se conecta al servidor local con N símbolos a la tasa pedida,
+con latencia y caídas inyectadas, y se mide throughput, cola, tiempo de
+resincronización tras cada reconexión y latencia recepción -> decisión.
+Con --real-orders las compras pasan por proposal/buy/proposal_open_contract
+(capa req_id) y se informa su RTT.
+
+Uso: python -m benchmarks.bench_load --symbols 20 --rate 10 --seconds 30
+     python -m benchmarks.bench_load --drop-every 10 --real-orders --threshold 0.5
+"""
+
+import argparse
+import io
+import tempfile
+import threading
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+import core.websocket_client_enhanced as ws_client
+from benchmarks.mock_deriv_server import MockDerivServer, load_symbols
+from core.async_client import AsyncDerivWS
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.orders import TradeEngine
+from core.risk import RiskManager
+from core.strategy import Strategy
+from core.websocket_client_enhanced import DerivWS
+from utils.logger import logger
+
+console = Console()
+
+
+def timed(cls):
+    """Subclase que registra latencias de decisión y resincronizaciones"""
+
+    class Timed(cls):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.decision_latency = []
+            self.syncs = []
+            self._started = {}
+
+        def flush_evaluations(self):
+            # DerivWS: desde la recepción del mensaje que pidió la evaluación
+            pending = dict(self._eval_pending)
+            super().flush_evaluations()
+            now = time.monotonic()
+            self.decision_latency.extend(
+                now - ts for ts in pending.values() if ts is not None
+            )
+
+        def _evaluate_symbol(self, symbol):
+            # AsyncDerivWS: el mensaje se procesa al recibirlo en el loop
+            if cls is AsyncDerivWS and symbol not in self._evaluating:
+                self._started[symbol] = time.monotonic()
+            super()._evaluate_symbol(symbol)
+
+        def _on_decision(self, symbol, future):
+            started = self._started.pop(symbol, None)
+            if started is not None:
+                self.decision_latency.append(time.monotonic() - started)
+            super()._on_decision(symbol, future)
+
+        def _history_synced(self, symbol):
+            previous = self.last_sync
+            super()._history_synced(symbol)
+            if self.last_sync is not previous:
+                self.syncs.append(self.last_sync)
+
+    return Timed
+
+
+def pct(values, scale=1000):
+    if not len(values):
+        return "-", "-"
+    arr = np.array(values) * scale
+    return f"{np.percentile(arr, 50):.1f}", f"{np.percentile(arr, 99):.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=5, help="ticks/s por símbolo")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop-every", type=float)
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--real-orders", action="store_true")
+    parser.add_argument("--threshold", type=float, help="umbral de la estrategia")
+    parser.add_argument("--minute", type=float, default=5.0, help="s por minuto")
+    args = parser.parse_args()
+
+    logger.set_log_dir(tempfile.mkdtemp())  # TradeEngine y demás, fuera del repo
+    ws_client.log_websocket = lambda *a, **k: None  # sin E/S de archivo
+    ws_client.log_debug = lambda *a, **k: None
+    ws_client.exportar_log = lambda *a, **k: None
+    ws_client.console = Console(file=io.StringIO())
+
+    symbols = load_symbols(args.symbols)
+    server = MockDerivServer(
+        symbols,
+        rate=args.rate,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_every=args.drop_every,
+        history_step=8.0,  # ~11 h de historial: suficientes velas de 15m
+        minute=args.minute,
+    )
+    url = server.start()
+
+    risk = RiskManager()
+    engine = TradeEngine(risk)
+    buffers = OHLCBuffers(maxlen=1000)
+    strategy = Strategy()
+    if args.threshold is not None:
+        strategy.threshold = args.threshold
+    cls = timed(AsyncDerivWS if args.use_async else DerivWS)
+    client = cls(
+        "1",
+        "token",
+        symbols,
+        engine,
+        buffers,
+        FeatureEngine(buffers),
+        strategy,
+        risk,
+    )
+    client.ws_url = url
+    client.debug_mode = False
+    client.real_orders = args.real_orders
+    client.reconnect_delay = 1
+
+    client.connect()
+    time.sleep(args.seconds)
+    if args.use_async:
+        client.stop()
+    stats = server.stats()
+    metrics = client.queue_metrics()
+    server.stop()
+
+    mode = "AsyncDerivWS" if args.use_async else "DerivWS"
+    table = Table(
+        title=f"{mode}: {args.symbols} símbolos × {args.rate} ticks/s, "
+        f"{args.seconds:.0f}s, latencia {args.latency * 1000:.0f}ms"
+    )
+    table.add_column("Métrica", style="cyan")
+    table.add_column("Valor", justify="right")
+    table.add_row("Frames enviados (servidor)", f"{stats['messages_sent']:,}")
+    table.add_row("Mensajes procesados", f"{client.message_count:,}")
+    table.add_row("Mensajes/s", f"{client.message_count / args.seconds:,.0f}")
+    table.add_row("Conexiones / caídas", f"{stats['connections']} / {stats['drops']}")
+    table.add_row(
+        "Cola máx. / edad p99 ms",
+        f"{metrics['max_depth']} / {metrics['age_p99_ms']:.1f}",
+    )
+    table.add_row(
+        "Evaluaciones (coalescidas)",
+        f"{client.evaluations:,} ({metrics['coalesced']:,})",
+    )
+    p50, p99 = pct(client.decision_latency)
+    table.add_row("Recepción→decisión p50 / p99 ms", f"{p50} / {p99}")
+    for i, sync in enumerate(client.syncs):
+        label = "Sincronización inicial" if i == 0 else f"Resincronización {i}"
+        table.add_row(
+            label, f"{sync['seconds'] * 1000:.1f} ms, {sync['bytes'] / 1024:.1f} KiB"
+        )
+    table.add_row("Trades abiertos", str(client.trades_opened))
+    if args.real_orders:
+        report = client.proposals.latency_report()
+        rtt = report["request_rtt_ms"]
+        if rtt:
+            table.add_row(
+                "RTT req_id p50 / p99 ms", f"{rtt['p50']:.1f} / {rtt['p99']:.1f}"
+            )
+        table.add_row("Contratos abiertos en el servidor", str(stats["open_contracts"]))
+        table.add_row("Balance servidor", f"{stats['balance']:.2f}")
+    console.print(table)
+    console.print(f"Hilos vivos: {threading.active_count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_logger.py
+"""
+Coste por llamada de utils.logger en el hilo que registra: escritura
+síncrona (abrir, escribir y cerrar el archivo en cada llamada, como hacía
+SimpleLogger) frente a la cola del escritor en segundo plano. Se mide
+también el tiempo hasta tener todo en disco (flush).
+
+Uso: python -m benchmarks.bench_logger --messages 200000
+"""
+import argparse
+import csv
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from utils.logger import SimpleLogger
+
+console = Console()
+
+
+def sync_debug(path, message):
+    """SimpleLogger.debug anterior (sin salida a consola)"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    with open(path, "a") as f:
+        f.write(f"[{timestamp}] {message}\n")
+
+
+def sync_trade(path, i):
+    """SimpleLogger.log_trade anterior: reabre el CSV por fila"""
+    row = [datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "R_10", "CALL", 1.0]
+    with open(path, "a", newline="") as f:
+        csv.writer(f).writerow(row + [0.8, "OPEN", 0, i])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--trades", type=int, default=10_000)
+    args = parser.parse_args()
+
+    log_dir = Path(tempfile.mkdtemp())
+    table = Table(title=f"{args.messages:,} debug + {args.trades:,} trades")
+    table.add_column("Modo", style="cyan")
+    table.add_column("µs/debug", justify="right")
+    table.add_column("µs/trade", justify="right")
+    table.add_column("Hasta disco s", justify="right")
+
+    start = time.perf_counter()
+    for i in range(args.messages):
+        sync_debug(log_dir / "sync.log", f"WS_MESSAGE_RECEIVED: tick {i}")
+    debug_cost = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(args.trades):
+        sync_trade(log_dir / "sync.csv", i)
+    trade_cost = time.perf_counter() - start
+    table.add_row(
+        "Síncrono",
+        f"{debug_cost / args.messages * 1e6:.2f}",
+        f"{trade_cost / args.trades * 1e6:.2f}",
+        f"{debug_cost + trade_cost:.2f}",
+    )
+
+    logger = SimpleLogger(log_dir / "async", queue_size=args.messages + args.trades * 2)
+    total = time.perf_counter()
+    start = time.perf_counter()
+    for i in range(args.messages):
+        logger.debug(f"WS_MESSAGE_RECEIVED: tick {i}")
+    debug_cost = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(args.trades):
+        # log_trade también encola su línea de debug (y la imprime)
+        logger._put("trade", ("R_10", "CALL", 1.0, 0.8, "OPEN", 0, i))
+    trade_cost = time.perf_counter() - start
+    logger.flush()
+    table.add_row(
+        "Cola + escritor",
+        f"{debug_cost / args.messages * 1e6:.2f}",
+        f"{trade_cost / args.trades * 1e6:.2f}",
+        f"{time.perf_counter() - total:.2f}",
+    )
+    logger.close()
+    console.print(table)
+    console.print(f"Descartados por cola llena: {logger.stats['log_dropped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/bench_reconnect.py
+"""
+Reconexión contra benchmarks.mock_deriv_server: tiempo desde abrir el
+socket hasta tener el historial de todos los símbolos al día y bytes
+recibidos, descargando el historial completo (como antes de cada
+reconexión) frente a pedir solo el hueco desde la última vela. También
+cuenta los hilos vivos tras N reconexiones para detectar fugas.
+
+Uso: python -m benchmarks.bench_reconnect --symbols 5 --gap 120 --rounds 5
+"""
+
+import argparse
+import io
+import tempfile
+import threading
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+import core.websocket_client_enhanced as ws_client
+from benchmarks.mock_deriv_server import (
+    WEBSOCKETS_AVAILABLE,
+    MockDerivServer,
+    load_symbols,
+)
+from config import WS_HISTORY_COUNT
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.orders import TradeEngine
+from core.risk import RiskManager
+from core.strategy import Strategy
+from core.websocket_client_enhanced import DerivWS
+from utils.logger import logger
+
+console = Console()
+
+
+def make_client(url, symbols):
+    buffers = OHLCBuffers(maxlen=1000)
+    client = DerivWS(
+        "1",
+        "token",
+        symbols,
+        TradeEngine(RiskManager()),
+        buffers,
+        FeatureEngine(buffers),
+        Strategy(),
+        RiskManager(),
+    )
+    client.ws_url = url
+    client.debug_mode = False
+    return client
+
+
+def wait_sync(client, previous, timeout=30):
+    deadline = time.monotonic() + timeout
+    while client.last_sync is previous:
+        if time.monotonic() > deadline:
+            raise TimeoutError("el historial no llegó a tiempo")
+        time.sleep(0.005)
+    return client.last_sync
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=5)
+    parser.add_argument("--gap", type=int, default=120, help="segundos caído")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    if not WEBSOCKETS_AVAILABLE:
+        console.print("websockets no disponible. pip install websockets")
+        return
+
+    logger.set_log_dir(tempfile.mkdtemp())  # TradeEngine y demás, fuera del repo
+    ws_client.log_websocket = lambda *a, **k: None  # sin E/S de archivo
+    ws_client.log_debug = lambda *a, **k: None
+    ws_client.console = Console(file=io.StringIO())
+
+    symbols = load_symbols(args.symbols)
+    server = MockDerivServer(symbols, history_ticks=WS_HISTORY_COUNT)
+    url = server.start()
+
+    client = make_client(url, symbols)
+    client.connect()
+    wait_sync(client, None)
+    threads = threading.active_count()
+
+    full, delta = [], []
+    for _ in range(args.rounds):
+        server.call(server.advance, args.gap)
+        # Antes: cada reconexión volvía a descargar el historial completo
+        fresh = make_client(url, symbols)
+        fresh._open_socket()
+        fresh._processor_thread = threading.Thread(
+            target=fresh._message_processor, daemon=True
+        )
+        fresh._processor_thread.start()
+        full.append(wait_sync(fresh, None))
+        fresh._close_socket()
+        fresh._ws_thread.join(timeout=5)
+        fresh.message_queue.put(None)
+        fresh._processor_thread.join()
+
+        previous = client.last_sync
+        client._close_socket()
+        client._open_socket()
+        delta.append(wait_sync(client, previous))
+
+    table = Table(
+        title=f"Reconexión ({args.symbols} símbolos, {args.gap}s caído, "
+        f"{args.rounds} rondas)"
+    )
+    table.add_column("Modo", style="cyan")
+    table.add_column("Hasta al día p50 ms", justify="right")
+    table.add_column("KiB recibidos", justify="right")
+    for name, syncs in (("Historial completo", full), ("Solo el hueco", delta)):
+        table.add_row(
+            name,
+            f"{np.median([s['seconds'] for s in syncs]) * 1000:.1f}",
+            f"{np.median([s['bytes'] for s in syncs]) / 1024:.1f}",
+        )
+    console.print(table)
+    console.print(
+        f"Hilos vivos tras la 1ª conexión: {threads}; "
+        f"tras {args.rounds} reconexiones: {threading.active_count()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
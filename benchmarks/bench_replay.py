@@ -0,0 +1,154 @@
+# benchmarks/bench_replay.py
+"""
+Throughput de extremo a extremo reproduciendo una grabación de frames
+(core.recorder) contra DerivWS con los handlers, features, estrategia y
+TradeEngine reales y un VirtualClock. La ejecución se repite para
+comprobar que las decisiones son reproducibles.
+
+Sin --frames se graba primero una sesión sintética: historial de ticks por
+símbolo seguido de ticks en vivo (uno por segundo y símbolo).
+
+Uso: python -m benchmarks.bench_replay --frames logs/frames.gz
+     python -m benchmarks.bench_replay --symbols 5 --minutes 30
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+import core.websocket_client_enhanced as ws_client
+from core.clock import VirtualClock
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.orders import TradeEngine
+from core.recorder import FrameRecorder, FrameReplayer
+from core.risk import RiskManager
+from core.strategy import Strategy
+from core.websocket_client_enhanced import DerivWS
+from utils.logger import logger
+
+console = Console()
+START = 1_700_000_000
+HISTORY_TICKS = 5000
+HISTORY_STEP = 8  # segundos entre ticks del historial (~11 h de velas 1m)
+
+
+def record_session(path, symbols, minutes, seed=3):
+    """Graba una sesión sintética con FrameRecorder"""
+    rng = np.random.default_rng(seed)
+    recorder = FrameRecorder(path)
+    live_start = START + HISTORY_TICKS * HISTORY_STEP
+    last = {}
+    for symbol in symbols:
+        times = START + HISTORY_STEP * np.arange(HISTORY_TICKS)
+        prices = 1000 * np.exp(np.cumsum(rng.normal(0, 3e-4, HISTORY_TICKS)))
+        last[symbol] = prices[-1]
+        frame = {
+            "echo_req": {"ticks_history": symbol, "granularity": 60},
+            "history": {
+                "prices": np.round(prices, 3).tolist(),
+                "times": times.tolist(),
+            },
+            "msg_type": "history",
+        }
+        recorder.record(json.dumps(frame), ts=live_start)
+
+    for second in range(minutes * 60):
+        epoch = live_start + 1 + second
+        for symbol in symbols:
+            last[symbol] *= np.exp(rng.normal(0, 3e-4))
+            frame = {
+                "echo_req": {"ticks": symbol, "subscribe": 1},
+                "tick": {
+                    "epoch": epoch,
+                    "quote": round(last[symbol], 3),
+                    "symbol": symbol,
+                },
+                "msg_type": "tick",
+            }
+            recorder.record(json.dumps(frame), ts=epoch)
+    recorder.close()
+    return recorder.recorded
+
+
+def replay(path, symbols):
+    clock = VirtualClock()
+    risk = RiskManager(clock=clock)
+    engine = TradeEngine(risk, clock=clock)
+    engine.set_balance(1000.0)
+    buffers = OHLCBuffers(maxlen=1000)
+    client = DerivWS(
+        "1",
+        "",
+        symbols,
+        engine,
+        buffers,
+        FeatureEngine(buffers),
+        Strategy(),
+        risk,
+        clock=clock,
+    )
+    client.debug_mode = False
+    result = FrameReplayer(client, path).run()
+    result["balance"] = engine.balance
+    # ids (T{ms}-{seq}) y aperturas salen del reloj virtual: deben coincidir
+    trades = list(engine.closed_trades) + list(engine.trades.values())
+    result["trade_log"] = [(t.id, t.open_ts) for t in trades]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", help="grabación a reproducir")
+    parser.add_argument("--symbols", type=int, default=5)
+    parser.add_argument("--minutes", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=2)
+    args = parser.parse_args()
+
+    logger.set_log_dir(tempfile.mkdtemp())  # TradeEngine y demás, fuera del repo
+    ws_client.log_websocket = lambda *a, **k: None  # sin E/S de archivo
+    ws_client.log_debug = lambda *a, **k: None
+    ws_client.console = Console(file=io.StringIO())
+
+    symbols = [f"R_{i}" for i in range(args.symbols)]
+    path = args.frames
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "frames.gz")
+        recorded = record_session(path, symbols, args.minutes)
+        console.print(f"Grabados {recorded:,} frames ({os.path.getsize(path):,} bytes)")
+
+    table = Table(title=f"Replay a máxima velocidad ({path})")
+    table.add_column("Ejecución", justify="right", style="cyan")
+    table.add_column("Frames", justify="right")
+    table.add_column("Frames/s", justify="right")
+    table.add_column("Evaluaciones", justify="right")
+    table.add_column("Trades", justify="right")
+    table.add_column("Balance", justify="right")
+
+    results = [replay(path, symbols) for _ in range(args.runs)]
+    for i, r in enumerate(results, 1):
+        table.add_row(
+            str(i),
+            f"{r['frames']:,}",
+            f"{r['frames_per_s']:,.0f}",
+            f"{r['evaluations']:,}",
+            str(r["trades"]),
+            f"{r['balance']:.2f}",
+        )
+    console.print(table)
+
+    keys = ("frames", "evaluations", "trades", "balance", "trade_log")
+    same = all([r[k] for k in keys] == [results[0][k] for k in keys] for r in results)
+    console.print(
+        "Decisiones reproducibles" if same else "[red]Resultados distintos[/red]"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_risk_sim.py
+"""
+Barrido de políticas de riesgo con core.risk_sim: simula y ordena una
+rejilla de miles de políticas sobre las mismas secuencias de resultados,
+frente a reproducir cada política con un RiskManager escalar (estimado
+sobre una muestra de políticas).
+
+Uso: python -m benchmarks.bench_risk_sim --sequences 20 --trades 1000
+"""
+import argparse
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.clock import VirtualClock
+from core.risk import RiskManager
+from core.risk_sim import policy_grid, rank_policies, simulate_policies
+
+console = Console()
+CONTRACT_SECONDS = 120
+
+
+def scalar_policy(unit_pnl, policy, initial_balance):
+    """Una política sobre una secuencia con RiskManager, trade a trade"""
+    clock = VirtualClock()
+    risk = RiskManager(clock=clock)
+    for name, value in policy.items():
+        if name != "loss_pause_trades":
+            setattr(risk, name, value)
+    risk.loss_pause_seconds = policy["loss_pause_trades"] * CONTRACT_SECONDS
+    balance = initial_balance
+    for t, r in enumerate(unit_pnl):
+        clock.set(t * CONTRACT_SECONDS)
+        if not risk.can_trade_now(balance):
+            continue
+        profit = risk.compute_stake(balance) * r
+        balance += profit
+        clock.set((t + 1) * CONTRACT_SECONDS)
+        risk.on_trade_result(profit)
+    return balance
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sequences", type=int, default=20)
+    parser.add_argument("--trades", type=int, default=1000)
+    parser.add_argument("--win-rate", type=float, default=0.55)
+    parser.add_argument("--sample", type=int, default=20)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    grid = policy_grid(
+        risk_per_trade=np.linspace(0.001, 0.02, 8),
+        stake_max_pct=[0.01, 0.02, 0.05],
+        win_streak_boost=[1.0, 1.25, 1.5],
+        win_streak_trigger=[2, 3],
+        loss_streak_pause=[3, 5, 8, 24],
+        loss_pause_trades=[1, 3, 5],
+    )
+    n_policies = len(grid["risk_per_trade"])
+    rng = np.random.default_rng(0)
+    outcomes = rng.random((args.sequences, args.trades)) < args.win_rate
+    initial_balance = 10000.0
+
+    t0 = time.perf_counter()
+    result = simulate_policies(outcomes, grid, initial_balance=initial_balance)
+    ranking = rank_policies(result, top=args.top)
+    vector_s = time.perf_counter() - t0
+
+    unit_pnl = np.where(outcomes, 0.9, -1.0)
+    sample = rng.choice(n_policies, size=min(args.sample, n_policies), replace=False)
+    t0 = time.perf_counter()
+    for i in sample:
+        policy = {k: v[i] for k, v in grid.items()}
+        for seq in unit_pnl:
+            scalar_policy(seq, policy, initial_balance)
+    scalar_s = (time.perf_counter() - t0) / len(sample) * n_policies
+
+    summary = Table(
+        title=f"{n_policies:,} políticas x {args.sequences} secuencias "
+        f"x {args.trades:,} trades"
+    )
+    summary.add_column("Método", style="cyan")
+    summary.add_column("Tiempo (s)", justify="right")
+    summary.add_row("simulate_policies + rank_policies", f"{vector_s:.2f}")
+    summary.add_row("RiskManager escalar (estimado)", f"{scalar_s:.2f}")
+    console.print(summary)
+
+    top = Table(title=f"Top {len(ranking)} por retorno / drawdown")
+    top.add_column("Riesgo/trade", justify="right", style="cyan")
+    top.add_column("Stake máx", justify="right")
+    top.add_column("Boost racha", justify="right")
+    top.add_column("Pausa tras", justify="right")
+    top.add_column("Saltos", justify="right")
+    top.add_column("Retorno %", justify="right")
+    top.add_column("Max DD %", justify="right")
+    for row in ranking:
+        top.add_row(
+            f"{row['risk_per_trade']:.4f}",
+            f"{row['stake_max_pct']:.2f}",
+            f"{row['win_streak_boost']:.2f}",
+            f"{row['loss_streak_pause']:.0f}",
+            f"{row['loss_pause_trades']:.0f}",
+            f"{row['total_return_pct']:.2f}",
+            f"{row['max_drawdown_pct']:.2f}",
+        )
+    console.print(top)
+
+
+if __name__ == "__main__":
+    main()
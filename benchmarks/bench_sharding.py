@@ -0,0 +1,115 @@
+# benchmarks/bench_sharding.py
+"""
+Latencia vela -> decisión en una ráfaga (una vela nueva por símbolo a la
+vez) con evaluación en proceso frente a ShardedEvaluator con N workers.
+La latencia de cola solo se mantiene plana al añadir símbolos si hay
+núcleos libres para los workers.
+
+Uso: python -m benchmarks.bench_sharding --symbols 5 10 20 --workers 2 4
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.sharding import ShardedEvaluator
+from core.strategy import Strategy
+
+console = Console()
+
+
+def make_candles(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    epoch = 1_700_000_000 + 60 * np.arange(n)
+    return [
+        {"open": c, "high": c * 1.0005, "low": c * 0.9995, "close": c, "epoch": int(e)}
+        for c, e in zip(close, epoch)
+    ]
+
+
+def bench_inline(data, history, rounds):
+    buffers = OHLCBuffers(maxlen=1000)
+    features = FeatureEngine(buffers)
+    strategy = Strategy()
+    for symbol, candles in data.items():
+        for c in candles[:history]:
+            buffers.push_ohlc_1m(symbol, c)
+
+    latencies = []
+    for r in range(rounds):
+        t0 = time.perf_counter()
+        for symbol, candles in data.items():
+            buffers.push_ohlc_1m(symbol, candles[history + r])
+            strategy.score(features.compute_features(symbol))
+            latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def bench_sharded(data, history, rounds, workers):
+    done = threading.Semaphore(0)
+    finished = []
+
+    def on_decision(symbol, decision, error, ts):
+        finished.append(time.perf_counter())
+        done.release()
+
+    sharder = ShardedEvaluator(Strategy(), on_decision, workers=workers)
+    sharder.start()
+    for symbol, candles in data.items():
+        sharder.submit(symbol, candles[:history])
+    for _ in data:
+        done.acquire()
+
+    latencies = []
+    for r in range(rounds):
+        finished.clear()
+        t0 = time.perf_counter()
+        for symbol, candles in data.items():
+            sharder.submit(symbol, [candles[history + r]])
+        for _ in data:
+            done.acquire()
+        latencies.extend(t - t0 for t in finished)
+    sharder.stop()
+    return latencies
+
+
+def pct(latencies):
+    ms = np.array(latencies) * 1000
+    return f"{np.percentile(ms, 50):.1f}", f"{np.percentile(ms, 99):.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--history", type=int, default=600)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    table = Table(title=f"Ráfagas de velas ({os.cpu_count()} CPUs)")
+    table.add_column("Símbolos", justify="right", style="cyan")
+    table.add_column("Modo")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p99 ms", justify="right")
+
+    for n in args.symbols:
+        data = {f"S_{i}": make_candles(args.history + args.rounds, i) for i in range(n)}
+        table.add_row(
+            str(n), "en proceso", *pct(bench_inline(data, args.history, args.rounds))
+        )
+        for w in args.workers:
+            lat = bench_sharded(data, args.history, args.rounds, w)
+            table.add_row(str(n), f"{w} workers", *pct(lat))
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/bench_ticks.py
+"""
+Conversión de historial de ticks a velas 1m: bucle original (listas por
+minuto + push vela a vela) frente a ticks_to_candles vectorizado
+(reduceat) + OHLCBuffers.extend_ohlc_1m con una sola reagregación.
+
+Uso: python -m benchmarks.bench_ticks --ticks 5000 50000
+"""
+import argparse
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.ohlc_buffers import OHLCBuffers
+from core.ticks import OHLC_KEYS, ticks_to_candles
+
+console = Console()
+
+
+def make_ticks(n, seed=11):
+    """Ticks cada ~2 s con huecos ocasionales, como un historial de Deriv"""
+    rng = np.random.default_rng(seed)
+    times = 1_700_000_000 + np.cumsum(rng.choice([1, 2, 2, 3, 30], n))
+    prices = np.round(1000 * np.exp(np.cumsum(rng.normal(0, 2e-4, n))), 3)
+    return prices.tolist(), times.tolist()
+
+
+def legacy_ticks_to_candles(prices, times):
+    """Réplica del DerivWS._ticks_to_candles original"""
+    if not prices or not times:
+        return []
+
+    candles = []
+    current_minute = None
+    minute_prices = []
+
+    for price, timestamp in zip(prices, times):
+        minute = int(timestamp) // 60
+
+        if current_minute is None:
+            current_minute = minute
+
+        if minute == current_minute:
+            minute_prices.append(float(price))
+        else:
+            if minute_prices:
+                candles.append(
+                    {
+                        "open": minute_prices[0],
+                        "high": max(minute_prices),
+                        "low": min(minute_prices),
+                        "close": minute_prices[-1],
+                        "epoch": current_minute * 60,
+                    }
+                )
+            current_minute = minute
+            minute_prices = [float(price)]
+
+    if minute_prices and current_minute is not None:
+        candles.append(
+            {
+                "open": minute_prices[0],
+                "high": max(minute_prices),
+                "low": min(minute_prices),
+                "close": minute_prices[-1],
+                "epoch": current_minute * 60,
+            }
+        )
+    return candles
+
+
+def legacy(prices, times):
+    buffers = OHLCBuffers(maxlen=1000)
+    for candle in legacy_ticks_to_candles(prices, times):
+        buffers.upsert_ohlc_1m("R_100", candle)
+    return buffers
+
+
+def vectorized(prices, times):
+    buffers = OHLCBuffers(maxlen=1000)
+    buffers.extend_ohlc_1m("R_100", ticks_to_candles(prices, times))
+    return buffers
+
+
+def best_of(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, nargs="+", default=[5000, 50_000])
+    args = parser.parse_args()
+
+    table = Table(title="Historial de ticks -> velas 1m + buffers")
+    table.add_column("Ticks", justify="right", style="cyan")
+    table.add_column("Velas", justify="right")
+    table.add_column("Bucle ms", justify="right")
+    table.add_column("Vectorizado ms", justify="right")
+    table.add_column("Solo conversión (bucle / NumPy) ms", justify="right")
+
+    for n in args.ticks:
+        prices, times = make_ticks(n)
+        a, b = legacy(prices, times), vectorized(prices, times)
+        for tf in ("m1", "m5", "m15"):
+            got = getattr(b, tf)["R_100"]
+            assert list(getattr(a, tf)["R_100"]) == list(got), tf
+        candles = ticks_to_candles(prices, times)
+        table.add_row(
+            f"{n:,}",
+            f"{len(candles[OHLC_KEYS[0]]):,}",
+            f"{best_of(legacy, prices, times) * 1000:.2f}",
+            f"{best_of(vectorized, prices, times) * 1000:.2f}",
+            f"{best_of(legacy_ticks_to_candles, prices, times) * 1000:.2f} / "
+            f"{best_of(ticks_to_candles, prices, times) * 1000:.2f}",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_trade_engine.py
+"""
+Latencia de TradeEngine.can_open a medida que crece la sesión.
+Con contadores indexados debe mantenerse plana tras 100k trades.
+
+Uso: python -m benchmarks.bench_trade_engine --trades 100000
+"""
+import argparse
+import tempfile
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from core.orders import TradeEngine
+from core.risk import RiskManager
+from utils.logger import logger
+
+console = Console()
+SYMBOLS = ["R_10", "R_25", "R_50", "R_75", "R_100"]
+
+
+def can_open_latency(engine, calls=20_000):
+    t0 = time.perf_counter()
+    for i in range(calls):
+        engine.can_open(SYMBOLS[i % len(SYMBOLS)])
+    return (time.perf_counter() - t0) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--step", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # Sin escritura de datos de entrenamiento durante la medición
+    logger.log_training_data = lambda *a, **k: None
+
+    logger.set_log_dir(tempfile.mkdtemp())  # archivo de cerrados fuera del repo
+    engine = TradeEngine(RiskManager())
+    engine.set_balance(10_000.0)
+
+    table = Table(title="TradeEngine.can_open")
+    table.add_column("Trades cerrados", justify="right", style="cyan")
+    table.add_column("ns/llamada", justify="right")
+    table.add_column("Trades en memoria", justify="right")
+
+    done = 0
+    table.add_row("0", f"{can_open_latency(engine):.0f}", "0")
+    while done < args.trades:
+        for i in range(args.step):
+            symbol = SYMBOLS[i % len(SYMBOLS)]
+            trade_id = engine.open_trade(symbol, "CALL", 1.0, None)
+            engine.finalize_trade(trade_id, 0.9 if i % 2 else -1.0)
+        done += args.step
+        in_memory = len(engine.trades) + len(engine.closed_trades)
+        table.add_row(
+            f"{done:,}", f"{can_open_latency(engine):.0f}", f"{in_memory:,}"
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_trade_memory.py
+"""
+Memoria por trade: dict original (con feature_vector y textos formateados)
+frente a TradeRecord con __slots__ y campos de presentación perezosos.
+
+Uso: python -m benchmarks.bench_trade_memory --trades 10000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.orders import TradeRecord
+
+console = Console()
+
+
+def legacy_trade(i, now):
+    """Réplica del dict que guardaba TradeEngine antes de TradeRecord"""
+    return {
+        "id": f"T{int(now * 1000) + i}",
+        "symbol": "R_100",
+        "contract_type": "CALL",
+        "amount": 10.0 + i % 7,
+        "open_time": time.strftime("%H:%M:%S"),
+        "_open_ts": now,
+        "status": "Cerrada",
+        "profit": 9.0,
+        "duration": 2,
+        "duration_unit": "m",
+        "feature_vector": np.random.rand(10),
+        "elapsed": f"{i % 180}s",
+    }
+
+
+def record_trade(i, now):
+    t = TradeRecord(
+        f"T{int(now * 1000) + i}", "R_100", "CALL", 10.0 + i % 7, now, 2, "m"
+    )
+    t.status = "Cerrada"
+    t.profit = 9.0
+    t.close_ts = now + i % 180
+    return t
+
+
+def bytes_per_trade(factory, n):
+    now = time.time()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    trades = [factory(i, now) for i in range(n)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    del trades
+    return total / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=10_000)
+    args = parser.parse_args()
+
+    table = Table(title=f"Memoria por trade ({args.trades:,} trades cerrados)")
+    table.add_column("Representación", style="cyan")
+    table.add_column("Bytes/trade", justify="right")
+    legacy = bytes_per_trade(legacy_trade, args.trades)
+    compact = bytes_per_trade(record_trade, args.trades)
+    table.add_row("dict (original)", f"{legacy:.0f}")
+    table.add_row("TradeRecord", f"{compact:.0f}")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
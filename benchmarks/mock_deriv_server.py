@@ -0,0 +1,590 @@
+# benchmarks/mock_deriv_server.py
+"""
+Servidor WebSocket local que imita el subconjunto de la API de Deriv que
+usa el bot: authorize, balance, ticks_history (ticks o velas, con
+subscribe), ticks, ohlc, proposal, buy, proposal_open_contract, forget y
+errores. Genera ticks con la volatilidad nominal de cada índice
+(core.synthetic) para N símbolos a la tasa pedida y puede inyectar latencia y desconexiones, para probar throughput,
+reconexión y latencia tick -> decisión sin salir de la máquina.
+
+Uso: python -m benchmarks.mock_deriv_server --symbols 10 --rate 5 \\
+         --latency 0.05 --drop-every 60
+     (el cliente se apunta con DerivWS.ws_url = "ws://127.0.0.1:8765")
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+from rich.console import Console
+
+from core.synthetic import DEFAULT_SPOT, index_params, simulate_prices, symbol_rng
+
+try:
+    import websockets
+
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+console = Console()
+SYMBOLS = ["R_10", "R_25", "R_50", "R_75", "R_100"]
+PAYOUT = 1.95  # pago por unidad de stake de un contrato ganador
+
+
+def load_symbols(n):
+    """Los índices reales y, por encima de cinco, símbolos R_X<i> extra"""
+    return SYMBOLS[:n] + [f"R_X{i}" for i in range(max(0, n - len(SYMBOLS)))]
+
+
+def symbol_params(symbol):
+    """(volatilidad anual, decimales); los símbolos extra se mueven como R_100"""
+    try:
+        vol, _, pip = index_params(symbol)
+    except ValueError:
+        vol, _, pip = index_params("R_100")
+    return vol, pip
+
+
+class _Session:
+    """Estado de una conexión: suscripciones y cola de salida con latencia"""
+
+    def __init__(self, ws, server):
+        self.ws = ws
+        self.server = server
+        self.authorized = False
+        self.ticks = {}  # símbolo -> (req_id, subscription id)
+        self.ohlc = {}  # símbolo -> (req_id, subscription id, granularidad)
+        self.proposals = {}  # subscription id -> (req_id, request)
+        self.contracts = {}  # contract_id -> (req_id, subscription id)
+        self.issued = OrderedDict()  # id de proposal -> petición (últimos 1000)
+        self.outbox = asyncio.Queue()
+        self._last_due = 0.0
+
+    def send(self, reply, req=None, req_id=None):
+        """Encola reply (dict) con echo_req/req_id y la latencia configurada"""
+        if req is not None:
+            reply["echo_req"] = req
+            req_id = req.get("req_id", req_id)
+        if req_id is not None:
+            reply["req_id"] = req_id
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        # Entregas en orden aunque haya jitter
+        self._last_due = max(self._last_due, time.monotonic() + delay)
+        self.outbox.put_nowait((self._last_due, json.dumps(reply)))
+
+    def error(self, req, code, message):
+        msg_type = next((k for k in req if k in REQUEST_TYPES), "error")
+        self.send(
+            {"error": {"code": code, "message": message}, "msg_type": msg_type}, req
+        )
+
+    async def sender(self):
+        while True:
+            due, text = await self.outbox.get()
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.ws.send(text)
+            self.server.messages_sent += 1
+            self.server.bytes_sent += len(text)
+
+
+class MockDerivServer:
+    """
+    Servidor simulado. Los precios siguen el paseo geométrico de
+    core.synthetic con la volatilidad anual de cada índice (escalada al
+    intervalo real entre ticks) y 'rate' ticks por segundo; al arrancar se genera un
+    historial de 'history_ticks' ticks separados 'history_step' segundos
+    (2 s como los índices de volatilidad). advance(segundos) adelanta el reloj
+    del servidor generando de golpe los ticks de ese intervalo (p.ej. para
+    simular un hueco mientras el cliente está desconectado).
+    """
+
+    def __init__(
+        self,
+        symbols=SYMBOLS,
+        rate=0.5,
+        latency=0.0,
+        jitter=0.0,
+        drop_every=None,
+        history_ticks=5000,
+        history_step=2.0,
+        minute=60.0,
+        balance=10_000.0,
+        seed=7,
+    ):
+        self.symbols = list(symbols)
+        self.rate = rate
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_every = drop_every
+        self.minute = minute  # segundos reales por minuto de contrato
+        self.balance = balance
+        self.offset = 0.0
+        self.params = {s: symbol_params(s) for s in self.symbols}
+        self.rngs = {s: symbol_rng(s, seed) for s in self.symbols}
+        self.prices = {s: DEFAULT_SPOT for s in self.symbols}
+        self.history = {s: deque(maxlen=max(history_ticks, 1)) for s in self.symbols}
+        self.sessions = set()
+        self.open_contracts = {}  # contract_id -> dict
+        self._ids = itertools.count(1)
+        self.loop = None
+        self.port = None
+        self._stop = None
+        self._ready = threading.Event()
+
+        # Métricas
+        self.connections = 0
+        self.drops = 0
+        self.requests = 0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.ticks_generated = 0
+
+        now = self.now()
+        self._generate(now - history_ticks * history_step, now, history_ticks)
+
+    def now(self):
+        return time.time() + self.offset
+
+    def _next_id(self, prefix):
+        return f"{prefix}-{next(self._ids)}"
+
+    def _generate(self, start, end, n):
+        """Añade n ticks por símbolo repartidos en (start, end] al historial"""
+        if n <= 0:
+            return
+        times = np.linspace(start, end, n + 1)[1:].astype(np.int64)
+        step = (end - start) / n
+        for symbol in self.symbols:
+            vol, pip = self.params[symbol]
+            prices = simulate_prices(
+                self.rngs[symbol], self.prices[symbol], n, vol, step, pip
+            )
+            self.prices[symbol] = float(prices[-1])
+            self.history[symbol].extend(zip(times.tolist(), prices.tolist()))
+        self.ticks_generated += n * len(self.symbols)
+
+    def advance(self, seconds):
+        """Adelanta el reloj del servidor generando los ticks intermedios"""
+        now = self.now()
+        self.offset += seconds
+        self._generate(now, self.now(), int(seconds * self.rate))
+
+    # -- Peticiones --
+
+    async def handle(self, ws):
+        session = _Session(ws, self)
+        self.sessions.add(session)
+        self.connections += 1
+        sender = asyncio.create_task(session.sender())
+        try:
+            async for message in ws:
+                self.requests += 1
+                try:
+                    req = json.loads(message)
+                except ValueError:
+                    session.error({}, "InputValidationFailed", "JSON inválido")
+                    continue
+                self.dispatch(session, req)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self.sessions.discard(session)
+
+    def dispatch(self, session, req):
+        for key, handler in REQUEST_TYPES.items():
+            if key in req:
+                if key in AUTH_REQUIRED and not session.authorized:
+                    session.error(req, "AuthorizationRequired", "Autorice primero")
+                    return
+                handler(self, session, req)
+                return
+        session.error(req, "UnrecognisedRequest", "Petición no reconocida")
+
+    def _authorize(self, session, req):
+        if not req["authorize"]:
+            session.error(req, "InvalidToken", "Token inválido")
+            return
+        session.authorized = True
+        reply = {"loginid": "VRTC0000001", "balance": self.balance, "currency": "USD"}
+        session.send({"authorize": reply, "msg_type": "authorize"}, req)
+
+    def _balance(self, session, req):
+        balance = {"balance": round(self.balance, 2), "currency": "USD"}
+        session.send({"balance": balance, "msg_type": "balance"}, req)
+
+    def _ticks_history(self, session, req):
+        symbol = req["ticks_history"]
+        if symbol not in self.history:
+            session.error(req, "InvalidSymbol", f"Símbolo desconocido: {symbol}")
+            return
+        end = self.now() if req.get("end", "latest") == "latest" else req["end"]
+        start = int(req.get("start", 0))
+        count = int(req.get("count", 5000))
+        ticks = [(t, p) for t, p in self.history[symbol] if start <= t <= end]
+        if req.get("style") != "candles":
+            ticks = ticks[-count:]
+        times = np.array([t for t, _ in ticks], dtype=np.int64)
+        prices = np.array([p for _, p in ticks])
+
+        sub_id = self._next_id("sub") if req.get("subscribe") else None
+        granularity = int(req.get("granularity", 60))
+        if req.get("style") == "candles":
+            reply = {"candles": _candles(times, prices, granularity)[-count:]}
+            reply["msg_type"] = "candles"
+            if sub_id:
+                session.ohlc[symbol] = (req.get("req_id"), sub_id, granularity)
+        else:
+            reply = {"history": {"prices": prices.tolist(), "times": times.tolist()}}
+            reply["msg_type"] = "history"
+            if sub_id:
+                session.ticks[symbol] = (req.get("req_id"), sub_id)
+        if sub_id:
+            reply["subscription"] = {"id": sub_id}
+        session.send(reply, req)
+
+    def _ticks(self, session, req):
+        symbol = req["ticks"]
+        if symbol not in self.history:
+            session.error(req, "InvalidSymbol", f"Símbolo desconocido: {symbol}")
+            return
+        sub_id = self._next_id("sub")
+        session.ticks[symbol] = (req.get("req_id"), sub_id)
+        epoch, price = self.history[symbol][-1]
+        session.send(self._tick(symbol, epoch, price, sub_id), req)
+
+    def _proposal(self, session, req):
+        symbol = req.get("symbol")
+        if symbol not in self.prices:
+            session.error(req, "InvalidSymbol", f"Símbolo desconocido: {symbol}")
+            return
+        sub_id = self._next_id("sub") if req.get("subscribe") else None
+        if sub_id:
+            session.proposals[sub_id] = (req.get("req_id"), req)
+        session.send(self._proposal_reply(session, req, sub_id), req)
+
+    def _proposal_reply(self, session, req, sub_id):
+        amount = float(req.get("amount", 1))
+        proposal_id = self._next_id("prop")
+        session.issued[proposal_id] = req
+        if len(session.issued) > 1000:
+            session.issued.popitem(last=False)
+        reply = {
+            "proposal": {
+                "id": proposal_id,
+                "ask_price": round(amount, 2),
+                "payout": round(amount * PAYOUT, 2),
+                "spot": self.prices[req["symbol"]],
+            },
+            "msg_type": "proposal",
+        }
+        if sub_id:
+            reply["subscription"] = {"id": sub_id}
+        return reply
+
+    def _buy(self, session, req):
+        params = req.get("parameters")
+        if params is None:
+            # Compra por id de proposal: cada id se puede usar una sola vez
+            params = session.issued.pop(req["buy"], None)
+            if params is None:
+                session.error(req, "InvalidContractProposal", "Proposal no válido")
+                return
+        stake = float(req.get("price", params.get("amount", 1)))
+        if stake > self.balance:
+            session.error(req, "InsufficientBalance", "Saldo insuficiente")
+            return
+        self.balance -= stake
+        contract_id = next(self._ids)
+        duration = float(params.get("duration", 1)) * self.minute
+        self.open_contracts[contract_id] = {
+            "symbol": params["symbol"],
+            "contract_type": params.get("contract_type", "CALL"),
+            "stake": stake,
+            "entry": self.prices[params["symbol"]],
+            "expiry": time.monotonic() + duration,
+            "session": session,
+            "sold": None,
+        }
+        reply = {
+            "buy": {
+                "contract_id": contract_id,
+                "buy_price": stake,
+                "balance_after": round(self.balance, 2),
+                "payout": round(stake * PAYOUT, 2),
+            },
+            "msg_type": "buy",
+        }
+        session.send(reply, req)
+
+    def _open_contract(self, session, req):
+        contract_id = req.get("contract_id")
+        contract = self.open_contracts.get(contract_id)
+        if contract is None:
+            session.error(req, "ContractNotFound", "Contrato desconocido")
+            return
+        sub_id = self._next_id("sub") if req.get("subscribe") else None
+        if sub_id:
+            session.contracts[contract_id] = (req.get("req_id"), sub_id)
+        session.send(self._contract_reply(contract_id, contract, sub_id), req)
+
+    def _contract_reply(self, contract_id, contract, sub_id):
+        sold = contract["sold"]
+        status = {
+            "contract_id": contract_id,
+            "is_sold": 1 if sold is not None else 0,
+            "buy_price": contract["stake"],
+            "profit": round(sold, 2) if sold is not None else 0.0,
+        }
+        reply = {"proposal_open_contract": status, "msg_type": "proposal_open_contract"}
+        if sub_id:
+            reply["subscription"] = {"id": sub_id}
+        return reply
+
+    def _forget(self, session, req):
+        sub_id = req["forget"]
+        found = session.proposals.pop(sub_id, None) is not None
+        for subs in (session.ticks, session.ohlc, session.contracts):
+            for key, value in list(subs.items()):
+                if value[1] == sub_id:
+                    del subs[key]
+                    found = True
+        session.send({"forget": 1 if found else 0, "msg_type": "forget"}, req)
+
+    def _forget_all(self, session, req):
+        session.ticks.clear()
+        session.ohlc.clear()
+        session.proposals.clear()
+        session.contracts.clear()
+        session.send({"forget_all": [], "msg_type": "forget_all"}, req)
+
+    def _ping(self, session, req):
+        session.send({"ping": "pong", "msg_type": "ping"}, req)
+
+    # -- Streams --
+
+    def _tick(self, symbol, epoch, price, sub_id):
+        return {
+            "tick": {
+                "ask": price,
+                "bid": price,
+                "epoch": epoch,
+                "id": sub_id,
+                "pip_size": self.params[symbol][1],
+                "quote": price,
+                "symbol": symbol,
+            },
+            "subscription": {"id": sub_id},
+            "msg_type": "tick",
+        }
+
+    def _ohlc(self, symbol, epoch, granularity, sub_id):
+        open_time = epoch - epoch % granularity
+        recent = itertools.takewhile(
+            lambda tick: tick[0] >= open_time, reversed(self.history[symbol])
+        )
+        ticks = [p for _, p in recent][::-1]
+        pip = self.params[symbol][1]
+        return {
+            "ohlc": {
+                "open": f"{ticks[0]:.{pip}f}",
+                "high": f"{max(ticks):.{pip}f}",
+                "low": f"{min(ticks):.{pip}f}",
+                "close": f"{ticks[-1]:.{pip}f}",
+                "epoch": epoch,
+                "open_time": open_time,
+                "granularity": granularity,
+                "symbol": symbol,
+                "id": sub_id,
+            },
+            "subscription": {"id": sub_id},
+            "msg_type": "ohlc",
+        }
+
+    async def ticker(self):
+        """Genera un tick por símbolo cada 1/rate s y lo difunde"""
+        interval = 1.0 / self.rate
+        next_at = time.monotonic()
+        while True:
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+            epoch = int(self.now())
+            for symbol in self.symbols:
+                vol, pip = self.params[symbol]
+                rng = self.rngs[symbol]
+                price = float(
+                    simulate_prices(rng, self.prices[symbol], 1, vol, interval, pip)[0]
+                )
+                self.prices[symbol] = price
+                self.history[symbol].append((epoch, price))
+                self.ticks_generated += 1
+                for session in self.sessions:
+                    sub = session.ticks.get(symbol)
+                    if sub:
+                        session.send(
+                            self._tick(symbol, epoch, price, sub[1]), None, sub[0]
+                        )
+                    sub = session.ohlc.get(symbol)
+                    if sub:
+                        reply = self._ohlc(symbol, epoch, sub[2], sub[1])
+                        session.send(reply, None, sub[0])
+            for session in self.sessions:
+                for sub_id, (req_id, req) in session.proposals.items():
+                    reply = self._proposal_reply(session, req, sub_id)
+                    session.send(reply, None, req_id)
+            self._settle()
+
+    def _settle(self):
+        now = time.monotonic()
+        for contract_id, c in list(self.open_contracts.items()):
+            if c["sold"] is not None or c["expiry"] > now:
+                continue
+            move = self.prices[c["symbol"]] - c["entry"]
+            won = move > 0 if c["contract_type"] == "CALL" else move < 0
+            c["sold"] = c["stake"] * (PAYOUT - 1) if won else -c["stake"]
+            self.balance += c["stake"] + c["sold"]
+            session = c["session"]
+            sub = session.contracts.get(contract_id)
+            if sub and session in self.sessions:
+                reply = self._contract_reply(contract_id, c, sub[1])
+                session.send(reply, None, sub[0])
+            del self.open_contracts[contract_id]
+
+    async def dropper(self):
+        """Cierra todas las conexiones cada drop_every segundos (código 1011)"""
+        while True:
+            await asyncio.sleep(self.drop_every)
+            self.drop()
+
+    def drop(self):
+        """Corta las conexiones abiertas como lo haría una caída del servidor"""
+        for session in list(self.sessions):
+            self.drops += 1
+            self.loop.create_task(session.ws.close(code=1011, reason="caída simulada"))
+
+    # -- Ciclo de vida --
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        if not WEBSOCKETS_AVAILABLE:
+            raise ImportError("websockets no disponible. pip install websockets")
+        self.loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        tasks = [asyncio.create_task(self.ticker())]
+        if self.drop_every:
+            tasks.append(asyncio.create_task(self.dropper()))
+        async with websockets.serve(self.handle, host, port, max_size=None) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+        for task in tasks:
+            task.cancel()
+
+    def start(self, host="127.0.0.1", port=0):
+        """Arranca en un hilo propio; retorna la URL (port=0: puerto libre)"""
+        thread = threading.Thread(
+            target=asyncio.run, args=(self.serve(host, port),), daemon=True
+        )
+        thread.start()
+        self._ready.wait()
+        return f"ws://{host}:{self.port}"
+
+    def call(self, fn, *args):
+        """Ejecuta fn en el loop del servidor (desde otro hilo)"""
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._stop.set)
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "drops": self.drops,
+            "requests": self.requests,
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "ticks_generated": self.ticks_generated,
+            "open_contracts": len(self.open_contracts),
+            "balance": round(self.balance, 2),
+        }
+
+
+def _candles(times, prices, granularity):
+    """Velas OHLC por intervalos de 'granularity' segundos"""
+    if not len(times):
+        return []
+    buckets = times // granularity
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    high = np.maximum.reduceat(prices, starts)
+    low = np.minimum.reduceat(prices, starts)
+    return [
+        {
+            "epoch": int(buckets[s] * granularity),
+            "open": float(prices[s]),
+            "high": float(h),
+            "low": float(lo),
+            "close": float(prices[e]),
+        }
+        for s, e, h, lo in zip(starts, ends, high, low)
+    ]
+
+
+REQUEST_TYPES = {
+    "authorize": MockDerivServer._authorize,
+    "balance": MockDerivServer._balance,
+    "ticks_history": MockDerivServer._ticks_history,
+    "ticks": MockDerivServer._ticks,
+    "proposal_open_contract": MockDerivServer._open_contract,
+    "proposal": MockDerivServer._proposal,
+    "buy": MockDerivServer._buy,
+    "forget_all": MockDerivServer._forget_all,
+    "forget": MockDerivServer._forget,
+    "ping": MockDerivServer._ping,
+}
+AUTH_REQUIRED = {"balance", "buy", "proposal_open_contract"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--symbols", type=int, default=len(SYMBOLS))
+    parser.add_argument("--rate", type=float, default=0.5, help="ticks/s por símbolo")
+    parser.add_argument("--latency", type=float, default=0.0, help="segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="segundos")
+    parser.add_argument("--drop-every", type=float, help="segundos entre caídas")
+    parser.add_argument("--minute", type=float, default=60.0)
+    args = parser.parse_args()
+
+    symbols = load_symbols(args.symbols)
+    server = MockDerivServer(
+        symbols,
+        rate=args.rate,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_every=args.drop_every,
+        minute=args.minute,
+    )
+    console.print(
+        f"Mock Deriv en ws://{args.host}:{args.port} "
+        f"({len(symbols)} símbolos, {args.rate} ticks/s)"
+    )
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        console.print(server.stats())
+
+
+if __name__ == "__main__":
+    main()
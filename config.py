@@ -11,24 +11,51 @@ DAILY_TP_PCT = 0.10  # 10% take profit diario
 DAILY_DD_PCT = 0.12  # 12% drawdown diario
 MAX_OPEN_PER_SYMBOL = 2
 MAX_OPEN_TOTAL = 8
+CLOSED_TRADES_HISTORY = 500  # trades cerrados retenidos en memoria (resto a disco)
 
 # Configuración de estrategia
 STRATEGY_THRESHOLD = 0.78  # 78% score mínimo para entrar
 ML_ENABLED = True  # Habilitar machine learning
 CORRELATION_THRESHOLD = 0.8  # Umbral de correlación
+EVAL_WORKERS = 0  # procesos de evaluación por shards de símbolos (0 = en proceso)
+CORRELATION_RESOLUTION = 60  # Segundos por fila de la matriz de correlación
 
 # Configuración de WebSocket
 WS_RECONNECT_DELAY = 30  # Segundos entre reconexiones
 WS_PING_INTERVAL = 30  # Aumentar a 30 segundos entre pings
 WS_PING_TIMEOUT = 20  # Aumentar a 20 segundos para el timeout de ping
+TICK_BUFFER_SIZE = 200  # Ticks retenidos por símbolo (ring buffer)
+WS_QUEUE_MAXSIZE = 10_000  # Mensajes en cola antes de frenar la lectura del socket
+EVAL_MAX_AGE = 5.0  # Segundos: evaluaciones sobre velas más viejas se omiten
+WS_LOG_INTERVAL = 10  # Segundos mínimos entre logs de progreso de mensajes
+WS_ASYNC = False  # True: cliente asyncio (AsyncDerivWS, requiere websockets)
+WS_URL = "wss://ws.derivws.com/websockets/v3"  # Endpoint (se añade ?app_id=)
+WS_HISTORY_COUNT = 5000  # Ticks de historial al suscribir sin velas previas
+RECORD_FRAMES_PATH = None  # p.ej. "logs/frames.gz": graba los frames recibidos
+
+# Configuración de órdenes
+REAL_ORDERS = False  # True: compra contratos reales (buy) en lugar de simularlos
+PROPOSAL_DURATIONS = (1, 2, 3)  # duraciones (min) con proposals pre-calentados
+PROPOSAL_MAX_AGE = 5  # segundos de validez de un proposal recibido
+STAKE_BAND_STEP = 1.25  # razón geométrica entre bandas de stake
+CONTRACT_SETTLE_GRACE = 30  # s tras el vencimiento sin liquidación: se libera
 
 # Configuración de backtesting
 BACKTEST_COMMISSION = 0.001  # 0.1% comisión
 BACKTEST_SLIPPAGE = 0.0005  # 0.05% slippage
+CONTRACT_PAYOUTS = {1: 0.9, 2: 0.9, 3: 0.9}  # payout Rise/Fall por duración (min)
+STREAM_CHUNK_SIZE = 100_000  # velas por bloque en backtests out-of-core
+STREAM_RSS_TARGET_MB = 512  # pico de memoria objetivo del backtest streaming
+EXPORT_FORMAT = "parquet"  # parquet | arrow | csv (requiere pyarrow salvo csv)
+RESULT_CACHE_DIR = "backtest_cache"  # caché de resultados por huella de inputs
+RESULT_CACHE_MAX_MB = 2048  # tamaño máximo antes de expulsar por LRU
 
 # Configuración de logging
 LOG_LEVEL = "DEBUG" if DEBUG else "INFO"
 LOG_FILE = "logs/trading_bot.log"
+LOG_QUEUE_SIZE = 100_000  # Registros pendientes máx.; si se llena se descartan
+LOG_FLUSH_INTERVAL = 1.0  # Segundos entre volcados a disco de los logs
+LOG_MAX_MB = 50  # Tamaño que rota (y comprime) debug/trades dentro del día
 ORDERS_CSV = "logs/orders.csv"
 
 # Configuración ML
@@ -0,0 +1,278 @@
+# core/async_client.py
+import asyncio
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import WS_PING_INTERVAL, WS_PING_TIMEOUT
+from core.features import FEATURE_TAIL, TF_MINUTES, FeatureEngine
+from core.websocket_client_enhanced import DerivWS, connection_status
+from utils.logger import log_debug, log_websocket
+
+try:
+    import websockets
+
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+
+class LoopScheduler:
+    """
+    Misma interfaz que ExpiryScheduler sobre el event loop (loop.call_at):
+    los vencimientos se ejecutan en el hilo del loop, sin hilos extra.
+    """
+
+    def __init__(self):
+        self.loop = None
+
+    def schedule(self, delay, fn, *args):
+        return self.schedule_at(self.loop.time() + delay, fn, *args)
+
+    def schedule_at(self, when, fn, *args):
+        return self.loop.call_at(when, self._execute, fn, args)
+
+    @staticmethod
+    def _execute(fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            log_debug(f"ERROR en tarea programada {fn}: {e}")
+
+    def cancel(self, call):
+        if call is not None:
+            call.cancel()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class _BufferSnapshot:
+    """
+    Copia de las últimas velas de un símbolo para evaluar fuera del loop:
+    FEATURE_TAIL por temporalidad, o más si el estado incremental del
+    símbolo necesita las llegadas desde su evaluación anterior.
+    """
+
+    def __init__(self, buffers, symbol, states):
+        for tf in TF_MINUTES:
+            candles = getattr(buffers, tf)[symbol]
+            state = states.get((symbol, tf))
+            n = len(candles)
+            if state is not None:
+                n = min(n, max(FEATURE_TAIL, state.needed(candles)))
+            tail = list(itertools.islice(reversed(candles), n))
+            tail.reverse()
+            setattr(self, tf, {symbol: tail})
+
+
+class AsyncDerivWS(DerivWS):
+    """
+    Cliente Deriv sobre asyncio con los mismos handlers que DerivWS.
+
+    Un único event loop recibe, despacha, programa vencimientos y gestiona
+    la reconexión con backoff; el cálculo de features y score se envía a un
+    executor y la decisión se aplica de vuelta en el loop, que es el único
+    dueño de TradeEngine/RiskManager. Uso: asyncio.run(client.run()).
+    """
+
+    def __init__(self, *args, executor=None, **kwargs):
+        if not WEBSOCKETS_AVAILABLE:
+            raise ImportError("websockets no disponible. pip install websockets")
+        super().__init__(*args, **kwargs)
+        self.scheduler = LoopScheduler()
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="eval"
+        )
+        self.loop = None
+        self._ws = None
+        self._outbox = None
+        self._stop = None
+        self._evaluating = set()  # símbolos con evaluación en curso
+        self._reevaluate = set()  # llegaron datos durante la evaluación
+        self._eval_states = {}  # símbolo -> estados de indicadores del executor
+        self.reconnects = 0
+
+    def connect(self):
+        """Arranca el loop en un hilo propio (compatibilidad con main.py)"""
+        thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        thread.start()
+        self.debug_print("🔌 Loop asyncio iniciado", "SUCCESS")
+
+    async def run(self):
+        """Conecta y reconecta con backoff exponencial hasta stop()"""
+        self.loop = asyncio.get_running_loop()
+        self.scheduler.loop = self.loop
+        self._stop = asyncio.Event()
+        if self.sharder is not None:
+            self.sharder.start()
+        monitor = asyncio.create_task(self._monitor())
+        delay = 1
+        try:
+            while not self._stop.is_set():
+                self.debug_print("🔌 Conectando al WebSocket de Deriv...", "INFO")
+                self._connect_started = time.monotonic()
+                try:
+                    async with websockets.connect(
+                        self.url,
+                        ping_interval=WS_PING_INTERVAL,
+                        ping_timeout=WS_PING_TIMEOUT,
+                        max_size=None,
+                    ) as ws:
+                        delay = 1
+                        await self._session(ws)
+                except (
+                    OSError,
+                    asyncio.TimeoutError,
+                    websockets.WebSocketException,
+                ) as e:
+                    self.debug_print(f"❌ Error WebSocket: {e}", "ERROR")
+
+                self._connection_lost()
+                if self._stop.is_set():
+                    break
+                self.reconnects += 1
+                self.debug_print(f"🔄 Reconectando en {delay}s...", "WARNING")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, self.reconnect_delay)
+        finally:
+            monitor.cancel()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if self.sharder is not None:
+                self.sharder.stop()
+
+    async def _session(self, ws):
+        self._ws = ws
+        self._outbox = asyncio.Queue()
+        writer = asyncio.create_task(self._writer(ws))
+        self.on_open(ws)
+
+        receiver = asyncio.create_task(self._receiver(ws))
+        stopper = asyncio.create_task(self._stop.wait())
+        try:
+            await asyncio.wait(
+                {receiver, stopper, writer}, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for task in (receiver, stopper, writer):
+                task.cancel()
+            await ws.close()
+            self._ws = None
+
+    async def _receiver(self, ws):
+        async for message in ws:
+            if self.recorder is not None:
+                self.recorder.record(message, ts=self.clock.time())
+            self._process_message(message)
+
+    async def _writer(self, ws):
+        while True:
+            await ws.send(await self._outbox.get())
+
+    def stop(self):
+        """Cierre limpio; se puede llamar desde cualquier hilo"""
+        if self.loop is not None and self._stop is not None:
+            self.loop.call_soon_threadsafe(self._stop.set)
+
+    def send(self, payload):
+        if self._ws is None:
+            self.debug_print("❌ WebSocket no conectado", "ERROR")
+            return False
+        message = json.dumps(payload)
+        self._call_on_processor(self._outbox.put_nowait, message)
+        msg_type = payload.get("msg_type", list(payload.keys())[0])
+        self.debug_print(f"📤 Enviado: {msg_type}", "INFO")
+        return True
+
+    def _call_on_processor(self, fn, *args):
+        """Ejecuta fn en el hilo del loop (directo si ya estamos en él)"""
+        if self._in_loop():
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    def _in_loop(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _schedule_reconnect(self, delay=None):
+        """La reconexión la gestiona run(): basta con cerrar el socket"""
+        if self._ws is not None:
+            self._call_on_processor(self._close_socket)
+
+    def _close_socket(self):
+        if self._ws is not None:
+            self.loop.create_task(self._ws.close())
+
+    def _evaluate_symbol(self, symbol):
+        """Evalúa en el executor; solo la última vela pendiente por símbolo"""
+        if self.sharder is not None:
+            return self._evaluate_now(symbol)
+        self.evaluations += 1
+        log_websocket("EVALUATION", f"Evaluando {symbol} (#{self.evaluations})")
+        if not self._has_enough_data(symbol):
+            return
+        if symbol in self._evaluating:
+            self._reevaluate.add(symbol)
+            return
+
+        self._evaluating.add(symbol)
+        # Estado de indicadores propio del executor y por símbolo: solo hay
+        # una evaluación en curso por símbolo, nadie más lo modifica
+        states = self._eval_states.setdefault(symbol, {})
+        features = FeatureEngine(
+            _BufferSnapshot(self.buffers, symbol, states), states=states
+        )
+        future = self.loop.run_in_executor(
+            self.executor, self._compute_decision, symbol, features
+        )
+        future.add_done_callback(lambda f: self._on_decision(symbol, f))
+
+    def _on_decision(self, symbol, future):
+        self._evaluating.discard(symbol)
+        try:
+            decision = future.result()
+            if decision is not None:
+                self._apply_decision(symbol, decision)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            self.debug_print(f"❌ Error evaluando {symbol}: {e}", "ERROR")
+
+        if symbol in self._reevaluate:
+            self._reevaluate.discard(symbol)
+            self._evaluate_symbol(symbol)
+
+    async def _monitor(self):
+        """Reporta el estado cada minuto y fuerza reconexión si no hay mensajes"""
+        last_message_count = self.message_count
+        inactive_since = time.monotonic()
+        while True:
+            await asyncio.sleep(60)
+            self.debug_print(
+                f"📊 ESTADO: Conectado={self.connected}, "
+                f"Autorizado={connection_status['authorized']}, "
+                f"Mensajes={self.message_count}, "
+                f"Evaluaciones={self.evaluations}, "
+                f"Trades={self.trades_opened}, "
+                f"Reconexiones={self.reconnects}",
+                "INFO",
+            )
+            if self.message_count != last_message_count:
+                last_message_count = self.message_count
+                inactive_since = time.monotonic()
+            elif time.monotonic() - inactive_since >= 180 and self._ws is not None:
+                self.debug_print(
+                    "🔄 Inactividad prolongada, reconectando...", "WARNING"
+                )
+                await self._ws.close()
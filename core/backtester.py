@@ -5,6 +5,8 @@ import json
 import os
 from pathlib import Path
 
+from core.results_io import ResultWriter
+
 
 class Backtester:
     def __init__(self, initial_balance=10000.0, commission_rate=0.001, slippage=0.0005):
@@ -121,8 +123,11 @@ class Backtester:
 
         return metrics
 
-    def export_results(self, output_dir="backtest_results"):
-        """Export backtest results to CSV and JSON"""
+    def export_results(self, output_dir="backtest_results", fmt="csv"):
+        """Export backtest results to CSV (or Parquet / Arrow IPC) and JSON"""
+        if fmt != "csv":
+            return self._export_columnar(output_dir, fmt)
+
         os.makedirs(output_dir, exist_ok=True)
 
         # Export trades
@@ -147,6 +152,22 @@ class Backtester:
             "equity_csv": equity_csv_path,
         }
 
+    def _export_columnar(self, output_dir, fmt):
+        """Stream trades and equity in row groups through ResultWriter"""
+        with ResultWriter(output_dir, fmt=fmt) as writer:
+            for trade in self.trades:
+                writer.trades.write(trade)
+            writer.equity.write_columns(
+                {"equity": np.asarray(self.equity_curve, dtype=float)}
+            )
+            writer.write_metrics(self.calculate_metrics())
+
+        return {
+            f"trades_{writer.fmt}": writer.paths["trades"],
+            "metrics_json": writer.metrics_path,
+            f"equity_{writer.fmt}": writer.paths["equity_curve"],
+        }
+
     def walk_forward_test(self, data, train_ratio=0.7, retrain_interval=30):
         """Perform walk-forward validation"""
         results = []
@@ -0,0 +1,56 @@
+import threading
+import time
+
+
+class WallClock:
+    """Reloj real para el modo live"""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def strftime(self, fmt):
+        return time.strftime(fmt, time.localtime(self.time()))
+
+
+class VirtualClock:
+    """
+    Reloj simulado para replays, backtests y pruebas: solo avanza cuando se
+    le indica (set/advance), así una sesión histórica se reproduce tan rápido
+    como se procesen los mensajes y con las mismas decisiones.
+    """
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self._now
+
+    def monotonic(self):
+        return self._now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def set(self, now):
+        """Mueve el reloj a 'now' (nunca hacia atrás)"""
+        with self._lock:
+            if now > self._now:
+                self._now = float(now)
+
+    def advance(self, seconds):
+        with self._lock:
+            self._now += seconds
+
+    def strftime(self, fmt):
+        return time.strftime(fmt, time.localtime(self._now))
+
+
+# Reloj por defecto compartido por los componentes live
+wall_clock = WallClock()
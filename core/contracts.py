@@ -0,0 +1,96 @@
+import numpy as np
+
+from config import CONTRACT_PAYOUTS
+
+
+class ContractSimulator:
+    """
+    Simula contratos Rise/Fall de duración fija como los que abre el bot.
+
+    El resultado se resuelve con datos reales (ticks o velas 1m) ordenados por
+    epoch: el precio de entrada es el último dato <= epoch de entrada y el de
+    salida el último dato <= epoch de expiración (búsqueda binaria). Si el
+    precio de salida es igual al de entrada el contrato se pierde, también
+    cuando no hay datos entre la entrada y la expiración (hueco).
+    """
+
+    def __init__(self, payout_table=None, default_payout=0.9, duration_unit=60):
+        self.payout_table = dict(payout_table or CONTRACT_PAYOUTS)
+        self.default_payout = default_payout
+        self.duration_unit = duration_unit  # segundos por unidad de duración
+
+    def payout_for(self, durations):
+        """Payout por duración (escalar o array)"""
+        durations = np.asarray(durations)
+        keys = np.array(sorted(self.payout_table), dtype=float)
+        if len(keys) == 0:
+            return np.full(durations.shape, self.default_payout, dtype=float)
+        values = np.array([self.payout_table[k] for k in sorted(self.payout_table)])
+        idx = np.clip(np.searchsorted(keys, durations), 0, len(keys) - 1)
+        return np.where(keys[idx] == durations, values[idx], self.default_payout)
+
+    def resolve(
+        self,
+        epochs,
+        prices,
+        entry_epochs,
+        directions,
+        durations,
+        stakes=1.0,
+        entry_on_next_tick=False,
+    ):
+        """
+        Resuelve N contratos sobre una serie de precios en una sola llamada.
+
+        epochs/prices: serie ordenada por epoch (ticks o cierres de velas 1m).
+        directions: 'CALL'/'PUT' o +1/-1.
+        durations: en unidades de duration_unit (minutos por defecto).
+        entry_on_next_tick: usa el primer tick posterior a la compra como spot
+            de entrada (como hace Deriv) en lugar del último conocido.
+
+        Retorna dict de arrays: entry_price, exit_price, win, profit y valid
+        (False si no hay datos para la entrada o la expiración).
+        """
+        epochs = np.asarray(epochs)
+        prices = np.asarray(prices, dtype=float)
+        entry_epochs = np.asarray(entry_epochs)
+        directions = np.asarray(directions)
+        if directions.dtype.kind in "US":
+            directions = np.where(directions == "CALL", 1, -1)
+        durations = np.asarray(durations)
+        stakes = np.broadcast_to(np.asarray(stakes, dtype=float), entry_epochs.shape)
+
+        exit_epochs = entry_epochs + durations * self.duration_unit
+        side = "right"
+        entry_idx = np.searchsorted(epochs, entry_epochs, side=side)
+        if not entry_on_next_tick:
+            entry_idx = entry_idx - 1
+        exit_idx = np.searchsorted(epochs, exit_epochs, side=side) - 1
+
+        n = len(epochs)
+        valid = (entry_idx >= 0) & (entry_idx < n) & (exit_idx >= entry_idx)
+        if n:
+            valid &= exit_epochs <= epochs[-1]
+        entry_idx = np.clip(entry_idx, 0, max(n - 1, 0))
+        exit_idx = np.clip(exit_idx, 0, max(n - 1, 0))
+
+        entry_price = prices[entry_idx] if n else np.full(entry_epochs.shape, np.nan)
+        exit_price = prices[exit_idx] if n else np.full(entry_epochs.shape, np.nan)
+        win = valid & (np.sign(exit_price - entry_price) * directions > 0)
+        payout = self.payout_for(durations)
+        profit = np.where(win, np.round(stakes * payout, 2), -stakes)
+
+        return {
+            "entry_price": np.where(valid, entry_price, np.nan),
+            "exit_price": np.where(valid, exit_price, np.nan),
+            "win": win,
+            "profit": np.where(valid, profit, np.nan),
+            "valid": valid,
+        }
+
+    def settle(self, direction, entry_price, exit_price, stake, duration):
+        """Liquida un único contrato ya conocido (modo live/simulación)"""
+        move = float(exit_price) - float(entry_price)
+        win = move > 0 if direction == "CALL" else move < 0
+        payout = float(self.payout_for(duration))
+        return round(stake * payout, 2) if win else -stake
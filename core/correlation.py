@@ -1,40 +1,230 @@
 import numpy as np
-from collections import defaultdict, deque
+
+from config import CORRELATION_RESOLUTION
+from core.clock import wall_clock
+
+
+class RollingPairStats:
+    """
+    Sumas móviles de todos los pares de columnas (n x n): conteo, x, x² y
+    xy sobre filas de retornos (NaN donde falta dato). [i, j] acumula solo
+    las filas en que ambas columnas tienen dato. Al deslizar la ventana se
+    restan las filas que salen, así la correlación de un par se lee en O(1).
+    """
+
+    def __init__(self, n=8):
+        self.count = np.zeros((n, n))
+        self.sx = np.zeros((n, n))  # [i, j]: suma de x_i donde j también tiene dato
+        self.sxx = np.zeros((n, n))
+        self.sxy = np.zeros((n, n))
+
+    @property
+    def size(self):
+        return self.count.shape[0]
+
+    def grow(self, n):
+        """Amplía las matrices a n columnas (las nuevas sin muestras)"""
+        if n <= self.size:
+            return
+        for name in ("count", "sx", "sxx", "sxy"):
+            grown = np.zeros((n, n))
+            old = getattr(self, name)
+            grown[: old.shape[0], : old.shape[1]] = old
+            setattr(self, name, grown)
+
+    def add(self, rows, sign=1.0):
+        """Suma (o resta, con sign=-1) un bloque de filas (k x n)"""
+        if len(rows) == 0:
+            return
+        n = rows.shape[1]
+        mask = np.isfinite(rows)
+        x = np.where(mask, rows, 0.0)
+        m = mask.astype(float)
+        self.count[:n, :n] += sign * (m.T @ m)
+        self.sx[:n, :n] += sign * (x.T @ m)
+        self.sxx[:n, :n] += sign * ((x * x).T @ m)
+        self.sxy[:n, :n] += sign * (x.T @ x)
+
+    def remove(self, rows):
+        self.add(rows, -1.0)
+
+    def reset(self, rows):
+        """Recalcula desde cero para no acumular error de redondeo"""
+        for name in ("count", "sx", "sxx", "sxy"):
+            getattr(self, name)[:] = 0.0
+        self.add(rows)
+
+    def correlation(self, i, j, min_points=10):
+        """Correlación del par (i, j) o None si faltan datos"""
+        n = self.count[i, j]
+        if n < min_points:
+            return None
+        sx, sy = self.sx[i, j], self.sx[j, i]
+        cov = self.sxy[i, j] - sx * sy / n
+        var_x = self.sxx[i, j] - sx * sx / n
+        var_y = self.sxx[j, i] - sy * sy / n
+        if var_x <= 0 or var_y <= 0:
+            return None
+        return float(np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0))
+
+    def matrix(self, n, min_points=10):
+        """Matriz de correlación (n x n), NaN donde faltan datos"""
+        count = self.count[:n, :n]
+        sx = self.sx[:n, :n]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.sxy[:n, :n] - sx * sx.T / count
+            var_i = self.sxx[:n, :n] - sx * sx / count
+            corr = cov / np.sqrt(var_i * var_i.T)
+        corr[(count < min_points) | ~np.isfinite(corr)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
 
 
 class CorrelationGuard:
-    def __init__(self, maxlen=1000, correlation_threshold=0.8):
+    """
+    Filtro de correlación entre símbolos.
+
+    Los precios se guardan en una matriz compartida (ventana x símbolos)
+    indexada por epoch, en intervalos de 'resolution' segundos, de modo que
+    solo se emparejan precios del mismo instante. La correlación se calcula
+    sobre retornos logarítmicos (los niveles de precio de índices con
+    tendencia inflan la correlación) con sumas móviles por par
+    (RollingPairStats): cada intervalo con datos nuevos suma su fila de
+    retornos y resta la que sale de la ventana, y las consultas leen el par
+    en O(1).
+    """
+
+    def __init__(
+        self,
+        maxlen=1000,
+        correlation_threshold=0.8,
+        resolution=CORRELATION_RESOLUTION,
+        min_points=10,
+        clock=None,
+    ):
         self.maxlen = maxlen
         self.correlation_threshold = correlation_threshold
-        self.price_history = defaultdict(lambda: deque(maxlen=maxlen))
+        self.resolution = resolution
+        self.min_points = min_points
+        self.clock = clock or wall_clock
         self.correlation_matrix = {}
+        self.symbols = []
+        self._index = {}  # símbolo -> columna
+        self._prices = np.full((maxlen, 8), np.nan)
+        self._buckets = np.full(maxlen, -1, dtype=np.int64)  # bucket de cada fila
+        self._latest_bucket = -1
+        # Retornos ya sumados en _stats, por fila (bucket -1: ninguno)
+        self._returns = np.full((maxlen, 8), np.nan)
+        self._return_buckets = np.full(maxlen, -1, dtype=np.int64)
+        self._stats = RollingPairStats()
+        self._touched = set()  # buckets con precios nuevos sin sumar
+        self._committed = -1  # _latest_bucket en la última actualización
+        self._since_resync = 0
+        self._corr = None  # matriz cacheada (n x n)
 
-    def update_price(self, symbol, price):
-        self.price_history[symbol].append(price)
+    def update_price(self, symbol, price, epoch=None):
+        col = self._index.get(symbol)
+        if col is None:
+            col = self._add_symbol(symbol)
+
+        epoch = self.clock.time() if epoch is None else epoch
+        bucket = int(epoch // self.resolution)
+        if bucket <= self._latest_bucket - self.maxlen:
+            return  # fuera de la ventana
+        row = bucket % self.maxlen
+        if self._buckets[row] != bucket:
+            if self._buckets[row] > bucket:
+                return
+            self._prices[row, :] = np.nan
+            self._buckets[row] = bucket
+        self._prices[row, col] = price
+        self._latest_bucket = max(self._latest_bucket, bucket)
+        self._touched.add(bucket)
+
+    def _add_symbol(self, symbol):
+        col = len(self.symbols)
+        if col == self._prices.shape[1]:
+            for name in ("_prices", "_returns"):
+                grown = np.full((self.maxlen, col * 2), np.nan)
+                grown[:, :col] = getattr(self, name)
+                setattr(self, name, grown)
+        self._stats.grow(col + 1)
+        self.symbols.append(symbol)
+        self._index[symbol] = col
+        return col
+
+    def _update_stats(self):
+        """
+        Lleva a _stats los precios recibidos desde la última consulta: quita
+        los retornos que salen de la ventana o cuyos precios cambiaron y suma
+        los nuevos. Un precio del bucket b afecta a los retornos b y b + 1.
+        """
+        if not self._touched and self._committed == self._latest_bucket:
+            return
+        n = len(self.symbols)
+        start = self._latest_bucket - self.maxlen + 1  # primer bucket en ventana
+        candidates = set()
+        for bucket in self._touched:
+            candidates.update((bucket, bucket + 1))
+        self._touched = set()
+        self._committed = self._latest_bucket
+
+        # Solo hay retorno si el bucket anterior también está en la ventana
+        stale = (self._return_buckets >= 0) & (
+            (self._return_buckets <= start)
+            | (self._return_buckets != self._buckets)
+            | np.isin(self._return_buckets, list(candidates))
+        )
+        if stale.any():
+            self._stats.remove(self._returns[stale, :n])
+            self._return_buckets[stale] = -1
+
+        added = []
+        for bucket in sorted(candidates):
+            if bucket <= start or bucket > self._latest_bucket:
+                continue
+            row, prev = bucket % self.maxlen, (bucket - 1) % self.maxlen
+            if self._buckets[row] != bucket or self._buckets[prev] != bucket - 1:
+                continue
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self._returns[row] = np.log(self._prices[row]) - np.log(
+                    self._prices[prev]
+                )
+            self._return_buckets[row] = bucket
+            added.append(row)
+        self._stats.add(self._returns[added, :n])
+
+        self._since_resync += len(added)
+        if self._since_resync >= self.maxlen:
+            self._since_resync = 0
+            self._stats.reset(self._returns[self._return_buckets >= 0, :n])
+        self._corr = None
+
+    def correlation_array(self):
+        """
+        Matriz de correlación (n x n) de retornos log, con pares calculados
+        sobre los instantes en que ambos símbolos tienen retorno. NaN si un
+        par tiene menos de min_points observaciones. Cacheada hasta nuevos datos.
+        """
+        self._update_stats()
+        if self._corr is None:
+            self._corr = self._stats.matrix(len(self.symbols), self.min_points)
+        return self._corr
+
+    def get_correlation(self, sym1, sym2):
+        """Correlación del par en O(1) (None si faltan datos)"""
+        i, j = self._index.get(sym1), self._index.get(sym2)
+        if i is None or j is None or i == j:
+            return None
+        self._update_stats()
+        return self._stats.correlation(i, j, self.min_points)
 
     def compute_correlations(self):
-        symbols = list(self.price_history.keys())
-        if len(symbols) < 2:
-            return {}
-
-        # Ensure all price series have the same length
-        min_length = min(len(self.price_history[s]) for s in symbols)
-        if min_length < 10:  # Minimum data points for correlation
-            return {}
-
-        # Create aligned price arrays
-        aligned_prices = {}
-        for symbol in symbols:
-            prices = list(self.price_history[symbol])[-min_length:]
-            aligned_prices[symbol] = prices
-
-        # Compute correlation matrix
+        corr = self.correlation_array()
         correlation_matrix = {}
-        for i, sym1 in enumerate(symbols):
-            for sym2 in symbols[i + 1 :]:
-                if sym1 != sym2:
-                    corr = np.corrcoef(aligned_prices[sym1], aligned_prices[sym2])[0, 1]
-                    correlation_matrix[(sym1, sym2)] = corr
+        for i, sym1 in enumerate(self.symbols):
+            for j in range(i + 1, len(self.symbols)):
+                if not np.isnan(corr[i, j]):
+                    correlation_matrix[(sym1, self.symbols[j])] = float(corr[i, j])
 
         self.correlation_matrix = correlation_matrix
         return correlation_matrix
@@ -44,17 +234,11 @@ class CorrelationGuard:
         if not current_symbols:
             return True
 
-        self.compute_correlations()
-
         for open_symbol in current_symbols:
             if open_symbol == symbol:
                 continue
 
-            # Check both orderings of the symbol pair
-            corr1 = self.correlation_matrix.get((symbol, open_symbol))
-            corr2 = self.correlation_matrix.get((open_symbol, symbol))
-            corr = corr1 if corr1 is not None else corr2
-
+            corr = self.get_correlation(symbol, open_symbol)
             if corr is not None and abs(corr) > self.correlation_threshold:
                 return False
 
@@ -63,7 +247,7 @@ class CorrelationGuard:
     def get_highly_correlated_pairs(self):
         """Return pairs of symbols with high correlation"""
         highly_correlated = []
-        for (sym1, sym2), corr in self.correlation_matrix.items():
+        for (sym1, sym2), corr in self.compute_correlations().items():
             if abs(corr) > self.correlation_threshold:
                 highly_correlated.append((sym1, sym2, corr))
         return highly_correlated
@@ -1,58 +1,210 @@
-from utils.indicators import (
-    calc_rsi,
-    calc_macd,
-    calc_atr,
-    detect_divergence,
-    dynamic_sr_levels,
-)
+from collections import deque
+
+from core.ohlc_buffers import HIGHER_TF
+from utils.indicators import detect_divergence, dynamic_sr_levels
+
+# Minutos por vela de cada temporalidad
+TF_MINUTES = {"m1": 1, **HIGHER_TF}
+# Velas que se entregan a la estrategia: S/R usa hasta 200, divergencias 25
+FEATURE_TAIL = 200
+MIN_CANDLES = 35
+SERIES = ("closes", "highs", "lows", "rsi", "macd", "signal", "hist", "atr")
+
+
+class IndicatorState:
+    """
+    RSI, MACD y ATR de una temporalidad actualizados de forma incremental.
+
+    Mismas definiciones que utils.indicators (RSI y ATR con medias simples
+    de 14, EMAs 12/26/9), pero cada vela nueva cuesta O(1) en lugar de
+    recalcular la ventana entera. La última vela queda pendiente: mientras
+    su minuto (o bucket de 5m/15m) sigue abierto se recalcula sobre el
+    estado consolidado hasta la anterior, y se consolida cuando llega la
+    siguiente. Las EMAs siguen desde la primera vela vista en lugar de
+    reiniciarse en la más antigua de la ventana cuando esta se desliza.
+    """
+
+    def __init__(
+        self,
+        minutes=1,
+        rsi_period=14,
+        fast=12,
+        slow=26,
+        signal=9,
+        atr_period=14,
+        tail=FEATURE_TAIL,
+    ):
+        self.minutes = minutes
+        self.rsi_period = rsi_period
+        self.atr_period = atr_period
+        self.k_fast = 2.0 / (fast + 1.0)
+        self.k_slow = 2.0 / (slow + 1.0)
+        self.k_signal = 2.0 / (signal + 1.0)
+        self.tail = tail
+        self.reset()
+
+    def reset(self):
+        self.key = None  # bucket de la vela pendiente
+        self.count = 0  # velas consolidadas
+        self._last = None  # vela pendiente
+        self._ema_fast = self._ema_slow = self._ema_signal = None
+        self._prev_close = None
+        # Variaciones y TR consolidados: la vela pendiente completa el periodo
+        self._gains = deque(maxlen=self.rsi_period - 1)
+        self._losses = deque(maxlen=self.rsi_period - 1)
+        self._trs = deque(maxlen=self.atr_period - 1)
+        # Series consolidadas: solo la cola que ve la estrategia
+        self.series = {name: deque(maxlen=self.tail - 1) for name in SERIES}
+
+    def _key(self, candle):
+        return int(candle["epoch"]) // (60 * self.minutes)
+
+    def sync(self, candles):
+        """
+        Pone el estado al día con las velas (deque o lista por epoch):
+        reemplaza la pendiente y añade las posteriores. Si la pendiente ya
+        no está (ventana reconstruida) se reinicia y se recorre todo.
+        """
+        n = len(candles)
+        if n == 0:
+            self.reset()
+            return
+        i = n - 1
+        if self.key is not None:
+            while i >= 0 and self._key(candles[i]) > self.key:
+                i -= 1
+        if self.key is None or i < 0 or self._key(candles[i]) != self.key:
+            self.reset()
+            i = 0
+            self.key = self._key(candles[0])
+        self._last = candles[i]
+        for j in range(i + 1, n):
+            self._commit()
+            self._last = candles[j]
+            self.key = self._key(self._last)
+
+    def needed(self, candles):
+        """
+        Velas finales que sync() necesita (desde la pendiente incluida).
+        Todas si el estado está vacío o la pendiente ya no está.
+        """
+        n = len(candles)
+        if self.key is None:
+            return n
+        i = n - 1
+        while i >= 0 and self._key(candles[i]) > self.key:
+            i -= 1
+        if i < 0 or self._key(candles[i]) != self.key:
+            return n
+        return n - i
+
+    def _step(self):
+        """
+        Valores de la vela pendiente sobre el estado consolidado. Retorna
+        (valores por serie, (ganancia, pérdida, TR, EMAs)) para consolidarla.
+        """
+        c = self._last
+        close, high, low = float(c["close"]), float(c["high"]), float(c["low"])
+        prev = self._prev_close
+
+        if prev is None:
+            gain = loss = None
+            tr = 0.0  # el TR de la primera vela es 0
+            ema_fast = ema_slow = close
+        else:
+            delta = close - prev
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            tr = max(high - low, abs(high - prev), abs(low - prev))
+            ema_fast = self._ema_fast * (1 - self.k_fast) + close * self.k_fast
+            ema_slow = self._ema_slow * (1 - self.k_slow) + close * self.k_slow
+
+        # RSI: media de las últimas rsi_period variaciones (50 hasta tenerlas)
+        rsi = 50.0
+        if self.count >= self.rsi_period:
+            g = (sum(self._gains) + gain) / self.rsi_period
+            l = (sum(self._losses) + loss) / self.rsi_period
+            rsi = 100.0 if l == 0 else 100 - (100 / (1 + g / l))
+
+        macd = ema_fast - ema_slow
+        if self._ema_signal is None:
+            ema_signal = macd
+        else:
+            ema_signal = self._ema_signal * (1 - self.k_signal) + macd * self.k_signal
+
+        # ATR: media de los últimos atr_period TR (menos al principio)
+        atr = (sum(self._trs) + tr) / (len(self._trs) + 1)
+
+        values = {
+            "closes": close,
+            "highs": high,
+            "lows": low,
+            "rsi": rsi,
+            "macd": macd,
+            "signal": ema_signal,
+            "hist": macd - ema_signal,
+            "atr": atr,
+        }
+        return values, (gain, loss, tr, ema_fast, ema_slow, ema_signal)
+
+    def _commit(self):
+        """Consolida la vela pendiente"""
+        values, (gain, loss, tr, *emas) = self._step()
+        if gain is not None:
+            self._gains.append(gain)
+            self._losses.append(loss)
+        self._trs.append(tr)
+        self._ema_fast, self._ema_slow, self._ema_signal = emas
+        self._prev_close = values["closes"]
+        for name, value in values.items():
+            self.series[name].append(value)
+        self.count += 1
+
+    def tails(self, length):
+        """Últimos 'length' valores de cada serie, con la vela pendiente"""
+        values, _ = self._step()
+        out = {}
+        for name, value in values.items():
+            series = list(self.series[name])
+            series.append(value)
+            out[name] = series[-length:]
+        return out
 
 
 class FeatureEngine:
-    def __init__(self, buffers):
+    def __init__(self, buffers, states=None):
         self.buffers = buffers
+        # (símbolo, tf) -> IndicatorState; se puede compartir entre motores
+        # que leen copias de los mismos buffers (ver AsyncDerivWS)
+        self.states = {} if states is None else states
 
     def compute_features(self, symbol):
         """
         Calcula features por TF: RSI, MACD, ATR, divergencias, S/R y volumen sintético (ATR).
+        Las series cubren las últimas FEATURE_TAIL velas; RSI, MACD y ATR se
+        actualizan solo con las velas nuevas desde la llamada anterior.
         """
         f = {}
 
         def tf_features(ohlc_deque, tag):
-            arr = list(ohlc_deque)
-            if len(arr) < 35:
+            if len(ohlc_deque) < MIN_CANDLES:
                 return None
-            closes = [float(x["close"]) for x in arr]
-            highs = [float(x["high"]) for x in arr]
-            lows = [float(x["low"]) for x in arr]
-
-            rsi = calc_rsi(closes, 14)
-            macd, sig, hist = calc_macd(closes, 12, 26, 9)
-            atr = calc_atr(arr, 14)
+            state = self.states.get((symbol, tag))
+            if state is None:
+                state = self.states[(symbol, tag)] = IndicatorState(TF_MINUTES[tag])
+            state.sync(ohlc_deque)
+            feats = state.tails(min(FEATURE_TAIL, len(ohlc_deque)))
+            closes = feats["closes"]
 
             # volumen sintético (usamos ATR como proxy)
-            vol_synth = atr
+            feats["vol_synth"] = feats["atr"]
 
             # divergencias con RSI y MACD(hist)
-            div_rsi = detect_divergence(closes, rsi, lookback=25)
-            div_macd = detect_divergence(closes, hist, lookback=25)
+            feats["div_rsi"] = detect_divergence(closes, feats["rsi"], lookback=25)
+            feats["div_macd"] = detect_divergence(closes, feats["hist"], lookback=25)
 
             # S/R dinámicos
-            sr = dynamic_sr_levels(closes, window=min(200, len(closes)))
-
-            return {
-                "closes": closes,
-                "highs": highs,
-                "lows": lows,
-                "rsi": rsi,
-                "macd": macd,
-                "signal": sig,
-                "hist": hist,
-                "atr": atr,
-                "vol_synth": vol_synth,
-                "div_rsi": div_rsi,
-                "div_macd": div_macd,
-                "sr": sr,
-            }
+            feats["sr"] = dynamic_sr_levels(closes, window=min(200, len(closes)))
+            return feats
 
         f["m1"] = tf_features(self.buffers.m1[symbol], "m1")
         f["m5"] = tf_features(self.buffers.m5[symbol], "m5")
@@ -1,22 +1,99 @@
 from collections import deque, defaultdict
 
+# Temporalidades superiores construidas desde 1m: atributo -> minutos
+HIGHER_TF = {"m5": 5, "m15": 15}
+
 
 class OHLCBuffers:
     """
     Mantiene OHLC 1m en vivo y construye 5m y 15m por agregación.
+
+    Las velas superiores se actualizan de forma incremental al añadir o
+    reemplazar una vela 1m: solo cambian la primera (si la ventana 1m
+    descarta su vela más antigua) y la última, así que el coste es O(1) y
+    el resultado es el mismo que reagregar toda la ventana 1m.
     """
 
     def __init__(self, maxlen=1000):
+        self.maxlen = maxlen
         self.m1 = defaultdict(lambda: deque(maxlen=maxlen))  # symbol -> list[dict ohlc]
         self.m5 = defaultdict(lambda: deque(maxlen=maxlen))
         self.m15 = defaultdict(lambda: deque(maxlen=maxlen))
 
     def push_ohlc_1m(self, symbol, ohlc):
         # ohlc: {"open":..,"high":..,"low":..,"close":..,"epoch":..}
-        self.m1[symbol].append(ohlc)
+        m1 = self.m1[symbol]
+        evicted = m1[0] if len(m1) == self.maxlen else None
+        m1.append(ohlc)
+
+        for attr, minutes in HIGHER_TF.items():
+            out = getattr(self, attr)[symbol]
+            if evicted is not None:
+                self._refresh_head(m1, out, minutes)
+            bucket = self._bucket(ohlc, minutes)
+            if out and self._bucket(out[-1], minutes) == bucket:
+                self._refresh_tail(m1, out, minutes)
+            else:
+                out.append(self._aggregate_bucket([ohlc]))
+
+    def upsert_ohlc_1m(self, symbol, ohlc):
+        """
+        Añade la vela 1m o, si su epoch coincide con la última, la reemplaza
+        (vela en curso). Las actualizaciones de minutos ya superados se
+        ignoran. Retorna True si el buffer cambió.
+        """
+        m1 = self.m1[symbol]
+        if m1:
+            last_epoch = int(m1[-1]["epoch"])
+            epoch = int(ohlc["epoch"])
+            if epoch == last_epoch:
+                m1[-1] = ohlc
+                for attr, minutes in HIGHER_TF.items():
+                    self._refresh_tail(m1, getattr(self, attr)[symbol], minutes)
+                return True
+            if epoch < last_epoch:
+                return False
+        self.push_ohlc_1m(symbol, ohlc)
+        return True
+
+    def extend_ohlc_1m(self, symbol, candles):
+        """
+        Añade un bloque de velas 1m dado por columnas (epoch, open, high,
+        low, close), ordenado por epoch. Se fusiona sin duplicados: lo
+        anterior a la última vela se ignora y la de igual epoch se reemplaza.
+        Las temporalidades superiores se reagregan una sola vez.
+        Retorna el número de velas añadidas o reemplazadas.
+        """
+        epochs = [int(e) for e in candles["epoch"]]
+        m1 = self.m1[symbol]
+        start = 0
+        if m1:
+            last_epoch = int(m1[-1]["epoch"])
+            while start < len(epochs) and epochs[start] < last_epoch:
+                start += 1
+        start = max(start, len(epochs) - self.maxlen)
+        if start >= len(epochs):
+            return 0
+
+        rows = [
+            {"open": o, "high": h, "low": l, "close": c, "epoch": e}
+            for o, h, l, c, e in zip(
+                _as_floats(candles["open"][start:]),
+                _as_floats(candles["high"][start:]),
+                _as_floats(candles["low"][start:]),
+                _as_floats(candles["close"][start:]),
+                epochs[start:],
+            )
+        ]
+        if m1 and rows[0]["epoch"] == int(m1[-1]["epoch"]):
+            m1.pop()
+        m1.extend(rows)
         self._rebuild_higher_tf(symbol)
+        return len(rows)
 
     def _rebuild_higher_tf(self, symbol):
+        """Reagrega 5m y 15m desde toda la ventana 1m"""
+
         def aggregate(src, minutes):
             arr = list(src)
             if not arr:
@@ -47,6 +124,35 @@ class OHLCBuffers:
         for k in aggregate(m1, 15):
             self.m15[symbol].append(k)
 
+    @staticmethod
+    def _bucket(candle, minutes):
+        minute_index = int(candle["epoch"] // 60)
+        return minute_index - (minute_index % minutes)
+
+    def _refresh_head(self, m1, out, minutes):
+        """La vela 1m más antigua salió de la ventana: recalcular la primera"""
+        bucket = self._bucket(out[0], minutes)
+        members = []
+        for c in m1:
+            if self._bucket(c, minutes) != bucket:
+                break
+            members.append(c)
+        if members:
+            out[0] = self._aggregate_bucket(members)
+        else:
+            out.popleft()
+
+    def _refresh_tail(self, m1, out, minutes):
+        """Recalcular la última vela superior con sus velas 1m"""
+        bucket = self._bucket(m1[-1], minutes)
+        members = []
+        for i in range(len(m1) - 1, -1, -1):
+            if self._bucket(m1[i], minutes) != bucket:
+                break
+            members.append(m1[i])
+        members.reverse()
+        out[-1] = self._aggregate_bucket(members)
+
     @staticmethod
     def _aggregate_bucket(bucket):
         if not bucket:
@@ -57,3 +163,9 @@ class OHLCBuffers:
         c = float(bucket[-1]["close"])
         epoch = int(bucket[-1]["epoch"])
         return {"open": o, "high": h, "low": l, "close": c, "epoch": epoch}
+
+
+def _as_floats(values):
+    """Lista de floats de Python desde un array NumPy o una secuencia"""
+    tolist = getattr(values, "tolist", None)
+    return tolist() if tolist is not None else [float(v) for v in values]
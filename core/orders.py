@@ -1,18 +1,108 @@
+import itertools
 import time
+from collections import defaultdict, deque
+
+from config import CLOSED_TRADES_HISTORY, MAX_OPEN_PER_SYMBOL, MAX_OPEN_TOTAL
+from core.clock import wall_clock
 from utils.logger import logger
 
 
+class TradeRecord:
+    """
+    Registro compacto de un trade. Los campos de presentación (hora de
+    apertura y tiempo transcurrido) se formatean bajo demanda.
+    """
+
+    __slots__ = (
+        "id",
+        "symbol",
+        "contract_type",
+        "amount",
+        "open_ts",
+        "close_ts",
+        "status",
+        "profit",
+        "duration",
+        "duration_unit",
+        "entry_price",
+        "feature_vector",
+    )
+
+    def __init__(
+        self,
+        trade_id,
+        symbol,
+        contract_type,
+        amount,
+        open_ts,
+        duration=2,
+        duration_unit="m",
+        entry_price=None,
+        feature_vector=None,
+    ):
+        self.id = trade_id
+        self.symbol = symbol
+        self.contract_type = contract_type
+        self.amount = amount
+        self.open_ts = open_ts
+        self.close_ts = None
+        self.status = "Abierta"
+        self.profit = 0.0
+        self.duration = duration
+        self.duration_unit = duration_unit
+        self.entry_price = entry_price
+        self.feature_vector = feature_vector
+
+    @property
+    def open_time(self):
+        return time.strftime("%H:%M:%S", time.localtime(self.open_ts))
+
+    def elapsed(self, now):
+        end = self.close_ts if self.close_ts is not None else now
+        return f"{int(end - self.open_ts)}s"
+
+    def to_dict(self):
+        """Campos serializables (sin feature_vector) para el archivo en disco"""
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "contract_type": self.contract_type,
+            "amount": self.amount,
+            "open_time": self.open_time,
+            "open_ts": self.open_ts,
+            "close_ts": self.close_ts,
+            "status": self.status,
+            "profit": self.profit,
+            "duration": self.duration,
+            "duration_unit": self.duration_unit,
+            "entry_price": self.entry_price,
+        }
+
+
 class TradeEngine:
-    def __init__(self, risk):
+    def __init__(
+        self,
+        risk,
+        closed_history=CLOSED_TRADES_HISTORY,
+        clock=None,
+    ):
         self.risk = risk
+        self.clock = clock or wall_clock
+        self._trade_seq = itertools.count(1)
         self.balance = 0.0
         self.initial_balance = 0.0
-        self.trades = {}
+        self.trades = {}  # solo trades abiertos
+        self.closed_trades = deque()  # últimos cerrados (ver closed_history)
+        self.closed_history = closed_history
         self.trades_today = []
         self.open_contracts = {}
         self.not_offered_cache = {}
-        self.max_open_per_symbol = 2
-        self.max_open_total = 8
+        self.max_open_per_symbol = MAX_OPEN_PER_SYMBOL
+        self.max_open_total = MAX_OPEN_TOTAL
+
+        # Contadores O(1) de trades abiertos
+        self.open_total = 0
+        self.open_per_symbol = defaultdict(int)
 
     def set_balance(self, bal):
         if self.initial_balance == 0.0:
@@ -21,55 +111,95 @@ class TradeEngine:
         self.balance = bal
 
     def can_open(self, symbol):
-        if (
-            len([t for t in self.trades.values() if t["status"] == "Abierta"])
-            >= self.max_open_total
-        ):
+        if self.open_total >= self.max_open_total:
             return False
-        if (
-            len(
-                [
-                    t
-                    for t in self.trades.values()
-                    if t["status"] == "Abierta" and t["symbol"] == symbol
-                ]
-            )
-            >= self.max_open_per_symbol
-        ):
+        if self.open_per_symbol[symbol] >= self.max_open_per_symbol:
             return False
         return True
 
     def open_trade(
-        self, symbol, direction, stake, feature_vector, duration=2, duration_unit="m"
+        self,
+        symbol,
+        direction,
+        stake,
+        feature_vector,
+        duration=2,
+        duration_unit="m",
+        entry_price=None,
     ):
-        trade_id = f"T{int(time.time()*1000)}"
-        self.trades[trade_id] = {
-            "id": trade_id,
-            "symbol": symbol,
-            "contract_type": direction,
-            "amount": stake,
-            "open_time": time.strftime("%H:%M:%S"),
-            "_open_ts": time.time(),
-            "status": "Abierta",
-            "profit": 0.0,
-            "duration": duration,
-            "duration_unit": duration_unit,
-            "feature_vector": feature_vector,  # Guardamos el contexto
-        }
+        now = self.clock.time()
+        # El contador evita colisiones entre trades del mismo milisegundo
+        trade_id = f"T{int(now*1000)}-{next(self._trade_seq)}"
+        self.trades[trade_id] = TradeRecord(
+            trade_id,
+            symbol,
+            direction,
+            stake,
+            now,
+            duration=duration,
+            duration_unit=duration_unit,
+            entry_price=entry_price,
+            feature_vector=feature_vector,  # Guardamos el contexto
+        )
+        self.open_total += 1
+        self.open_per_symbol[symbol] += 1
         return trade_id
 
+    def cancel_trade(self, trade_id):
+        """Descarta un trade cuya orden no llegó a ejecutarse"""
+        t = self.trades.pop(trade_id, None)
+        if t is None:
+            return
+        self.open_total -= 1
+        self.open_per_symbol[t.symbol] -= 1
+        self.open_contracts.pop(trade_id, None)
+
     def finalize_trade(self, trade_id, profit):
-        if trade_id not in self.trades:
+        t = self.trades.pop(trade_id, None)
+        if t is None:
             return
-        t = self.trades[trade_id]
-        t["status"] = "Cerrada"
-        t["profit"] = profit
-        t["elapsed"] = f"{int(time.time() - t['_open_ts'])}s"
+        self.open_total -= 1
+        self.open_per_symbol[t.symbol] -= 1
+        self.open_contracts.pop(trade_id, None)
+
+        t.status = "Cerrada"
+        t.profit = profit
+        t.close_ts = self.clock.time()
         self.balance += profit
         self.trades_today.append(profit)
         self.risk.on_trade_result(profit)
 
         # Registrar datos para el entrenamiento de ML
-        if "feature_vector" in t:
+        # El vector solo se necesita hasta registrar el resultado
+        feature_vector, t.feature_vector = t.feature_vector, None
+        if feature_vector is not None:
             outcome = 1 if profit > 0 else 0
-            logger.log_training_data(t["feature_vector"], outcome)
+            logger.log_training_data(feature_vector, outcome)
+
+        self._archive(t)
+
+    def _archive(self, trade):
+        """Mueve un trade cerrado al buffer acotado; el más antiguo va a disco"""
+        self.closed_trades.append(trade)
+        if len(self.closed_trades) > self.closed_history:
+            self._spill([self.closed_trades.popleft()])
+
+    @property
+    def archive_path(self):
+        """JSONL del día donde se archivan los cerrados (ver utils.logger)"""
+        return logger.closed_trades_file
+
+    def _spill(self, trades):
+        # Lo escribe el hilo del logger, con la fecha del momento del archivo
+        logger.log_closed_trades([t.to_dict() for t in trades])
+
+    def spill_closed(self):
+        """Archiva en disco todos los trades cerrados retenidos (al salir)"""
+        if self.closed_trades:
+            self._spill(list(self.closed_trades))
+            self.closed_trades.clear()
+
+    def recent_trades(self, limit=20):
+        """Trades abiertos más los últimos cerrados, para la interfaz"""
+        closed = list(self.closed_trades)[-limit:] if limit else []
+        return list(self.trades.values()) + closed
@@ -0,0 +1,345 @@
+import heapq
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    CORRELATION_THRESHOLD,
+    EXPORT_FORMAT,
+    INITIAL_BALANCE,
+    MAX_OPEN_PER_SYMBOL,
+    MAX_OPEN_TOTAL,
+)
+from core.backtester import Backtester
+from core.clock import VirtualClock
+from core.contracts import ContractSimulator
+from core.correlation import CorrelationGuard
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.result_cache import fingerprint
+from core.risk import RiskManager
+from core.strategy import Strategy
+from core.ticks import OHLC_COLUMNS
+
+DIRECTION_CODES = {"CALL": 1, "PUT": -1}
+
+
+class SignalEvaluator:
+    """
+    Reproduce la evaluación de DerivWS._evaluate_symbol vela a vela:
+    OHLCBuffers -> FeatureEngine -> Strategy.score.
+    """
+
+    def __init__(self, maxlen=1000, strategy=None):
+        self.buffers = OHLCBuffers(maxlen=maxlen)
+        self.features = FeatureEngine(self.buffers)
+        self.strategy = strategy or Strategy()
+
+    def push(self, symbol, candle):
+        """Añade una vela 1m y retorna (score, direction, duration) o None"""
+        self.buffers.push_ohlc_1m(symbol, candle)
+        if (
+            len(self.buffers.m1[symbol]) < 35
+            or len(self.buffers.m5[symbol]) < 35
+            or len(self.buffers.m15[symbol]) < 35
+        ):
+            return None
+
+        feats = self.features.compute_features(symbol)
+        if not all([feats["m1"], feats["m5"], feats["m15"]]):
+            return None
+        score, direction, duration, _, _ = self.strategy.score(feats)
+        return score, direction, duration
+
+
+def load_candles(candles):
+    """Normaliza DataFrame / lista de dicts OHLC a un DataFrame ordenado por epoch"""
+    df = candles if isinstance(candles, pd.DataFrame) else pd.DataFrame(candles)
+    df = df[OHLC_COLUMNS].astype(
+        {"epoch": "int64", "open": "float64", "high": "float64", "low": "float64"}
+    )
+    df["close"] = df["close"].astype("float64")
+    return df.sort_values("epoch", kind="stable").reset_index(drop=True)
+
+
+def compute_symbol_signals(symbol, candles, maxlen=1000):
+    """
+    Precalcula score/dirección/duración para cada vela de un símbolo.
+    Función de módulo para poder ejecutarse en procesos worker.
+    """
+    df = load_candles(candles)
+    evaluator = SignalEvaluator(maxlen=maxlen)
+    n = len(df)
+    score = np.zeros(n)
+    direction = np.zeros(n, dtype=np.int8)
+    duration = np.zeros(n, dtype=np.int16)
+
+    cols = [df[c].to_numpy() for c in OHLC_COLUMNS]
+    for i, (epoch, o, h, l, c) in enumerate(zip(*cols)):
+        candle = {"open": o, "high": h, "low": l, "close": c, "epoch": int(epoch)}
+        res = evaluator.push(symbol, candle)
+        if res is None:
+            continue
+        score[i] = res[0]
+        direction[i] = DIRECTION_CODES.get(res[1], 0)
+        duration[i] = res[2]
+
+    return {
+        "epoch": cols[0],
+        "close": cols[4],
+        "score": score,
+        "direction": direction,
+        "duration": duration,
+    }
+
+
+class PortfolioBacktester:
+    """
+    Backtest multi-símbolo sobre velas 1m alineadas en el tiempo.
+
+    Aplica los mismos límites que el modo live (max abiertos por símbolo y
+    totales), el filtro de CorrelationGuard y el RiskManager. Las features se
+    precalculan por símbolo en procesos worker y luego se recorre el flujo de
+    eventos fusionado una sola vez. Los contratos Rise/Fall se resuelven con
+    ContractSimulator sobre los cierres 1m.
+    """
+
+    def __init__(
+        self,
+        initial_balance=INITIAL_BALANCE,
+        max_open_per_symbol=MAX_OPEN_PER_SYMBOL,
+        max_open_total=MAX_OPEN_TOTAL,
+        correlation_threshold=CORRELATION_THRESHOLD,
+        threshold=None,
+        simulator=None,
+        workers=None,
+        maxlen=1000,
+    ):
+        self.initial_balance = initial_balance
+        self.max_open_per_symbol = max_open_per_symbol
+        self.max_open_total = max_open_total
+        self.correlation_threshold = correlation_threshold
+        self.threshold = threshold
+        self.simulator = simulator or ContractSimulator()
+        self.workers = workers
+        self.maxlen = maxlen
+        self.backtester = Backtester(initial_balance=initial_balance)
+
+    def compute_signals(self, candles_by_symbol):
+        """Precalcula señales de todos los símbolos en paralelo"""
+        symbols = list(candles_by_symbol.keys())
+        workers = self.workers or min(len(symbols), os.cpu_count() or 1)
+        if workers <= 1 or len(symbols) <= 1:
+            return {
+                s: compute_symbol_signals(s, candles_by_symbol[s], self.maxlen)
+                for s in symbols
+            }
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                s: pool.submit(
+                    compute_symbol_signals, s, candles_by_symbol[s], self.maxlen
+                )
+                for s in symbols
+            }
+            return {s: f.result() for s, f in futures.items()}
+
+    def resolve_contracts(self, signals):
+        """
+        Resuelve de forma vectorizada el contrato candidato de cada vela
+        (stake unitario) y añade 'unit_pnl' y 'exit_price' a las señales.
+        """
+        for sig in signals.values():
+            direction = np.asarray(sig["direction"])
+            res = self.simulator.resolve(
+                sig["epoch"],
+                sig["close"],
+                sig["epoch"],
+                np.where(direction >= 0, 1, -1),
+                np.maximum(np.asarray(sig["duration"]), 1),
+            )
+            sig["unit_pnl"] = np.where(res["valid"], res["profit"], np.nan)
+            sig["exit_price"] = res["exit_price"]
+        return signals
+
+    @staticmethod
+    def merge_events(signals):
+        """
+        Fusiona las series por símbolo en un único flujo ordenado por
+        (epoch, símbolo). Retorna (symbols, dict de arrays).
+        """
+        symbols = list(signals.keys())
+        parts = {
+            k: []
+            for k in (
+                "epoch",
+                "close",
+                "score",
+                "direction",
+                "duration",
+                "unit_pnl",
+                "exit_price",
+            )
+        }
+        sym_idx = []
+        for i, s in enumerate(symbols):
+            sig = signals[s]
+            for k in parts:
+                parts[k].append(np.asarray(sig[k]))
+            sym_idx.append(np.full(len(sig["epoch"]), i, dtype=np.int32))
+
+        events = {k: np.concatenate(v) for k, v in parts.items()}
+        events["symbol"] = np.concatenate(sym_idx)
+        order = np.lexsort((events["symbol"], events["epoch"]))
+        return symbols, {k: v[order] for k, v in events.items()}
+
+    def cache_params(self):
+        """Parámetros que afectan al resultado (para la huella de caché)"""
+        return {
+            "backtester": "portfolio",
+            "initial_balance": self.initial_balance,
+            "max_open_per_symbol": self.max_open_per_symbol,
+            "max_open_total": self.max_open_total,
+            "correlation_threshold": self.correlation_threshold,
+            "threshold": self.threshold,
+            "payout_table": self.simulator.payout_table,
+            "default_payout": self.simulator.default_payout,
+            "maxlen": self.maxlen,
+        }
+
+    def run(self, candles_by_symbol, signals=None, cache=None):
+        """
+        Ejecuta el backtest de cartera.
+        candles_by_symbol: dict símbolo -> DataFrame/lista de velas 1m.
+        signals: señales precalculadas (ver compute_symbol_signals), opcional.
+        cache: ResultCache opcional; con señales precalculadas no se usa.
+        """
+        if cache is None or signals is not None:
+            return self._run(candles_by_symbol, signals)
+
+        key = fingerprint(
+            candles_by_symbol, Strategy(), RiskManager(), self.cache_params()
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            bt = self.backtester
+            bt.trades = cached["trades"].to_dict("records")
+            bt.equity_curve = cached["equity_curve"]["equity"].tolist()
+            bt.balance = bt.equity_curve[-1] if bt.equity_curve else bt.initial_balance
+            return cached["metrics"]
+
+        metrics = self._run(candles_by_symbol)
+        tmp = tempfile.mkdtemp(prefix="portfolio_")
+        try:
+            self.backtester.export_results(tmp, fmt=EXPORT_FORMAT)
+            cache.put(key, tmp)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return metrics
+
+    def _run(self, candles_by_symbol, signals=None):
+        if signals is None:
+            signals = self.compute_signals(candles_by_symbol)
+        symbols, ev = self.merge_events(self.resolve_contracts(signals))
+
+        strategy_threshold = (
+            self.threshold if self.threshold is not None else Strategy().threshold
+        )
+        clock = VirtualClock()
+        risk = RiskManager(clock=clock)
+        guard = CorrelationGuard(
+            correlation_threshold=self.correlation_threshold, clock=clock
+        )
+        bt = self.backtester
+        bt.balance = self.initial_balance
+        bt.trades = []
+        bt.equity_curve = []
+        risk.set_day_start(bt.balance)
+
+        open_heap = []  # (expiry_epoch, seq, trade)
+        open_per_symbol = [0] * len(symbols)
+        seq = 0
+        current_day = None
+
+        epochs = ev["epoch"]
+        for j in range(len(epochs)):
+            epoch = int(epochs[j])
+            sym = int(ev["symbol"][j])
+            price = float(ev["close"][j])
+
+            # Liquidar contratos vencidos antes de evaluar nuevas entradas
+            while open_heap and open_heap[0][0] <= epoch:
+                _, _, trade = heapq.heappop(open_heap)
+                open_per_symbol[trade["_sym"]] -= 1
+                self._settle(trade, risk)
+
+            clock.set(epoch)
+            day = epoch // 86400
+            if day != current_day:
+                current_day = day
+                risk.set_day_start(bt.balance)
+
+            guard.update_price(symbols[sym], price, epoch)
+
+            direction = int(ev["direction"][j])
+            if direction == 0 or ev["score"][j] < strategy_threshold:
+                continue
+            if risk.check_daily_limits(bt.balance) or risk.day_stopped:
+                continue
+            if len(open_heap) >= self.max_open_total:
+                continue
+            if open_per_symbol[sym] >= self.max_open_per_symbol:
+                continue
+            if not risk.can_trade_now(bt.balance):
+                continue
+            open_symbols = {t[2]["symbol"] for t in open_heap}
+            if not guard.can_open_trade(symbols[sym], open_symbols):
+                continue
+
+            unit_pnl = ev["unit_pnl"][j]
+            if np.isnan(unit_pnl):
+                continue  # sin datos de expiración (fin de la serie)
+
+            duration = int(ev["duration"][j])
+            expiry = epoch + duration * self.simulator.duration_unit
+
+            stake = risk.compute_stake(bt.balance)
+            trade = {
+                "_sym": sym,
+                "symbol": symbols[sym],
+                "direction": "CALL" if direction > 0 else "PUT",
+                "stake": stake,
+                "entry_epoch": epoch,
+                "exit_epoch": expiry,
+                "entry_price": price,
+                "exit_price": float(ev["exit_price"][j]),
+                "duration": duration,
+                "score": float(ev["score"][j]),
+                "_unit_pnl": float(unit_pnl),
+            }
+            heapq.heappush(open_heap, (expiry, seq, trade))
+            seq += 1
+            open_per_symbol[sym] += 1
+
+        while open_heap:
+            _, _, trade = heapq.heappop(open_heap)
+            self._settle(trade, risk)
+
+        return bt.calculate_metrics()
+
+    def _settle(self, trade, risk):
+        bt = self.backtester
+        stake = trade.pop("stake")
+        unit_pnl = trade.pop("_unit_pnl")
+        net_pnl = round(stake * unit_pnl, 2) if unit_pnl > 0 else -stake
+        trade.pop("_sym", None)
+        trade.update({"stake": stake, "pnl": net_pnl, "net_pnl": net_pnl})
+
+        bt.balance += net_pnl
+        bt.trades.append(trade)
+        bt.equity_curve.append(bt.balance)
+        risk.on_trade_result(net_pnl)
@@ -0,0 +1,175 @@
+import atexit
+import gzip
+import os
+import threading
+import time
+from queue import Empty, SimpleQueue
+
+from core.clock import VirtualClock
+
+
+def read_frames(path):
+    """
+    Itera (ts, frame) de una grabación: una línea por frame, opcionalmente
+    'ts<TAB>frame'; .gz soportado. Sin ts se devuelve None.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            ts = None
+            if "\t" in line and not line.startswith("{"):
+                ts, line = line.split("\t", 1)
+                ts = float(ts)
+            yield ts, line
+
+
+class FrameRecorder:
+    """
+    Graba los frames entrantes sin procesar como 'ts<TAB>frame' en un gzip
+    de solo añadido (cada sesión es un miembro gzip nuevo del mismo archivo).
+
+    record() solo encola; un hilo escribe por lotes con compresión rápida,
+    de modo que el hilo del socket no hace E/S ni comprime. Los frames JSON
+    de Deriv no contienen saltos de línea, así que una línea es un frame.
+    """
+
+    def __init__(self, path, compresslevel=1, flush_interval=1.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self._queue = SimpleQueue()
+        self._file = gzip.open(path, "ab", compresslevel=compresslevel)
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, frame, ts=None):
+        """Encola un frame (str o bytes) con su instante de recepción"""
+        self._queue.put((time.time() if ts is None else ts, frame))
+
+    def _writer(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            stop = None in batch
+            lines = []
+            for item in batch:
+                if item is None:
+                    continue
+                ts, frame = item
+                if isinstance(frame, str):
+                    frame = frame.encode()
+                lines.append(b"%.6f\t%s\n" % (ts, frame))
+            if lines:
+                self._file.write(b"".join(lines))
+                self.recorded += len(lines)
+
+            # Volcado periódico: ante una caída se pierde como mucho un
+            # intervalo sin pagar un flush de zlib por lote
+            if stop:
+                self._file.close()
+                return
+            if time.monotonic() >= next_flush:
+                self._file.flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def close(self):
+        """Escribe lo pendiente y cierra el archivo (idempotente)"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+class FrameReplayer:
+    """
+    Reproduce una grabación contra los handlers de un DerivWS sin red.
+
+    realtime=False procesa los frames tan rápido como se pueda; con True
+    respeta los intervalos grabados (divididos por speed). Si el cliente usa
+    un VirtualClock, el reloj se mueve al ts de cada frame y los vencimientos
+    programados se ejecutan en orden, así una misma grabación produce las
+    mismas decisiones en cada ejecución.
+
+    El hilo que llama a run() actúa como hilo de procesamiento: las
+    evaluaciones se agrupan igual que en vivo y las tareas encoladas desde
+    otros hilos se ejecutan entre frames.
+    """
+
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+
+    def run(self, realtime=False, speed=1.0, limit=None):
+        client = self.client
+        client._processor_thread = threading.current_thread()
+        virtual = isinstance(client.clock, VirtualClock)
+        if not virtual:
+            client.scheduler.start()
+
+        frames = 0
+        first_ts = None
+        start = time.perf_counter()
+        for ts, frame in read_frames(self.path):
+            if limit is not None and frames >= limit:
+                break
+            if ts is not None:
+                if first_ts is None:
+                    first_ts = ts
+                if realtime:
+                    delay = (ts - first_ts) / speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                if virtual:
+                    client.clock.set(ts)
+                    client.scheduler.run_pending()
+
+            client._process_message(frame)
+            frames += 1
+            self._drain()
+            if client._eval_pending:
+                client.flush_evaluations()
+
+        self._drain()
+        client.flush_evaluations()
+        elapsed = time.perf_counter() - start
+        return {
+            "frames": frames,
+            "seconds": elapsed,
+            "frames_per_s": frames / elapsed if elapsed > 0 else 0.0,
+            "evaluations": client.evaluations,
+            "trades": client.trades_opened,
+        }
+
+    def _drain(self):
+        """Ejecuta lo encolado por otros hilos (planificador, shards)"""
+        queue = self.client.message_queue
+        while True:
+            try:
+                _, item = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                if isinstance(item, tuple):
+                    fn, args = item
+                    fn(*args)
+                else:
+                    self.client._process_message(item)
+            except Exception as e:
+                self.client.debug_print(f"❌ Error en replay: {e}", "ERROR")
+            finally:
+                queue.task_done()
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+import config
+from config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB
+from core.results_io import load_run
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Paquetes cuyo código (todo .py) invalida resultados cacheados
+CODE_DIRS = ("core", "utils")
+# Parámetros de config.py que cambian métricas o trades (no logging, WS,
+# formato de exportación ni tamaño de bloque)
+RESULT_CONFIG_KEYS = (
+    "INITIAL_BALANCE",
+    "RISK_PER_TRADE",
+    "DAILY_TP_PCT",
+    "DAILY_DD_PCT",
+    "MAX_OPEN_PER_SYMBOL",
+    "MAX_OPEN_TOTAL",
+    "STRATEGY_THRESHOLD",
+    "ML_ENABLED",
+    "CORRELATION_THRESHOLD",
+    "CORRELATION_RESOLUTION",
+    "BACKTEST_COMMISSION",
+    "BACKTEST_SLIPPAGE",
+    "CONTRACT_PAYOUTS",
+)
+
+MARKER = ".last_used"
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 del contenido de un archivo, leído por bloques"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def data_digest(data):
+    """Hash de un input de datos: ruta de archivo, DataFrame o lista de velas"""
+    if isinstance(data, (str, os.PathLike)):
+        return file_digest(data)
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    h = hashlib.sha256(",".join(map(str, df.columns)).encode())
+    h.update(hashed.tobytes())
+    return h.hexdigest()
+
+
+def config_snapshot():
+    """Parámetros de config.py que afectan a los resultados"""
+    return {k: getattr(config, k, None) for k in RESULT_CONFIG_KEYS}
+
+
+def code_files():
+    """Rutas relativas de todos los .py de CODE_DIRS, ordenadas"""
+    files = []
+    for package in CODE_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(ROOT_DIR, package)):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            files.extend(
+                os.path.relpath(os.path.join(dirpath, f), ROOT_DIR)
+                for f in filenames
+                if f.endswith(".py")
+            )
+    return sorted(files)
+
+
+def code_version():
+    return {f: file_digest(os.path.join(ROOT_DIR, f)) for f in code_files()}
+
+
+def fingerprint(data_by_symbol, strategy=None, risk=None, params=None):
+    """
+    Clave de caché de un backtest: hash de los datos por símbolo, parámetros
+    de Strategy/RiskManager/backtester, config.py y versión del código.
+    """
+    payload = {
+        "data": {s: data_digest(d) for s, d in sorted(data_by_symbol.items())},
+        "strategy": (
+            {"threshold": strategy.threshold, "weights": strategy.weights}
+            if strategy is not None
+            else None
+        ),
+        "risk": (
+            {k: v for k, v in vars(risk).items() if isinstance(v, (int, float))}
+            if risk is not None
+            else None
+        ),
+        "params": params or {},
+        "config": config_snapshot(),
+        "code": code_version(),
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Caché en disco de resultados de backtest direccionada por contenido.
+    Cada entrada es un directorio de resultados (ver core.results_io) y se
+    expulsa por LRU cuando el total supera max_mb.
+    """
+
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_mb=RESULT_CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """Retorna el run cacheado (load_run) o None"""
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            self.misses += 1
+            return None
+        self._touch(entry)
+        self.hits += 1
+        return load_run(entry)
+
+    def restore(self, key, output_dir):
+        """Copia los archivos de una entrada a output_dir. True si había entrada"""
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            self.misses += 1
+            return False
+        self.hits += 1
+        os.makedirs(output_dir, exist_ok=True)
+        for name in os.listdir(entry):
+            if name != MARKER:
+                shutil.copy2(os.path.join(entry, name), output_dir)
+        self._touch(entry)
+        return True
+
+    def put(self, key, results_dir):
+        """Guarda una copia de un directorio de resultados bajo la clave"""
+        entry = self._entry(key)
+        tmp = tempfile.mkdtemp(prefix=".tmp_", dir=self.cache_dir)
+        try:
+            for name in os.listdir(results_dir):
+                path = os.path.join(results_dir, name)
+                if os.path.isfile(path):
+                    shutil.copy2(path, tmp)
+            self._touch(tmp)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry)
+            os.replace(tmp, entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+        return entry
+
+    def evict(self):
+        """Expulsa las entradas menos usadas hasta quedar bajo max_bytes"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            marker = os.path.join(path, MARKER)
+            used = os.path.getmtime(marker) if os.path.exists(marker) else 0
+            entries.append((used, size, path))
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    @staticmethod
+    def _touch(entry):
+        marker = os.path.join(entry, MARKER)
+        with open(marker, "w") as f:
+            f.write(str(time.time()))
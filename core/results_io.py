@@ -0,0 +1,296 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import log_debug
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+FORMATS = ("parquet", "arrow", "csv")
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+TABLES = ("trades", "equity_curve")
+
+
+class TableWriter:
+    """
+    Escribe una tabla en streaming por row groups (Parquet, Arrow IPC o CSV).
+    Las filas se acumulan por columnas y se vuelcan cada 'row_group_size'.
+    El esquema sale del primer bloque; si uno posterior trae tipos más anchos
+    (int -> float, columna toda None -> tipo real) o columnas nuevas, se
+    amplía y lo ya escrito se reescribe con el esquema nuevo (las columnas
+    nuevas quedan vacías en las filas anteriores).
+    """
+
+    def __init__(self, path, fmt="parquet", row_group_size=50_000, compression="zstd"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato no soportado: {fmt}")
+        if fmt != "csv" and not ARROW_AVAILABLE:
+            raise ImportError("pyarrow no disponible. Usa fmt='csv'.")
+        self.path = path
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.columns = None
+        self.rows = 0
+        self._buffer = None
+        self._pending = 0
+        self._writer = None
+        self._sink = None
+        self._schema = None
+        self._header = None  # columnas escritas en la cabecera CSV
+        self._closed = False
+
+    def write(self, row):
+        """Añade una fila (dict)"""
+        if self.columns is None:
+            self.columns = []
+            self._buffer = {}
+        self._add_columns(row)
+        for c in self.columns:
+            self._buffer[c].append(row.get(c))
+        self._pending += 1
+        if self._pending >= self.row_group_size:
+            self.flush()
+
+    def write_columns(self, columns):
+        """Añade un bloque ya columnar (dict nombre -> array)"""
+        if self._pending:
+            self.flush()
+        if self.columns is None:
+            self.columns = []
+            self._buffer = {}
+        self._add_columns(columns)
+        n = len(next(iter(columns.values()))) if columns else 0
+        block = {c: columns[c] if c in columns else [None] * n for c in self.columns}
+        self._write_block(block, n)
+
+    def _add_columns(self, keys):
+        """Añade al final las columnas que aún no existen"""
+        for c in keys:
+            if c not in self._buffer:
+                self.columns.append(c)
+                self._buffer[c] = [None] * self._pending
+
+    def flush(self):
+        if not self._pending:
+            return
+        block, n = self._buffer, self._pending
+        self._buffer = {c: [] for c in self.columns}
+        self._pending = 0
+        self._write_block(block, n)
+
+    def _write_block(self, block, n):
+        if n == 0:
+            return
+        self.rows += n
+        if self.fmt == "csv":
+            self._write_csv(block)
+            return
+
+        table = pa.Table.from_pydict(block)
+        if self._schema is None:
+            self._open(table.schema)
+        elif table.schema != self._schema:
+            schema = pa.unify_schemas(
+                [self._schema, table.schema], promote_options="permissive"
+            )
+            if schema != self._schema:
+                self._promote(schema)
+            table = table.cast(self._schema)
+        self._write_table(table)
+
+    def _open(self, schema):
+        self._schema = schema
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(
+                self.path, schema, compression=self.compression
+            )
+        else:
+            self._sink = pa.OSFile(self.path, "wb")
+            options = ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = ipc.new_file(self._sink, schema, options=options)
+
+    def _write_table(self, table):
+        if self.fmt == "parquet":
+            self._writer.write_table(table, row_group_size=table.num_rows)
+        else:
+            self._writer.write_table(table)
+
+    def _promote(self, schema):
+        """Reescribe los row groups ya escritos con el esquema ampliado"""
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        previous = self.path + ".promote"
+        os.replace(self.path, previous)
+        self._open(schema)
+        if self.fmt == "parquet":
+            source = pq.ParquetFile(previous)
+            for i in range(source.num_row_groups):
+                self._write_table(_conform(source.read_row_group(i), schema))
+            source.close()
+        else:
+            with pa.memory_map(previous, "r") as mapped:
+                reader = ipc.open_file(mapped)
+                for i in range(reader.num_record_batches):
+                    batch = pa.Table.from_batches([reader.get_batch(i)])
+                    self._write_table(_conform(batch, schema))
+        os.remove(previous)
+
+    def _write_csv(self, block):
+        if self._writer is None:
+            self._sink = open(self.path, "w", newline="")
+            self._writer = csv.writer(self._sink)
+            self._writer.writerow(self.columns)
+            self._header = list(self.columns)
+        elif self._header != self.columns:
+            self._promote_csv()
+        self._writer.writerows(zip(*[block[c] for c in self.columns]))
+        self._sink.flush()
+
+    def _promote_csv(self):
+        """Reescribe el CSV con la cabecera ampliada y celdas vacías"""
+        self._sink.close()
+        previous = self.path + ".promote"
+        os.replace(self.path, previous)
+        extra = [""] * (len(self.columns) - len(self._header))
+        self._sink = open(self.path, "w", newline="")
+        self._writer = csv.writer(self._sink)
+        self._writer.writerow(self.columns)
+        with open(previous, newline="") as source:
+            reader = csv.reader(source)
+            next(reader)
+            self._writer.writerows(row + extra for row in reader)
+        os.remove(previous)
+        self._header = list(self.columns)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        if self._writer is None:
+            # tabla vacía: archivo vacío que load_table interpreta como sin filas
+            open(self.path, "w").close()
+        elif self.fmt != "csv":
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        self._writer = None
+        self._sink = None
+
+
+class ResultWriter:
+    """
+    Exporta resultados de backtest (trades, equity y métricas) en streaming.
+    fmt: 'parquet' (por defecto), 'arrow' (IPC) o 'csv'.
+    """
+
+    def __init__(
+        self,
+        output_dir="backtest_results",
+        fmt="parquet",
+        row_group_size=50_000,
+        compression="zstd",
+    ):
+        if fmt != "csv" and not ARROW_AVAILABLE:
+            log_debug("Warning: pyarrow no disponible. Exportando en CSV.")
+            fmt = "csv"
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.paths = {
+            name: os.path.join(output_dir, name + EXTENSIONS[fmt]) for name in TABLES
+        }
+        self.trades = TableWriter(
+            self.paths["trades"], fmt, row_group_size, compression
+        )
+        self.equity = TableWriter(
+            self.paths["equity_curve"], fmt, row_group_size, compression
+        )
+        self.metrics_path = os.path.join(output_dir, "metrics.json")
+
+    def write_metrics(self, metrics):
+        with open(self.metrics_path, "w") as f:
+            json.dump(metrics, f, indent=2, default=_json_default)
+
+    def close(self):
+        self.trades.close()
+        self.equity.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _conform(table, schema):
+    """Tabla con las columnas de 'schema' (nulas si faltan) y sus tipos"""
+    arrays = [
+        (
+            table.column(field.name).cast(field.type)
+            if field.name in table.column_names
+            else pa.nulls(table.num_rows, field.type)
+        )
+        for field in schema
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"No serializable: {type(value)}")
+
+
+def _find_table(output_dir, name):
+    for fmt in FORMATS:
+        path = os.path.join(output_dir, name + EXTENSIONS[fmt])
+        if os.path.exists(path):
+            return path, fmt
+    raise FileNotFoundError(f"No se encontró la tabla '{name}' en {output_dir}")
+
+
+def load_table(output_dir, name="trades", columns=None):
+    """Carga una tabla de resultados como DataFrame leyendo solo 'columns'"""
+    path, fmt = _find_table(output_dir, name)
+    if os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=columns or [])
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns)
+    if not ARROW_AVAILABLE:
+        raise ImportError("pyarrow no disponible para leer " + path)
+    if fmt == "parquet":
+        return pq.read_table(path, columns=columns).to_pandas()
+    with pa.memory_map(path, "r") as source:
+        table = ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas()
+
+
+def load_run(output_dir, trade_columns=None, equity_columns=None):
+    """Carga un run completo: trades, equity y métricas"""
+    metrics_path = os.path.join(output_dir, "metrics.json")
+    metrics = {}
+    if os.path.exists(metrics_path):
+        with open(metrics_path) as f:
+            metrics = json.load(f)
+    return {
+        "trades": load_table(output_dir, "trades", trade_columns),
+        "equity_curve": load_table(output_dir, "equity_curve", equity_columns),
+        "metrics": metrics,
+    }
@@ -1,8 +1,9 @@
-import time
+from core.clock import wall_clock
 
 
 class RiskManager:
-    def __init__(self):
+    def __init__(self, clock=None):
+        self.clock = clock or wall_clock
         self.base_amount = 10.0
         self.risk_per_trade = 0.003  # 0.3% del balance
         self.stake_max_pct = 0.01  # 1% del balance
@@ -38,11 +39,11 @@ class RiskManager:
             self.win_streak = 0
 
         if self.loss_streak >= self.loss_streak_pause:
-            self.pause_until = time.time() + self.loss_pause_seconds
+            self.pause_until = self.clock.time() + self.loss_pause_seconds
             self.loss_streak = 0
 
     def can_trade_now(self, balance):
-        if time.time() < self.pause_until:
+        if self.clock.time() < self.pause_until:
             return False
         return balance >= self.stake_min and not self.day_stopped
 
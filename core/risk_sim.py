@@ -0,0 +1,162 @@
+import itertools
+
+import numpy as np
+
+from core.risk import RiskManager
+
+# Parámetros de RiskManager que se pueden barrer (uno por política)
+POLICY_FIELDS = (
+    "base_amount",
+    "risk_per_trade",
+    "stake_max_pct",
+    "stake_min",
+    "win_streak_trigger",
+    "win_streak_boost",
+    "loss_streak_pause",
+    "loss_pause_trades",
+)
+
+
+def default_policy(risk=None):
+    """
+    Devuelve los parámetros actuales de un RiskManager como dict.
+    La pausa por tiempo se traduce a operaciones saltadas (contratos de ~2m).
+    """
+    risk = risk or RiskManager()
+    params = {name: getattr(risk, name) for name in POLICY_FIELDS[:-1]}
+    params["loss_pause_trades"] = max(1, int(round(risk.loss_pause_seconds / 120)))
+    return params
+
+
+def policy_grid(base=None, **axes):
+    """
+    Producto cartesiano de valores por parámetro.
+    Retorna dict nombre -> np.array de forma (P,), listo para simulate_policies.
+
+    Ejemplo: policy_grid(risk_per_trade=[0.002, 0.003], win_streak_boost=[1.0, 1.25])
+    """
+    base = dict(base or default_policy())
+    unknown = set(axes) - set(POLICY_FIELDS)
+    if unknown:
+        raise ValueError(f"Parámetros desconocidos: {sorted(unknown)}")
+
+    names = list(axes.keys())
+    combos = list(itertools.product(*[np.atleast_1d(axes[n]) for n in names]))
+    n = max(1, len(combos))
+    grid = {k: np.full(n, float(v)) for k, v in base.items()}
+    for j, name in enumerate(names):
+        grid[name] = np.array([c[j] for c in combos], dtype=float)
+    return grid
+
+
+def simulate_policies(outcomes, policies, initial_balance=10000.0, payout=0.9):
+    """
+    Evalúa muchas políticas de riesgo sobre las mismas secuencias de resultados.
+
+    outcomes: array (T,) o (S, T). Booleano (True = contrato ganado) o float con
+              el PnL por unidad de stake (p.ej. 0.9 / -1.0).
+    policies: dict nombre -> array (P,) (ver policy_grid). Los campos ausentes
+              toman el valor por defecto de RiskManager.
+
+    Replica RiskManager.compute_stake/on_trade_result con el estado (balance,
+    rachas y pausa) vectorizado en forma (S, P). La pausa por racha de pérdidas
+    se modela como 'loss_pause_trades' resultados saltados. Los límites diarios
+    no se aplican porque las secuencias no tienen noción de día.
+    """
+    outcomes = np.asarray(outcomes)
+    if outcomes.ndim == 1:
+        outcomes = outcomes[None, :]
+    if outcomes.dtype == bool:
+        unit_pnl = np.where(outcomes, payout, -1.0)
+    else:
+        unit_pnl = outcomes.astype(float)
+
+    params = default_policy()
+    params.update(policies)
+    p = {
+        k: np.atleast_1d(np.asarray(v, dtype=float))[None, :] for k, v in params.items()
+    }
+    n_policies = max(v.shape[1] for v in p.values())
+
+    n_seq, n_steps = unit_pnl.shape
+    shape = (n_seq, n_policies)
+    balance = np.full(shape, float(initial_balance))
+    peak = balance.copy()
+    max_dd = np.zeros(shape)
+    win_streak = np.zeros(shape)
+    loss_streak = np.zeros(shape)
+    paused = np.zeros(shape)
+    n_trades = np.zeros(shape, dtype=np.int64)
+    n_wins = np.zeros(shape, dtype=np.int64)
+
+    for t in range(n_steps):
+        active = (paused <= 0) & (balance >= p["stake_min"])
+        paused -= 1
+
+        stake = np.maximum(balance * p["risk_per_trade"], p["base_amount"])
+        stake = np.minimum(stake, balance * p["stake_max_pct"])
+        stake = np.where(
+            win_streak >= p["win_streak_trigger"], stake * p["win_streak_boost"], stake
+        )
+        stake = np.where(loss_streak >= 1, stake * 0.75, stake)
+        stake = np.maximum(p["stake_min"], np.round(stake, 2))
+
+        r = unit_pnl[:, t : t + 1]
+        profit = np.where(active, stake * r, 0.0)
+        balance += profit
+
+        won = active & (profit > 0)
+        lost = active & (profit < 0)
+        win_streak = np.where(won, win_streak + 1, np.where(lost, 0, win_streak))
+        loss_streak = np.where(lost, loss_streak + 1, np.where(won, 0, loss_streak))
+
+        hit_pause = loss_streak >= p["loss_streak_pause"]
+        paused = np.where(hit_pause, p["loss_pause_trades"], paused)
+        loss_streak = np.where(hit_pause, 0, loss_streak)
+
+        n_trades += active
+        n_wins += won
+        np.maximum(peak, balance, out=peak)
+        np.maximum(max_dd, (peak - balance) / peak, out=max_dd)
+
+    total_return = (balance - initial_balance) / initial_balance
+    return {
+        "params": {k: np.broadcast_to(v[0], (n_policies,)) for k, v in p.items()},
+        "final_balance": balance,
+        "total_return_pct": total_return * 100,
+        "max_drawdown_pct": max_dd * 100,
+        "total_trades": n_trades,
+        "win_rate_pct": np.where(n_trades > 0, n_wins / np.maximum(n_trades, 1), 0)
+        * 100,
+    }
+
+
+def rank_policies(result, by="return_over_dd", top=None):
+    """
+    Ordena políticas (mejor primero) promediando sobre las secuencias.
+    by: 'return', 'drawdown' o 'return_over_dd' (retorno / max drawdown).
+    Retorna lista de dicts con parámetros y métricas.
+    """
+    ret = result["total_return_pct"].mean(axis=0)
+    dd = result["max_drawdown_pct"].mean(axis=0)
+
+    if by == "return":
+        order = np.lexsort((dd, -ret))
+    elif by == "drawdown":
+        order = np.lexsort((-ret, dd))
+    elif by == "return_over_dd":
+        order = np.argsort(-(ret / np.maximum(dd, 1e-9)), kind="stable")
+    else:
+        raise ValueError(f"Criterio de ranking desconocido: {by}")
+
+    if top is not None:
+        order = order[:top]
+
+    ranking = []
+    for i in order:
+        row = {k: float(v[i]) for k, v in result["params"].items()}
+        row["total_return_pct"] = float(ret[i])
+        row["max_drawdown_pct"] = float(dd[i])
+        row["total_trades"] = float(result["total_trades"][:, i].mean())
+        ranking.append(row)
+    return ranking
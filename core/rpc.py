@@ -0,0 +1,261 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from config import PROPOSAL_MAX_AGE, STAKE_BAND_STEP
+
+
+class RequestError(Exception):
+    """Error devuelto por la API de Deriv para una petición con req_id"""
+
+    def __init__(self, error, data=None):
+        super().__init__(error.get("message", "Error desconocido"))
+        self.code = error.get("code")
+        self.data = data
+
+
+class RequestMultiplexer:
+    """
+    Capa de peticiones sobre DerivWS.send: etiqueta cada mensaje con un
+    req_id y devuelve un Future que se resuelve con la respuesta que trae el
+    mismo req_id. Las suscripciones reciben además cada actualización.
+    """
+
+    def __init__(self, send_fn, history=1000):
+        self.send_fn = send_fn
+        self._ids = itertools.count(1)
+        self._pending = {}  # req_id -> (Future, t_envío)
+        self._subscriptions = {}  # req_id -> callback(data)
+        self._lock = threading.Lock()
+        self.rtts = deque(maxlen=history)  # segundos
+
+    def request(self, payload, on_update=None):
+        """Envía payload con req_id. on_update recibe los mensajes siguientes"""
+        req_id = next(self._ids)
+        future = Future()
+        future.req_id = req_id
+        with self._lock:
+            self._pending[req_id] = (future, time.perf_counter())
+            if on_update is not None:
+                self._subscriptions[req_id] = on_update
+
+        if not self.send_fn(dict(payload, req_id=req_id)):
+            self._drop(req_id)
+            future.set_exception(ConnectionError("WebSocket no conectado"))
+        return future
+
+    def resolve(self, data):
+        """
+        Enruta una respuesta por su req_id. Retorna True si pertenecía a una
+        petición o suscripción de esta capa.
+        """
+        req_id = data.get("req_id")
+        if req_id is None:
+            return False
+
+        with self._lock:
+            entry = self._pending.pop(req_id, None)
+            callback = self._subscriptions.get(req_id)
+            if "error" in data:
+                self._subscriptions.pop(req_id, None)
+
+        if entry is not None:
+            future, sent_at = entry
+            self.rtts.append(time.perf_counter() - sent_at)
+            if "error" in data:
+                future.set_exception(RequestError(data["error"], data))
+            else:
+                future.set_result(data)
+        elif callback is not None:
+            callback(data)
+        return entry is not None or callback is not None
+
+    def _drop(self, req_id):
+        with self._lock:
+            self._pending.pop(req_id, None)
+            self._subscriptions.pop(req_id, None)
+
+    def forget(self, req_id):
+        """Deja de enrutar una suscripción"""
+        self._drop(req_id)
+
+    def fail_all(self, exc):
+        """Falla todas las peticiones pendientes (p.ej. al perder la conexión)"""
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._subscriptions.clear()
+        for future, _ in pending:
+            if not future.done():
+                future.set_exception(exc)
+
+
+def stake_band(stake, base=0.35, step=STAKE_BAND_STEP):
+    """Banda de stake: escalón geométrico inmediatamente inferior a 'stake'"""
+    if stake <= base:
+        return round(base, 2)
+    k = np.floor(np.log(stake / base) / np.log(step))
+    return round(float(base * step**k), 2)
+
+
+class ProposalCache:
+    """
+    Mantiene proposals suscritos y pre-calentados por (símbolo, tipo de
+    contrato, duración, banda de stake), para que la compra salga en cuanto
+    Strategy.score supera el umbral, sin el round trip proposal -> buy.
+
+    Cada banda se suscribe con el stake exacto de RiskManager; si el stake
+    cambia (p.ej. tras liquidarse un trade) se vuelve a suscribir. Un
+    proposal solo se usa si su importe coincide con el stake a comprar, así
+    la posición real es siempre la que decidió RiskManager.
+    """
+
+    def __init__(
+        self,
+        rpc,
+        currency="USD",
+        duration_unit="m",
+        max_age=PROPOSAL_MAX_AGE,
+        clock=time.monotonic,
+    ):
+        self.rpc = rpc
+        self.currency = currency
+        self.duration_unit = duration_unit
+        self.max_age = max_age
+        self.clock = clock
+        self.proposals = {}  # key -> {"id", "ask_price", "amount", "received", ...}
+        self._warming = {}  # key -> (importe suscrito, Future de la suscripción)
+        self.decision_latency = deque(maxlen=1000)  # decisión -> envío (s)
+        self.requotes = 0  # compras sin proposal del importe exacto
+
+    def reset(self):
+        """Olvida los proposals (las suscripciones mueren con la conexión)"""
+        self.proposals.clear()
+        self._warming.clear()
+
+    def key(self, symbol, contract_type, duration, stake):
+        return symbol, contract_type, int(duration), stake_band(stake)
+
+    def warm(self, symbol, contract_type, duration, stake):
+        """Suscribe un proposal de la banda por el stake exacto (si no lo está ya)"""
+        key = self.key(symbol, contract_type, duration, stake)
+        amount = round(stake, 2)
+        current = self._warming.get(key)
+        if current is not None:
+            if current[0] == amount:
+                return key
+            self._unsubscribe(key, current[1])
+
+        payload = {
+            "proposal": 1,
+            "subscribe": 1,
+            "amount": amount,
+            "basis": "stake",
+            "contract_type": contract_type,
+            "currency": self.currency,
+            "duration": key[2],
+            "duration_unit": self.duration_unit,
+            "symbol": symbol,
+        }
+        future = self.rpc.request(
+            payload, on_update=lambda d: self._update(key, amount, d)
+        )
+        self._warming[key] = (amount, future)
+        future.add_done_callback(lambda f: self._first(key, amount, f))
+        return key
+
+    def _unsubscribe(self, key, future):
+        """Deja la suscripción de otro importe: sin enrutar y forget en el servidor"""
+        self._warming.pop(key, None)
+        old = self.proposals.pop(key, None)
+        self.rpc.forget(future.req_id)
+        if old and old.get("subscription"):
+            self.rpc.request({"forget": old["subscription"]})
+
+    def _first(self, key, amount, future):
+        if future.exception() is not None:
+            if self._warming.get(key, (None,))[0] == amount:
+                self._warming.pop(key, None)
+                self.proposals.pop(key, None)
+        else:
+            self._update(key, amount, future.result())
+
+    def _update(self, key, amount, data):
+        proposal = data.get("proposal")
+        if not proposal or self._warming.get(key, (None,))[0] != amount:
+            return
+        self.proposals[key] = {
+            "id": proposal["id"],
+            "ask_price": float(proposal["ask_price"]),
+            "amount": amount,
+            "subscription": data.get("subscription", {}).get("id"),
+            "received": self.clock(),
+        }
+
+    def fresh(self, key):
+        p = self.proposals.get(key)
+        if p and self.clock() - p["received"] <= self.max_age:
+            return p
+        return None
+
+    def buy(self, symbol, contract_type, duration, stake, decided_at=None):
+        """
+        Compra con el proposal pre-calentado de la banda si es del mismo
+        importe que 'stake'. Si no hay uno fresco de ese importe compra en un
+        solo paso con 'parameters' (cotiza y compra a la vez) y vuelve a
+        suscribir la banda con el stake nuevo.
+        decided_at: time.perf_counter() del momento de la decisión.
+        Retorna (Future, stake comprado), que siempre es round(stake, 2).
+        """
+        key = self.key(symbol, contract_type, duration, stake)
+        amount = round(stake, 2)
+        proposal = self.fresh(key)
+        if proposal is not None and proposal["amount"] == amount:
+            # El id de proposal se consume con la compra
+            self.proposals.pop(key, None)
+            payload = {"buy": proposal["id"], "price": proposal["ask_price"]}
+        else:
+            if proposal is not None:
+                self.requotes += 1
+            self.warm(symbol, contract_type, duration, stake)
+            payload = {
+                "buy": 1,
+                "price": amount,
+                "parameters": {
+                    "amount": amount,
+                    "basis": "stake",
+                    "contract_type": contract_type,
+                    "currency": self.currency,
+                    "duration": int(duration),
+                    "duration_unit": self.duration_unit,
+                    "symbol": symbol,
+                },
+            }
+
+        future = self.rpc.request(payload)
+        if decided_at is not None:
+            self.decision_latency.append(time.perf_counter() - decided_at)
+        return future, amount
+
+    def latency_report(self):
+        """Percentiles de latencia decisión -> envío y RTT de peticiones (ms)"""
+
+        def pct(values):
+            if not values:
+                return {}
+            arr = np.array(values) * 1000
+            return {
+                "p50": float(np.percentile(arr, 50)),
+                "p99": float(np.percentile(arr, 99)),
+                "max": float(arr.max()),
+                "n": len(arr),
+            }
+
+        return {
+            "decision_to_send_ms": pct(self.decision_latency),
+            "request_rtt_ms": pct(self.rpc.rtts),
+        }
@@ -0,0 +1,124 @@
+import heapq
+import itertools
+import threading
+import time
+
+from utils.logger import log_debug
+
+
+class ScheduledCall:
+    """Llamada programada; cancel() la descarta sin tocar el heap"""
+
+    __slots__ = ("when", "seq", "fn", "args", "cancelled")
+
+    def __init__(self, when, seq, fn, args):
+        self.when = when
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __lt__(self, other):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+
+class ExpiryScheduler:
+    """
+    Planificador de vencimientos con un único hilo y un heap ordenado por
+    instante de disparo. Sustituye a un threading.Timer por contrato.
+
+    time_fn: reloj inyectable (segundos). Con un reloj virtual no se arranca
+    el hilo y se llama a run_pending() tras avanzar el reloj.
+    dispatch: función que ejecuta cada callback (por defecto en el propio
+    hilo del planificador); permite delegarlo al hilo dueño del estado.
+    """
+
+    def __init__(self, time_fn=time.monotonic, dispatch=None):
+        self.time_fn = time_fn
+        self.dispatch = dispatch
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def schedule(self, delay, fn, *args):
+        """Programa fn(*args) dentro de 'delay' segundos"""
+        return self.schedule_at(self.time_fn() + delay, fn, *args)
+
+    def schedule_at(self, when, fn, *args):
+        call = ScheduledCall(when, next(self._seq), fn, args)
+        with self._cond:
+            heapq.heappush(self._heap, call)
+            # Despertar al hilo solo si el nuevo vencimiento es el más próximo
+            if self._heap[0] is call:
+                self._cond.notify()
+        return call
+
+    def cancel(self, call):
+        if call is not None:
+            call.cancel()
+
+    def pending(self):
+        with self._cond:
+            return sum(1 for c in self._heap if not c.cancelled)
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0].when <= now:
+            call = heapq.heappop(self._heap)
+            if not call.cancelled:
+                due.append(call)
+        return due
+
+    def run_pending(self):
+        """Ejecuta todo lo vencido según el reloj actual. Retorna cuántos"""
+        with self._cond:
+            due = self._pop_due(self.time_fn())
+        for call in due:
+            self._execute(call)
+        return len(due)
+
+    def _execute(self, call):
+        try:
+            if self.dispatch is not None:
+                self.dispatch(call.fn, *call.args)
+            else:
+                call.fn(*call.args)
+        except Exception as e:
+            log_debug(f"ERROR en tarea programada {call.fn}: {e}")
+
+    def start(self):
+        """Arranca el hilo del planificador (idempotente)"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                due = self._pop_due(self.time_fn())
+                if not due:
+                    timeout = (
+                        self._heap[0].when - self.time_fn() if self._heap else None
+                    )
+                    self._cond.wait(timeout)
+                    continue
+            for call in due:
+                self._execute(call)
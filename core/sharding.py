@@ -0,0 +1,198 @@
+import multiprocessing as mp
+import threading
+import zlib
+from queue import Empty
+
+from config import EVAL_WORKERS
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+
+MIN_BARS = 35  # velas mínimas por temporalidad para evaluar
+STRATEGY = "__strategy__"  # (STRATEGY, strategy): reemplaza la estrategia
+
+
+def shard_for(symbol, shards):
+    """Shard de un símbolo; crc32 es estable entre procesos (hash() no)"""
+    return zlib.crc32(symbol.encode()) % shards
+
+
+def has_enough_data(buffers, symbol, min_bars=MIN_BARS):
+    return (
+        len(buffers.m1.get(symbol, [])) >= min_bars
+        and len(buffers.m5.get(symbol, [])) >= min_bars
+        and len(buffers.m15.get(symbol, [])) >= min_bars
+    )
+
+
+def _shard_worker(inbox, results, strategy, maxlen):
+    """
+    Proceso worker: dueño de los OHLCBuffers/FeatureEngine de sus símbolos.
+    Drena la cola antes de evaluar, de modo que cada símbolo se evalúa una
+    sola vez por lote con su última vela. Un mensaje (STRATEGY, strategy)
+    reemplaza la estrategia (p.ej. tras reentrenar el modelo en el padre).
+    """
+    buffers = OHLCBuffers(maxlen=maxlen)
+    features = FeatureEngine(buffers)
+    while True:
+        batch = [inbox.get()]
+        while True:
+            try:
+                batch.append(inbox.get_nowait())
+            except Empty:
+                break
+
+        pending = {}
+        stop = False
+        for item in batch:
+            if item is None:
+                stop = True
+                break
+            if item[0] == STRATEGY:
+                strategy = item[1]
+                continue
+            symbol, candles, evaluate, seq, ts = item
+            for candle in candles:
+                buffers.upsert_ohlc_1m(symbol, candle)
+            if evaluate:
+                pending[symbol] = (seq, ts)
+
+        for symbol, (seq, ts) in pending.items():
+            decision, error = None, None
+            try:
+                if has_enough_data(buffers, symbol):
+                    feats = features.compute_features(symbol)
+                    if all([feats["m1"], feats["m5"], feats["m15"]]):
+                        decision = strategy.score(feats)
+            except Exception as e:
+                error = str(e)
+            results.put((symbol, seq, decision, error, ts))
+
+        if stop:
+            return
+
+
+class ShardedEvaluator:
+    """
+    Evaluación de símbolos repartida en procesos worker por crc32(símbolo).
+    Cada worker mantiene las velas de sus símbolos y calcula features y
+    score; las decisiones vuelven por una única cola a on_decision(symbol,
+    decision, error, ts), llamado desde un hilo colector, con el 'ts' que
+    se pasó a submit (p.ej. la recepción de la vela, para descartar
+    decisiones viejas). Quien lo usa debe aplicarlas en el hilo dueño de
+    TradeEngine/RiskManager.
+
+    La estrategia se serializa al arrancar cada worker; update_strategy()
+    envía la versión actual (modelo ML reentrenado o recargado).
+
+    Si un worker muere se relanza al enviarle el siguiente lote; history
+    (símbolo -> velas 1m) permite volver a cargarle las velas de sus
+    símbolos, que el worker perdido tenía en memoria.
+    """
+
+    def __init__(
+        self,
+        strategy,
+        on_decision,
+        workers=EVAL_WORKERS,
+        maxlen=1000,
+        history=None,
+    ):
+        self.strategy = strategy
+        self.on_decision = on_decision
+        self.workers = workers
+        self.maxlen = maxlen
+        self.history = history
+        self.submitted = 0
+        self.completed = 0
+        self.restarts = 0
+        self._inboxes = []
+        self._processes = []
+        self._symbols = []  # por shard: símbolos enviados
+        self._ctx = None
+        self._results = None
+        self._collector = None
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()
+
+    def start(self):
+        """Arranca los workers (idempotente)"""
+        with self._lock:
+            if self._processes:
+                return
+            # spawn: el proceso padre tiene hilos (WebSocket, planificador)
+            self._ctx = mp.get_context("spawn")
+            self._results = self._ctx.Queue()
+            self._inboxes = [None] * self.workers
+            self._processes = [None] * self.workers
+            self._symbols = [set() for _ in range(self.workers)]
+            for shard in range(self.workers):
+                self._spawn(shard)
+            self._collector = threading.Thread(target=self._collect, daemon=True)
+            self._collector.start()
+
+    def _spawn(self, shard):
+        inbox = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_shard_worker,
+            args=(inbox, self._results, self.strategy, self.maxlen),
+            daemon=True,
+        )
+        process.start()
+        self._inboxes[shard] = inbox
+        self._processes[shard] = process
+
+    def _restart(self, shard):
+        """Relanza un worker muerto y le recarga las velas de sus símbolos"""
+        self.restarts += 1
+        self._spawn(shard)
+        if self.history is None:
+            return
+        for symbol in self._symbols[shard]:
+            candles = list(self.history(symbol))
+            if candles:
+                self._inboxes[shard].put((symbol, candles, False, 0, None))
+
+    def update_strategy(self, strategy=None):
+        """Envía la estrategia (por defecto self.strategy) a todos los workers"""
+        with self._lock:
+            if strategy is not None:
+                self.strategy = strategy
+            for inbox in self._inboxes:
+                inbox.put((STRATEGY, self.strategy))
+
+    def submit(self, symbol, candles, evaluate=True, ts=None):
+        """Envía velas nuevas de un símbolo a su shard y pide evaluarlo"""
+        shard = shard_for(symbol, self.workers)
+        with self._count_lock:
+            self.submitted += 1
+            seq = self.submitted
+        with self._lock:
+            if not self._processes:
+                return
+            self._symbols[shard].add(symbol)
+            if not self._processes[shard].is_alive():
+                self._restart(shard)
+            inbox = self._inboxes[shard]
+        inbox.put((symbol, candles, evaluate, seq, ts))
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            symbol, _, decision, error, ts = item
+            with self._count_lock:
+                self.completed += 1
+            self.on_decision(symbol, decision, error, ts)
+
+    def stop(self):
+        with self._lock:
+            if not self._processes:
+                return
+            for inbox in self._inboxes:
+                inbox.put(None)
+            for process in self._processes:
+                process.join(timeout=5)
+            self._results.put(None)
+            self._collector.join(timeout=5)
+            self._inboxes, self._processes, self._symbols = [], [], []
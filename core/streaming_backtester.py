@@ -0,0 +1,369 @@
+import heapq
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    CORRELATION_THRESHOLD,
+    EXPORT_FORMAT,
+    INITIAL_BALANCE,
+    MAX_OPEN_PER_SYMBOL,
+    MAX_OPEN_TOTAL,
+    STREAM_CHUNK_SIZE,
+    STREAM_RSS_TARGET_MB,
+)
+from core.clock import VirtualClock
+from core.contracts import ContractSimulator
+from core.correlation import CorrelationGuard
+from core.portfolio import SignalEvaluator
+from core.result_cache import fingerprint
+from core.results_io import ResultWriter
+from core.risk import RiskManager
+from core.strategy import Strategy
+from core.ticks import OHLC_COLUMNS
+
+TRADE_FIELDS = [
+    "symbol",
+    "direction",
+    "stake",
+    "entry_epoch",
+    "exit_epoch",
+    "entry_price",
+    "exit_price",
+    "duration",
+    "score",
+    "pnl",
+    "net_pnl",
+    "balance",
+]
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso en MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def iter_candles_csv(path, chunksize=STREAM_CHUNK_SIZE):
+    """Lee velas 1m de un CSV por bloques y las entrega fila a fila"""
+    for chunk in pd.read_csv(path, usecols=OHLC_COLUMNS, chunksize=chunksize):
+        cols = [chunk[c].to_numpy() for c in OHLC_COLUMNS]
+        for epoch, o, h, l, c in zip(*cols):
+            yield int(epoch), float(o), float(h), float(l), float(c)
+
+
+def last_epoch_csv(path, block_size=4096):
+    """Epoch de la última vela de un CSV leyendo solo el final del archivo"""
+    columns = pd.read_csv(path, nrows=0).columns.tolist()
+    col = columns.index("epoch")
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        block = min(size, block_size)
+        while True:
+            f.seek(size - block)
+            lines = [x for x in f.read(block).splitlines() if x.strip()]
+            if len(lines) > 1 or block == size:
+                break
+            block = min(size, block * 2)
+    if len(lines) < 2 and block == size:
+        return None  # solo cabecera
+    return int(float(lines[-1].split(b",")[col]))
+
+
+class StreamingMetrics:
+    """Métricas de Backtester.calculate_metrics acumuladas en O(1) memoria"""
+
+    def __init__(self, initial_balance):
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.peak = initial_balance
+        self.max_drawdown = 0.0
+        self.total_trades = 0
+        self.wins = 0
+        self.sum_win = 0.0
+        self.sum_loss = 0.0
+        # Welford para media/varianza de retornos por trade
+        self.ret_n = 0
+        self.ret_mean = 0.0
+        self.ret_m2 = 0.0
+
+    def add(self, net_pnl):
+        prev = self.balance
+        self.balance += net_pnl
+        self.total_trades += 1
+        if net_pnl > 0:
+            self.wins += 1
+            self.sum_win += net_pnl
+        else:
+            self.sum_loss += net_pnl
+
+        if self.total_trades > 1 and prev != 0:
+            r = (self.balance - prev) / prev
+            self.ret_n += 1
+            delta = r - self.ret_mean
+            self.ret_mean += delta / self.ret_n
+            self.ret_m2 += delta * (r - self.ret_mean)
+
+        self.peak = max(self.peak, self.balance)
+        self.max_drawdown = max(
+            self.max_drawdown, (self.peak - self.balance) / self.peak
+        )
+
+    def as_dict(self):
+        if not self.total_trades:
+            return {}
+        losses = self.total_trades - self.wins
+        avg_win = self.sum_win / self.wins if self.wins else 0
+        avg_loss = self.sum_loss / losses if losses else 0
+        profit_factor = abs(avg_win / avg_loss) if avg_loss != 0 else float("inf")
+        std = np.sqrt(self.ret_m2 / self.ret_n) if self.ret_n > 1 else 0
+        sharpe = self.ret_mean / std * np.sqrt(252) if std > 0 else 0
+        return {
+            "initial_balance": self.initial_balance,
+            "final_balance": self.balance,
+            "total_pnl": self.balance - self.initial_balance,
+            "total_return_pct": (self.balance - self.initial_balance)
+            / self.initial_balance
+            * 100,
+            "win_rate_pct": self.wins / self.total_trades * 100,
+            "avg_win": avg_win,
+            "avg_loss": avg_loss,
+            "profit_factor": profit_factor,
+            "sharpe_ratio": float(sharpe),
+            "max_drawdown_pct": self.max_drawdown * 100,
+            "total_trades": self.total_trades,
+            "winning_trades": self.wins,
+            "losing_trades": losses,
+        }
+
+
+class StreamingBacktester:
+    """
+    Backtest out-of-core sobre años de velas 1m.
+
+    Lee cada símbolo por bloques desde disco, fusiona los flujos por epoch
+    (k-way merge) y mantiene entre bloques el estado de indicadores
+    (OHLCBuffers acotados) y de posiciones (contratos pendientes). Trades y
+    equity se escriben a disco de forma incremental, por lo que la memoria no
+    crece con la longitud del histórico. Objetivo de pico RSS:
+    STREAM_RSS_TARGET_MB (por defecto 512 MB).
+    """
+
+    def __init__(
+        self,
+        initial_balance=INITIAL_BALANCE,
+        max_open_per_symbol=MAX_OPEN_PER_SYMBOL,
+        max_open_total=MAX_OPEN_TOTAL,
+        correlation_threshold=CORRELATION_THRESHOLD,
+        threshold=None,
+        simulator=None,
+        chunksize=STREAM_CHUNK_SIZE,
+        maxlen=1000,
+        fmt=EXPORT_FORMAT,
+        row_group_size=50_000,
+    ):
+        self.initial_balance = initial_balance
+        self.max_open_per_symbol = max_open_per_symbol
+        self.max_open_total = max_open_total
+        self.correlation_threshold = correlation_threshold
+        self.threshold = threshold
+        self.simulator = simulator or ContractSimulator()
+        self.chunksize = chunksize
+        self.maxlen = maxlen
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+
+    def cache_params(self):
+        """Parámetros que afectan al resultado (para la huella de caché)"""
+        return {
+            "backtester": "streaming",
+            "initial_balance": self.initial_balance,
+            "max_open_per_symbol": self.max_open_per_symbol,
+            "max_open_total": self.max_open_total,
+            "correlation_threshold": self.correlation_threshold,
+            "threshold": self.threshold,
+            "payout_table": self.simulator.payout_table,
+            "default_payout": self.simulator.default_payout,
+            "maxlen": self.maxlen,
+            "fmt": self.fmt,
+        }
+
+    def run(self, paths_by_symbol, output_dir="backtest_results", cache=None):
+        """
+        paths_by_symbol: dict símbolo -> CSV con columnas epoch,open,high,low,close.
+        Escribe trades, equity_curve (ver core.results_io) y metrics.json en
+        output_dir. Con cache (ResultCache) un acierto copia el resultado
+        guardado a output_dir sin recalcular.
+        """
+        if cache is None:
+            return self._run(paths_by_symbol, output_dir)
+
+        key = fingerprint(
+            paths_by_symbol, Strategy(), RiskManager(), self.cache_params()
+        )
+        if cache.restore(key, output_dir):
+            with open(os.path.join(output_dir, "metrics.json")) as f:
+                return json.load(f)
+
+        # Se calcula en un directorio nuevo para no cachear restos de otros
+        # runs que hubiera en output_dir
+        tmp = tempfile.mkdtemp(prefix="streaming_")
+        try:
+            result = self._run(paths_by_symbol, tmp)
+            cache.put(key, tmp)
+            os.makedirs(output_dir, exist_ok=True)
+            for name in os.listdir(tmp):
+                shutil.move(os.path.join(tmp, name), os.path.join(output_dir, name))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return result
+
+    def _run(self, paths_by_symbol, output_dir):
+        symbols = list(paths_by_symbol.keys())
+        index = {s: i for i, s in enumerate(symbols)}
+        # Un contrato cuya expiración cae tras la última vela de su símbolo
+        # no se abre (como en PortfolioBacktester)
+        last_epoch = [last_epoch_csv(paths_by_symbol[s]) for s in symbols]
+        evaluator = SignalEvaluator(maxlen=self.maxlen)
+        threshold = (
+            self.threshold
+            if self.threshold is not None
+            else evaluator.strategy.threshold
+        )
+        clock = VirtualClock()
+        risk = RiskManager(clock=clock)
+        guard = CorrelationGuard(
+            correlation_threshold=self.correlation_threshold, clock=clock
+        )
+        metrics = StreamingMetrics(self.initial_balance)
+        risk.set_day_start(metrics.balance)
+
+        streams = [
+            self._tagged(i, iter_candles_csv(paths_by_symbol[s], self.chunksize))
+            for i, s in enumerate(symbols)
+        ]
+
+        pending = []  # heap global (expiry, seq, trade)
+        open_per_symbol = [0] * len(symbols)
+        last_close = [None] * len(symbols)  # último cierre <= epoch actual
+        seq = 0
+        current_day = None
+
+        with ResultWriter(output_dir, self.fmt, self.row_group_size) as writer:
+
+            def settle_until(epoch):
+                # Vence todo lo que expira <= epoch al último cierre conocido
+                # de su símbolo, en orden global de expiración
+                while pending and pending[0][0] <= epoch:
+                    expiry, _, trade = heapq.heappop(pending)
+                    sym = index[trade["symbol"]]
+                    open_per_symbol[sym] -= 1
+                    self._settle(trade, last_close[sym], risk, metrics)
+                    writer.trades.write({k: trade.get(k) for k in TRADE_FIELDS})
+                    writer.equity.write({"epoch": expiry, "equity": metrics.balance})
+
+            for epoch, batch in groupby(heapq.merge(*streams), key=itemgetter(0)):
+                batch = list(batch)
+                # Los vencidos antes de este epoch usan los cierres previos;
+                # los que vencen justo en él, el cierre de esta vela
+                settle_until(epoch - 1)
+                for _, idx, _, _, _, c in batch:
+                    last_close[idx] = c
+                settle_until(epoch)
+
+                clock.set(epoch)
+                day = epoch // 86400
+                if day != current_day:
+                    current_day = day
+                    risk.set_day_start(metrics.balance)
+
+                for _, idx, o, h, l, c in batch:
+                    symbol = symbols[idx]
+                    guard.update_price(symbol, c, epoch)
+                    candle = {
+                        "open": o,
+                        "high": h,
+                        "low": l,
+                        "close": c,
+                        "epoch": epoch,
+                    }
+                    res = evaluator.push(symbol, candle)
+                    if res is None:
+                        continue
+                    score, direction, duration = res
+                    if direction not in ("CALL", "PUT") or score < threshold:
+                        continue
+                    if risk.check_daily_limits(metrics.balance) or risk.day_stopped:
+                        continue
+                    if len(pending) >= self.max_open_total:
+                        continue
+                    if open_per_symbol[idx] >= self.max_open_per_symbol:
+                        continue
+                    if not risk.can_trade_now(metrics.balance):
+                        continue
+                    open_symbols = {t[2]["symbol"] for t in pending}
+                    if not guard.can_open_trade(symbol, open_symbols):
+                        continue
+
+                    expiry = epoch + duration * self.simulator.duration_unit
+                    if expiry > last_epoch[idx]:
+                        continue  # sin datos de expiración (fin de la serie)
+
+                    trade = {
+                        "symbol": symbol,
+                        "direction": direction,
+                        "stake": risk.compute_stake(metrics.balance),
+                        "entry_epoch": epoch,
+                        "exit_epoch": expiry,
+                        "entry_price": c,
+                        "duration": duration,
+                        "score": score,
+                    }
+                    heapq.heappush(pending, (expiry, seq, trade))
+                    seq += 1
+                    open_per_symbol[idx] += 1
+
+            settle_until(float("inf"))
+
+        result = metrics.as_dict()
+        result["peak_rss_mb"] = peak_rss_mb()
+        result["rss_target_mb"] = STREAM_RSS_TARGET_MB
+        writer.write_metrics(result)
+
+        return result
+
+    @staticmethod
+    def _tagged(idx, candles):
+        # (epoch, idx, ...) para que heapq.merge ordene por epoch y símbolo
+        for epoch, o, h, l, c in candles:
+            yield epoch, idx, o, h, l, c
+
+    def _settle(self, trade, exit_price, risk, metrics):
+        net_pnl = float(
+            self.simulator.settle(
+                trade["direction"],
+                trade["entry_price"],
+                exit_price,
+                trade["stake"],
+                trade["duration"],
+            )
+        )
+        metrics.add(net_pnl)
+        risk.on_trade_result(net_pnl)
+        trade.update(
+            {
+                "exit_price": exit_price,
+                "pnl": net_pnl,
+                "net_pnl": net_pnl,
+                "balance": metrics.balance,
+            }
+        )
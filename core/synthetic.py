@@ -0,0 +1,119 @@
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from core.ticks import OHLC_COLUMNS
+
+# Volatility indices de Deriv: volatilidad anual constante por símbolo,
+# un tick cada 2 s (R_*) o cada 1 s (1HZ*V), mercado abierto 24/7
+PIP_SIZES = {"R_10": 3, "R_25": 3, "R_50": 4, "R_75": 4, "R_100": 2}
+SECONDS_PER_YEAR = 365 * 86400
+CHUNK_MINUTES = 50_000  # minutos generados por bloque (memoria acotada)
+DEFAULT_START = 1_704_067_200  # 2024-01-01 00:00 UTC
+DEFAULT_SPOT = 1000.0
+
+
+def index_params(symbol):
+    """(volatilidad anual, segundos por tick, decimales) de un símbolo"""
+    match = re.fullmatch(r"R_(\d+)|1HZ(\d+)V", symbol)
+    if match is None:
+        raise ValueError(f"Símbolo sin volatilidad nominal: {symbol}")
+    if match.group(1):
+        vol = int(match.group(1)) / 100
+        return vol, 2, PIP_SIZES.get(symbol, 3)
+    return int(match.group(2)) / 100, 1, 2
+
+
+def symbol_rng(symbol, seed):
+    """Generador por (semilla, símbolo): añadir símbolos no cambia los demás"""
+    return np.random.default_rng([seed, zlib.crc32(symbol.encode())])
+
+
+def _log_paths(rng, log_spot, n_ticks, vol, tick_seconds):
+    """Log-precios de un paseo geométrico sin deriva (martingala)"""
+    dt = tick_seconds / SECONDS_PER_YEAR
+    steps = rng.normal(-0.5 * vol * vol * dt, vol * np.sqrt(dt), n_ticks)
+    return log_spot + np.cumsum(steps)
+
+
+def simulate_prices(rng, spot, n, vol, step_seconds, pip):
+    """n precios siguientes a spot, separados step_seconds, redondeados a pip"""
+    return np.round(np.exp(_log_paths(rng, np.log(spot), n, vol, step_seconds)), pip)
+
+
+def generate_ticks(symbol, seconds, start=DEFAULT_START, seed=0, spot=DEFAULT_SPOT):
+    """
+    Ticks de 'seconds' segundos del índice: retorna (epochs, precios)
+    redondeados a su pip. Reproducible con la misma semilla.
+    """
+    vol, tick_seconds, pip = index_params(symbol)
+    n = int(seconds // tick_seconds)
+    rng = symbol_rng(symbol, seed)
+    prices = np.exp(_log_paths(rng, np.log(spot), n, vol, tick_seconds))
+    epochs = start + tick_seconds * np.arange(n, dtype=np.int64)
+    return epochs, np.round(prices, pip)
+
+
+def iter_candles(symbol, minutes, start=DEFAULT_START, seed=0, spot=DEFAULT_SPOT):
+    """
+    Velas 1m por bloques de CHUNK_MINUTES (DataFrames con OHLC_COLUMNS),
+    agregadas de los ticks del índice. Mismo resultado que generate_ticks +
+    ticks_to_candles, sin tener todos los ticks en memoria.
+    """
+    vol, tick_seconds, pip = index_params(symbol)
+    per_minute = 60 // tick_seconds
+    rng = symbol_rng(symbol, seed)
+    log_spot = np.log(spot)
+    start_minute = start - start % 60
+    for first in range(0, minutes, CHUNK_MINUTES):
+        count = min(CHUNK_MINUTES, minutes - first)
+        logs = _log_paths(rng, log_spot, count * per_minute, vol, tick_seconds)
+        log_spot = logs[-1]
+        ticks = np.round(np.exp(logs), pip).reshape(count, per_minute)
+        yield pd.DataFrame(
+            {
+                "epoch": start_minute + 60 * np.arange(first, first + count),
+                "open": ticks[:, 0],
+                "high": ticks.max(axis=1),
+                "low": ticks.min(axis=1),
+                "close": ticks[:, -1],
+            },
+            columns=OHLC_COLUMNS,
+        )
+
+
+def generate_candles(symbol, minutes, start=DEFAULT_START, seed=0, spot=DEFAULT_SPOT):
+    """Velas 1m en un DataFrame (entrada de PortfolioBacktester.run)"""
+    return pd.concat(
+        iter_candles(symbol, minutes, start, seed, spot), ignore_index=True
+    )
+
+
+def write_candles_csv(path, symbol, minutes, start=DEFAULT_START, seed=0):
+    """
+    Escribe las velas en un CSV epoch,open,high,low,close (entrada de
+    StreamingBacktester.run) bloque a bloque. Retorna el número de velas.
+    """
+    rows = 0
+    for i, chunk in enumerate(iter_candles(symbol, minutes, start, seed)):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(chunk)
+    return rows
+
+
+def write_dataset(output_dir, symbols, days, start=DEFAULT_START, seed=0):
+    """
+    Un CSV de velas 1m por símbolo en output_dir. Retorna el dict
+    símbolo -> ruta que espera StreamingBacktester.run.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    minutes = int(days * 1440)
+    paths = {}
+    for symbol in symbols:
+        path = os.path.join(output_dir, f"{symbol}_1m.csv")
+        write_candles_csv(path, symbol, minutes, start, seed)
+        paths[symbol] = path
+    return paths
@@ -0,0 +1,104 @@
+import numpy as np
+
+from config import TICK_BUFFER_SIZE
+
+OHLC_KEYS = ("epoch", "open", "high", "low", "close")
+OHLC_COLUMNS = list(OHLC_KEYS)  # columnas de DataFrames/CSV de velas 1m
+
+
+def ticks_to_candles(prices, times):
+    """
+    Agrupa ticks consecutivos por minuto en velas OHLC 1m, vectorizado.
+    Retorna un dict de columnas (arrays) con las claves de OHLC_KEYS.
+    """
+    prices = np.asarray(prices, dtype=float)
+    minutes = np.asarray(times, dtype=np.int64) // 60
+    if not len(prices):
+        return {k: np.empty(0) for k in OHLC_KEYS}
+
+    starts = np.flatnonzero(np.r_[True, minutes[1:] != minutes[:-1]])
+    ends = np.r_[starts[1:], len(prices)] - 1
+    return {
+        "epoch": minutes[starts] * 60,
+        "open": prices[starts],
+        "high": np.maximum.reduceat(prices, starts),
+        "low": np.minimum.reduceat(prices, starts),
+        "close": prices[ends],
+    }
+
+
+class TickAccumulator:
+    """
+    Ticks de un símbolo: ring buffer numérico de tamaño fijo más el OHLC del
+    minuto en curso, actualizado en O(1) por tick. Al cambiar de minuto
+    add() devuelve la vela cerrada.
+    """
+
+    def __init__(self, capacity=TICK_BUFFER_SIZE):
+        self.capacity = capacity
+        self.prices = np.zeros(capacity)
+        self.epochs = np.zeros(capacity, dtype=np.int64)
+        self.count = 0  # ticks recibidos en total
+        self.minute = None
+        self.open = self.high = self.low = self.close = 0.0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def add(self, price, epoch):
+        """Añade un tick; retorna la vela del minuto anterior si se cerró"""
+        pos = self.count % self.capacity
+        self.prices[pos] = price
+        self.epochs[pos] = epoch
+        self.count += 1
+
+        minute = epoch // 60
+        if self.minute is None or minute > self.minute:
+            closed = self.candle()
+            self.minute = minute
+            self.open = self.high = self.low = self.close = price
+            return closed
+        if minute == self.minute:
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+        # ticks atrasados de un minuto ya cerrado no alteran la vela
+        return None
+
+    def resume(self, ohlc):
+        """
+        Continúa la vela en curso desde una vela 1m (p.ej. la última del
+        historial tras reconectar); se ignora si es de un minuto anterior.
+        """
+        minute = int(ohlc["epoch"]) // 60
+        if self.minute is not None and minute < self.minute:
+            return
+        self.minute = minute
+        self.open, self.high = float(ohlc["open"]), float(ohlc["high"])
+        self.low, self.close = float(ohlc["low"]), float(ohlc["close"])
+
+    def candle(self):
+        """Vela (posiblemente en curso) del minuto actual, o None"""
+        if self.minute is None:
+            return None
+        return {
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "epoch": self.minute * 60,
+        }
+
+    @property
+    def last_price(self):
+        if not self.count:
+            return None
+        return float(self.prices[(self.count - 1) % self.capacity])
+
+    def recent(self):
+        """(precios, epochs) retenidos, en orden cronológico"""
+        n = len(self)
+        idx = (np.arange(self.count - n, self.count)) % self.capacity
+        return self.prices[idx], self.epochs[idx]
@@ -4,14 +4,75 @@ import json
 import threading
 import time
 import numpy as np
-from collections import defaultdict
-from queue import Queue
+from concurrent.futures import InvalidStateError
+from collections import defaultdict, deque
+from queue import Full, Queue
 from rich.console import Console
+from core.clock import wall_clock
+from core.contracts import ContractSimulator
+from core.recorder import FrameRecorder
+from core.rpc import ProposalCache, RequestMultiplexer
+from core.scheduler import ExpiryScheduler
+from core.ticks import OHLC_KEYS, TickAccumulator, ticks_to_candles
+from core.sharding import MIN_BARS, ShardedEvaluator, has_enough_data
 from utils.logger import exportar_log, log_debug, log_websocket
-from config import WS_PING_INTERVAL, WS_PING_TIMEOUT, WS_RECONNECT_DELAY
+from config import (
+    CONTRACT_SETTLE_GRACE,
+    EVAL_MAX_AGE,
+    EVAL_WORKERS,
+    PROPOSAL_DURATIONS,
+    REAL_ORDERS,
+    RECORD_FRAMES_PATH,
+    WS_HISTORY_COUNT,
+    WS_LOG_INTERVAL,
+    WS_PING_INTERVAL,
+    WS_PING_TIMEOUT,
+    WS_QUEUE_MAXSIZE,
+    WS_RECONNECT_DELAY,
+    WS_URL,
+)
+
+# Mensajes procesados como máximo antes de evaluar los símbolos pendientes
+COALESCE_MAX_BATCH = 100
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 console = Console()
 
+# Decodificador JSON: orjson si está instalado
+loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+# Descartar por msg_type antes de decodificar solo compensa con orjson: con
+# json de la stdlib el escaneo del frame cuesta más de lo que ahorra
+PREFILTER = ORJSON_AVAILABLE
+
+# Deriv pone msg_type al final del frame: se busca desde el final
+_MSG_TYPE_KEY = '"msg_type"'
+
+DEBUG_COLORS = {
+    "INFO": "cyan",
+    "SUCCESS": "green",
+    "WARNING": "yellow",
+    "ERROR": "red",
+}
+
+
+def peek_msg_type(message):
+    """msg_type de un frame sin decodificarlo entero (None si no aparece)"""
+    if isinstance(message, (bytes, bytearray)):
+        message = message.decode()
+    pos = message.rfind(_MSG_TYPE_KEY)
+    if pos < 0:
+        return None
+    start = message.find('"', pos + len(_MSG_TYPE_KEY)) + 1
+    end = message.find('"', start)
+    return message[start:end] if start and end > 0 else None
+
+
 # Variables globales
 probabilities = {"buy": 0, "sell": 0}
 ultima_accion = None
@@ -25,7 +86,17 @@ connection_status = {
 
 class DerivWS:
     def __init__(
-        self, app_id, token, symbols, engine, buffers, features, strategy, risk
+        self,
+        app_id,
+        token,
+        symbols,
+        engine,
+        buffers,
+        features,
+        strategy,
+        risk,
+        clock=None,
+        correlation=None,
     ):
         self.app_id = app_id
         self.token = token
@@ -35,13 +106,90 @@ class DerivWS:
         self.features = features
         self.strategy = strategy
         self.risk = risk
+        self.clock = clock or wall_clock
+        # CorrelationGuard opcional: recibe los cierres 1m y filtra aperturas
+        self.correlation = correlation
         self.ws = None
         self.connected = False
         self._last_candle_epoch = defaultdict(int)
         self.debug_mode = True
-        self.tick_buffers = defaultdict(list)  # Para acumular ticks por símbolo
+        # Ticks por símbolo: ring buffer + OHLC del minuto en curso
+        self.tick_buffers = defaultdict(TickAccumulator)
         self.last_candle_time = defaultdict(float)  # Última vela creada por símbolo
-        self.message_queue = Queue()
+        # Cola acotada de (instante de recepción, mensaje o tarea): si se
+        # llena, el hilo del WebSocket espera (backpressure sobre el socket)
+        self.message_queue = Queue(maxsize=WS_QUEUE_MAXSIZE)
+        self._processor_thread = None
+        self._monitor_thread = None
+        self._ws_thread = None
+        self._eval_pending = {}  # símbolo -> recepción de su última vela
+        self._current_recv_ts = None
+        self._since_flush = 0
+        self.eval_max_age = EVAL_MAX_AGE
+        self.queue_full_events = 0
+        self.max_queue_depth = 0
+        self.coalesced_evaluations = 0
+        self.stale_evaluations = 0
+        self.message_ages = deque(maxlen=1000)  # segundos en cola
+        self.contracts = ContractSimulator()
+
+        # Un único hilo para vencimientos de contratos y reconexiones; los
+        # cierres se ejecutan en el hilo de procesamiento (dueño del estado)
+        self.scheduler = ExpiryScheduler(
+            time_fn=self.clock.monotonic, dispatch=self._call_on_processor
+        )
+        self._reconnect_call = None
+        self.reconnect_delay = WS_RECONNECT_DELAY
+
+        # Peticiones con req_id y proposals pre-calentados para órdenes reales
+        self.real_orders = REAL_ORDERS
+        self.rpc = RequestMultiplexer(self.send)
+        self.proposals = ProposalCache(self.rpc, clock=self.clock.monotonic)
+        # Por trade real: vencimiento + gracia y suscripción a su contrato
+        self._contract_timeouts = {}
+        self._contract_polls = {}
+
+        # Handlers por msg_type; el resto se descarta antes de decodificar
+        # salvo respuestas con req_id o errores
+        self.handlers = {
+            "authorize": self._handle_authorize,
+            "balance": self._handle_balance,
+            "candles": self._handle_historical_candles,
+            "ohlc": self._handle_live_candle,
+            "error": self._handle_error,
+            "tick": self._handle_tick,
+            "history": self._handle_tick_history,
+        }
+        self.dropped_messages = 0
+
+        # Grabación opcional de los frames recibidos (ver core.recorder)
+        self.recorder = None
+        if RECORD_FRAMES_PATH:
+            self.recorder = FrameRecorder(RECORD_FRAMES_PATH)
+
+        # Con EVAL_WORKERS > 0 las features y el score se calculan en procesos
+        # worker por símbolo; las decisiones se aplican en este proceso
+        self.sharder = None
+        self._shard_pending = defaultdict(list)
+        if EVAL_WORKERS > 0:
+            self.sharder = ShardedEvaluator(
+                strategy,
+                self._on_shard_decision,
+                workers=EVAL_WORKERS,
+                maxlen=buffers.maxlen,
+                history=lambda symbol: self.buffers.m1[symbol],
+            )
+        self._next_progress_log = 0.0
+
+        # Resincronización tras (re)conectar: solo se pide el historial desde
+        # la última vela guardada; se mide el tiempo hasta tener todos los
+        # símbolos al día y los bytes recibidos en ese intervalo
+        self.ws_url = WS_URL
+        self.bytes_received = 0
+        self._connect_started = None
+        self._session_bytes = 0
+        self._awaiting_history = set()
+        self.last_sync = None
 
         # Contadores para debug
         self.message_count = 0
@@ -52,22 +200,44 @@ class DerivWS:
         """Sistema de debug simplificado"""
         if self.debug_mode:
             timestamp = time.strftime("%H:%M:%S")
-            colors = {
-                "INFO": "cyan",
-                "SUCCESS": "green",
-                "WARNING": "yellow",
-                "ERROR": "red",
-            }
-            color = colors.get(level, "white")
+            color = DEBUG_COLORS.get(level, "white")
             console.print(f"[{color}][{timestamp}] {message}[/{color}]")
             log_debug(f"{level}: {message}")
 
+    @property
+    def url(self):
+        return f"{self.ws_url}?app_id={self.app_id}"
+
     def connect(self):
         self.debug_print("🔌 Conectando al WebSocket de Deriv...", "INFO")
-        url = f"wss://ws.derivws.com/websockets/v3?app_id={self.app_id}"
+        self.scheduler.start()
+        if self.sharder is not None:
+            self.sharder.start()
+        self._open_socket()
+
+        # Procesador de mensajes y monitor: un solo hilo de cada uno que
+        # sobrevive a las reconexiones
+        if self._processor_thread is None:
+            self._processor_thread = threading.Thread(
+                target=self._message_processor, daemon=True
+            )
+            self._processor_thread.start()
+            self.debug_print("⚙️  Hilo de procesamiento iniciado", "SUCCESS")
+        if self._monitor_thread is None:
+            self._monitor_thread = threading.Thread(
+                target=self._activity_monitor, daemon=True
+            )
+            self._monitor_thread.start()
 
+    def _open_socket(self):
+        """Crea el WebSocketApp y su hilo; el de la conexión anterior termina"""
+        if self._ws_thread is not None and self._ws_thread.is_alive():
+            self._close_socket()
+            self._ws_thread.join(timeout=5)
+
+        self._connect_started = time.monotonic()
         self.ws = websocket.WebSocketApp(
-            url,
+            self.url,
             on_open=self.on_open,
             on_message=self.on_message,
             on_error=self.on_error,
@@ -75,23 +245,14 @@ class DerivWS:
         )
 
         # Iniciar WebSocket en hilo separado
-        ws_thread = threading.Thread(
+        self._ws_thread = threading.Thread(
             target=self.ws.run_forever,
             kwargs={"ping_interval": WS_PING_INTERVAL, "ping_timeout": WS_PING_TIMEOUT},
             daemon=True,
         )
-        ws_thread.start()
+        self._ws_thread.start()
         self.debug_print("🔌 Hilo WebSocket iniciado", "SUCCESS")
 
-        # Iniciar procesador de mensajes en un hilo separado
-        processor_thread = threading.Thread(target=self._message_processor, daemon=True)
-        processor_thread.start()
-        self.debug_print("⚙️  Hilo de procesamiento iniciado", "SUCCESS")
-
-        # Iniciar monitor de actividad
-        monitor_thread = threading.Thread(target=self._activity_monitor, daemon=True)
-        monitor_thread.start()
-
     def _activity_monitor(self):
         """Monitor que reporta el estado cada minuto y verifica la conexión"""
         last_message_count = self.message_count
@@ -105,6 +266,18 @@ class DerivWS:
             status_report += f"Mensajes={self.message_count}, "
             status_report += f"Evaluaciones={self.evaluations}, "
             status_report += f"Trades={self.trades_opened}"
+            metrics = self.queue_metrics()
+            status_report += (
+                f", Cola={metrics['depth']} (máx {metrics['max_depth']}), "
+                f"Edad p99={metrics['age_p99_ms']:.1f}ms, "
+                f"Coalescidas={metrics['coalesced']}, Obsoletas={metrics['stale']}"
+            )
+            if self.last_sync:
+                status_report += f", Resync={self.last_sync['seconds']:.2f}s"
+            if self.real_orders:
+                latency = self.proposals.latency_report()["decision_to_send_ms"]
+                if latency:
+                    status_report += f", Decisión→envío p50={latency['p50']:.2f}ms"
 
             self.debug_print(status_report, "INFO")
 
@@ -127,7 +300,7 @@ class DerivWS:
                         self.debug_print(
                             "❌ Conexión perdida, intentando reconectar...", "ERROR"
                         )
-                        self._reconnect()
+                        self._schedule_reconnect(0)
                         inactivity_counter = 0
             else:
                 inactivity_counter = 0
@@ -140,7 +313,7 @@ class DerivWS:
                     self.ws.sock.ping()
                 except Exception as e:
                     self.debug_print(f"❌ Error verificando conexión: {e}", "ERROR")
-                    self._reconnect()
+                    self._schedule_reconnect(0)
 
     def send(self, payload):
         """Envío con logging"""
@@ -162,6 +335,7 @@ class DerivWS:
         self.debug_print("🔌 Conexión WebSocket abierta", "SUCCESS")
         connection_status["connected"] = True
         self.connected = True
+        self._session_bytes = 0
 
         # Enviar autorización
         success = self.send({"authorize": self.token})
@@ -170,91 +344,202 @@ class DerivWS:
 
     def on_message(self, ws, message):
         """Añade mensaje a la cola para procesamiento asíncrono"""
-        self.message_queue.put(message)
+        if self.recorder is not None:
+            self.recorder.record(message, ts=self.clock.time())
+        self._enqueue(message)
+
+    def _enqueue(self, item):
+        entry = (time.monotonic(), item)
+        try:
+            self.message_queue.put_nowait(entry)
+        except Full:
+            self.queue_full_events += 1
+            self.message_queue.put(entry)
+
+    def _call_on_processor(self, fn, *args):
+        """Encola una llamada para ejecutarla en el hilo de procesamiento"""
+        if threading.current_thread() is self._processor_thread:
+            # Ya en el hilo dueño: encolar podría bloquearse con la cola llena
+            fn(*args)
+        else:
+            self._enqueue((fn, args))
 
     def _message_processor(self):
         """Procesa mensajes de la cola en un bucle continuo"""
+        self._processor_thread = threading.current_thread()
         while True:
-            message = self.message_queue.get()
-            if message is None:
+            entry = self.message_queue.get()
+            if entry is None:
                 break
 
-            self.message_count += 1
-            connection_status["messages_count"] = self.message_count
-            if self.message_count % 100 == 0:
-                log_websocket("MESSAGE_RECEIVED", f"Mensaje #{self.message_count}")
-
-            try:
-                data = json.loads(message)
-                msg_type = data.get("msg_type", "unknown")
-
-                if self.message_count % 10 == 0:
-                    self.debug_print(
-                        f"📨 Mensaje #{self.message_count}: {msg_type}", "INFO"
-                    )
+            recv_ts, message = entry
+            self.message_ages.append(time.monotonic() - recv_ts)
+            depth = self.message_queue.qsize()
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
 
-                if msg_type == "authorize":
-                    if data.get("authorize"):
-                        connection_status["authorized"] = True
-                        self.debug_print("✅ Autorización exitosa", "SUCCESS")
-                        self.send({"balance": 1, "account": "current"})
-                    else:
-                        error_msg = data.get("error", {}).get(
-                            "message", "Error desconocido"
-                        )
-                        self.debug_print(
-                            f"❌ Autorización fallida: {error_msg}", "ERROR"
-                        )
+            if isinstance(message, tuple):
+                # Tarea programada (p.ej. vencimiento de contrato)
+                fn, args = message
+                try:
+                    fn(*args)
+                except Exception as e:
+                    self.debug_print(f"❌ Error en tarea programada: {e}", "ERROR")
+                finally:
+                    self.message_queue.task_done()
+                continue
 
-                elif msg_type == "balance":
-                    balance_info = data.get("balance", {})
-                    if balance_info:
-                        balance = balance_info.get("balance", 0)
-                        self.engine.set_balance(float(balance))
-                        connection_status["balance_received"] = True
-                        self.debug_print(f"💰 Balance: {balance} USD", "SUCCESS")
-                        self._start_subscriptions()
+            try:
+                self._current_recv_ts = recv_ts
+                self._process_message(message)
+                self._since_flush += 1
+                # Evaluar cuando no quedan velas más nuevas en cola (o cada
+                # COALESCE_MAX_BATCH mensajes para no posponerlo indefinidamente)
+                if self._eval_pending and (
+                    self.message_queue.empty()
+                    or self._since_flush >= COALESCE_MAX_BATCH
+                ):
+                    self.flush_evaluations()
+            finally:
+                self._current_recv_ts = None
+                self.message_queue.task_done()
 
-                elif msg_type == "candles":
-                    self._handle_historical_candles(data)
+    def queue_metrics(self):
+        """Profundidad de la cola, edad de los mensajes y evaluaciones descartadas"""
+        ages = sorted(self.message_ages)
+        return {
+            "depth": self.message_queue.qsize(),
+            "max_depth": self.max_queue_depth,
+            "full_events": self.queue_full_events,
+            "age_p50_ms": ages[len(ages) // 2] * 1000 if ages else 0.0,
+            "age_p99_ms": ages[int(len(ages) * 0.99)] * 1000 if ages else 0.0,
+            "coalesced": self.coalesced_evaluations,
+            "stale": self.stale_evaluations,
+        }
 
-                elif msg_type == "ohlc":
-                    self._handle_live_candle(data)
+    def _process_message(self, message):
+        """Decodifica un mensaje del servidor y lo despacha a su handler"""
+        self.message_count += 1
+        self._session_bytes += len(message)
+        connection_status["messages_count"] = self.message_count
+        progress = self.message_count % 100 == 0
+        if progress:
+            log_websocket("MESSAGE_RECEIVED", f"Mensaje #{self.message_count}")
+
+        if PREFILTER:
+            if isinstance(message, (bytes, bytearray)):
+                message = message.decode()
+            msg_type = peek_msg_type(message)
+            if msg_type is not None and msg_type not in self.handlers:
+                if '"req_id"' not in message and '"error"' not in message:
+                    self.dropped_messages += 1
+                    return
 
-                elif msg_type == "error":
-                    error_info = data.get("error", {})
-                    error_msg = error_info.get("message", "Error desconocido")
-                    self.debug_print(f"❌ Error del servidor: {error_msg}", "ERROR")
+        try:
+            data = loads(message)
+            if "req_id" in data and self.rpc.resolve(data):
+                return
+            msg_type = data.get("msg_type", "unknown")
 
-                elif msg_type == "tick":
-                    self._handle_tick(data)
+            # Log de progreso acotado en el tiempo (no por número de mensajes)
+            now = time.monotonic() if progress else 0.0
+            if now >= self._next_progress_log:
+                self._next_progress_log = now + WS_LOG_INTERVAL
+                self.debug_print(
+                    f"📨 Mensaje #{self.message_count}: {msg_type}", "INFO"
+                )
 
-                elif msg_type == "history":
-                    self._handle_tick_history(data)
+            handler = self.handlers.get(msg_type)
+            if handler is not None:
+                handler(data)
 
-            except Exception as e:
-                self.debug_print(f"❌ Error procesando mensaje: {e}", "ERROR")
-            finally:
-                self.message_queue.task_done()
+        except Exception as e:
+            self.debug_print(f"❌ Error procesando mensaje: {e}", "ERROR")
+
+    def _handle_authorize(self, data):
+        if data.get("authorize"):
+            connection_status["authorized"] = True
+            self.debug_print("✅ Autorización exitosa", "SUCCESS")
+            self.send({"balance": 1, "account": "current"})
+        else:
+            error_msg = data.get("error", {}).get("message", "Error desconocido")
+            self.debug_print(f"❌ Autorización fallida: {error_msg}", "ERROR")
+
+    def _handle_balance(self, data):
+        balance_info = data.get("balance", {})
+        if balance_info:
+            balance = balance_info.get("balance", 0)
+            self.engine.set_balance(float(balance))
+            connection_status["balance_received"] = True
+            self.debug_print(f"💰 Balance: {balance} USD", "SUCCESS")
+            self._start_subscriptions()
+
+    def _handle_error(self, data):
+        error_info = data.get("error", {})
+        error_msg = error_info.get("message", "Error desconocido")
+        self.debug_print(f"❌ Error del servidor: {error_msg}", "ERROR")
 
     def _start_subscriptions(self):
-        """Inicia suscripciones"""
+        """Inicia suscripciones; tras reconectar pide solo el hueco"""
         self.debug_print("📡 Iniciando suscripciones...", "INFO")
 
+        self._awaiting_history = set(self.symbols)
         for symbol in self.symbols:
-            success = self.send(
-                {
-                    "ticks_history": symbol,
-                    "adjust_start_time": 1,
-                    "count": 5000,
-                    "end": "latest",
-                    "granularity": 60,
-                    "subscribe": 1,
-                }
-            )
+            success = self.send(self._history_request(symbol))
             if success:
                 self.debug_print(f"📡 Suscrito a {symbol}", "SUCCESS")
 
+        if self.real_orders:
+            self._warm_proposals()
+            # Tras reconectar, volver a seguir los contratos aún abiertos
+            for trade_id, contract_id in list(self.engine.open_contracts.items()):
+                if contract_id:
+                    self._track_contract(trade_id, contract_id)
+
+    def _history_request(self, symbol):
+        """
+        ticks_history con suscripción. Si ya hay velas del símbolo se piden
+        los ticks desde el inicio de la última (que se reconstruye completa)
+        en lugar de todo el historial.
+        """
+        request = {
+            "ticks_history": symbol,
+            "adjust_start_time": 1,
+            "count": WS_HISTORY_COUNT,
+            "end": "latest",
+            "granularity": 60,
+            "subscribe": 1,
+        }
+        m1 = self.buffers.m1.get(symbol)
+        if m1:
+            request["start"] = int(m1[-1]["epoch"])
+        return request
+
+    def _history_synced(self, symbol):
+        """Registra el fin de la resincronización al llegar el último símbolo"""
+        if symbol not in self._awaiting_history:
+            return
+        self._awaiting_history.discard(symbol)
+        if self._awaiting_history or self._connect_started is None:
+            return
+        self.last_sync = {
+            "seconds": time.monotonic() - self._connect_started,
+            "bytes": self._session_bytes,
+        }
+        self.debug_print(
+            f"✅ Historial al día en {self.last_sync['seconds']:.2f}s "
+            f"({self.last_sync['bytes'] / 1024:.1f} KiB)",
+            "SUCCESS",
+        )
+
+    def _warm_proposals(self):
+        """Suscribe proposals con el stake actual para cada símbolo"""
+        stake = self.risk.compute_stake(self.engine.balance)
+        for symbol in self.symbols:
+            for contract_type in ("CALL", "PUT"):
+                for duration in PROPOSAL_DURATIONS:
+                    self.proposals.warm(symbol, contract_type, duration, stake)
+
     def _handle_tick_history(self, data):
         """Maneja historial de ticks y los convierte en velas"""
         echo_req = data.get("echo_req", {})
@@ -263,21 +548,27 @@ class DerivWS:
         prices = history.get("prices", [])
         times = history.get("times", [])
 
-        if not symbol or not prices:
+        if not symbol:
+            return
+        if not prices:
+            self._history_synced(symbol)
             return
 
         self.debug_print(
             f"📊 Historial de {len(prices)} ticks para {symbol}", "SUCCESS"
         )
 
-        # Convertir ticks en velas de 1 minuto
-        candles = self._ticks_to_candles(prices, times)
-
-        # Procesar velas
-        for candle in candles:
-            self.buffers.push_ohlc_1m(symbol, candle)
+        # Convertir ticks en velas de 1 minuto (columnas NumPy); los ticks ya
+        # guardados se fusionan sin duplicar velas
+        candles = ticks_to_candles(prices, times)
+        self._extend_candles(symbol, candles)
+        # La vela en curso sigue desde el historial (incluye ticks del hueco)
+        self.tick_buffers[symbol].resume({k: candles[k][-1].item() for k in OHLC_KEYS})
+        self._history_synced(symbol)
 
-        log_websocket("CANDLE", f"Convertidas {len(candles)} velas para {symbol}")
+        log_websocket(
+            "CANDLE", f"Convertidas {len(candles['epoch'])} velas para {symbol}"
+        )
         self._evaluate_symbol(symbol)
 
     def _handle_tick(self, data):
@@ -290,97 +581,25 @@ class DerivWS:
         if not all([symbol, price, epoch]):
             return
 
-        # Acumular tick
-        self.tick_buffers[symbol].append({"price": float(price), "epoch": int(epoch)})
+        # Acumular tick (O(1)); al cambiar de minuto se cierra la vela anterior
+        closed = self.tick_buffers[symbol].add(float(price), int(epoch))
+        if closed is not None:
+            self._create_candle_from_ticks(symbol, closed)
+            return
 
         # Verificar si hay que crear una nueva vela (cada 5 segundos)
-        now = time.time()
+        now = self.clock.time()
         if now - self.last_candle_time.get(symbol, 0) > 5:
             self.last_candle_time[symbol] = now
-            current_minute = int(epoch) // 60
-            self._create_candle_from_ticks(symbol, current_minute)
-
-    def _create_candle_from_ticks(self, symbol, minute_timestamp):
-        """Crea una vela OHLC a partir de ticks acumulados"""
-        ticks = self.tick_buffers[symbol]
-
-        if not ticks:
-            return
+            self._create_candle_from_ticks(symbol, self.tick_buffers[symbol].candle())
 
-        # Filtrar ticks del minuto específico
-        minute_ticks = [t for t in ticks if int(t["epoch"]) // 60 == minute_timestamp]
-
-        if not minute_ticks:
-            return
-
-        prices = [t["price"] for t in minute_ticks]
-
-        ohlc = {
-            "open": prices[0],
-            "high": max(prices),
-            "low": min(prices),
-            "close": prices[-1],
-            "epoch": minute_timestamp * 60,
-        }
-
-        self.buffers.push_ohlc_1m(symbol, ohlc)
+    def _create_candle_from_ticks(self, symbol, ohlc):
+        """Publica una vela OHLC construida con los ticks acumulados"""
+        self._push_candle(symbol, ohlc)
         self.debug_print(f"📈 Vela creada {symbol}: {ohlc['close']:.5f}", "INFO")
         log_websocket("CANDLE", f"Vela creada {symbol}")
-
-        # Limpiar ticks antiguos (mantener solo últimos 200)
-        if len(self.tick_buffers[symbol]) > 200:
-            self.tick_buffers[symbol] = self.tick_buffers[symbol][-200:]
-
         self._evaluate_symbol(symbol)
 
-    def _ticks_to_candles(self, prices, times):
-        """Convierte arrays de precios y tiempos en velas OHLC"""
-        if not prices or not times:
-            return []
-
-        candles = []
-        current_minute = None
-        minute_prices = []
-
-        for price, timestamp in zip(prices, times):
-            minute = int(timestamp) // 60
-
-            if current_minute is None:
-                current_minute = minute
-
-            if minute == current_minute:
-                minute_prices.append(float(price))
-            else:
-                # Crear vela para el minuto anterior
-                if minute_prices:
-                    candles.append(
-                        {
-                            "open": minute_prices[0],
-                            "high": max(minute_prices),
-                            "low": min(minute_prices),
-                            "close": minute_prices[-1],
-                            "epoch": current_minute * 60,
-                        }
-                    )
-
-                # Empezar nuevo minuto
-                current_minute = minute
-                minute_prices = [float(price)]
-
-        # Agregar última vela
-        if minute_prices and current_minute is not None:
-            candles.append(
-                {
-                    "open": minute_prices[0],
-                    "high": max(minute_prices),
-                    "low": min(minute_prices),
-                    "close": minute_prices[-1],
-                    "epoch": current_minute * 60,
-                }
-            )
-
-        return candles
-
     def _handle_historical_candles(self, data):
         """Maneja velas históricas"""
         echo_req = data.get("echo_req", {})
@@ -392,15 +611,12 @@ class DerivWS:
                 f"📊 {len(candles)} velas históricas para {symbol}", "SUCCESS"
             )
 
-            for candle in candles:
-                ohlc = {
-                    "open": float(candle["open"]),
-                    "high": float(candle["high"]),
-                    "low": float(candle["low"]),
-                    "close": float(candle["close"]),
-                    "epoch": int(candle["epoch"]),
-                }
-                self.buffers.push_ohlc_1m(symbol, ohlc)
+            columns = {
+                k: np.array([c[k] for c in candles], dtype=float) for k in OHLC_KEYS
+            }
+            columns["epoch"] = columns["epoch"].astype(np.int64)
+            self._extend_candles(symbol, columns)
+            self._history_synced(symbol)
 
             log_websocket("CANDLE", f"Procesadas {len(candles)} velas para {symbol}")
             self._evaluate_symbol(symbol)
@@ -409,136 +625,370 @@ class DerivWS:
         """Maneja velas en vivo"""
         ohlc_data = data.get("ohlc", {})
         symbol = ohlc_data.get("symbol")
-        epoch = int(ohlc_data.get("epoch", 0))
+        # open_time identifica la vela; epoch es el instante de la actualización
+        epoch = int(ohlc_data.get("open_time", ohlc_data.get("epoch", 0)))
 
-        if symbol and epoch != self._last_candle_epoch[symbol]:
-            self._last_candle_epoch[symbol] = epoch
+        if not symbol:
+            return
 
-            ohlc = {
-                "open": float(ohlc_data["open"]),
-                "high": float(ohlc_data["high"]),
-                "low": float(ohlc_data["low"]),
-                "close": float(ohlc_data["close"]),
-                "epoch": epoch,
-            }
+        ohlc = {
+            "open": float(ohlc_data["open"]),
+            "high": float(ohlc_data["high"]),
+            "low": float(ohlc_data["low"]),
+            "close": float(ohlc_data["close"]),
+            "epoch": epoch,
+        }
+        if not self._push_candle(symbol, ohlc):
+            return
 
-            self.buffers.push_ohlc_1m(symbol, ohlc)
+        if epoch != self._last_candle_epoch[symbol]:
+            self._last_candle_epoch[symbol] = epoch
             self.debug_print(f"📈 Nueva vela {symbol}: {ohlc['close']:.5f}", "INFO")
             log_websocket("CANDLE", f"Nueva vela {symbol}")
 
-            self._evaluate_symbol(symbol)
+        self._evaluate_symbol(symbol)
+
+    def _push_candle(self, symbol, ohlc):
+        """
+        Añade o actualiza (misma epoch) una vela 1m; en modo shards la recibe
+        el worker del símbolo. Retorna False si era de un minuto ya superado.
+        """
+        if self.correlation is not None:
+            self.correlation.update_price(symbol, ohlc["close"], ohlc["epoch"])
+        if not self.buffers.upsert_ohlc_1m(symbol, ohlc):
+            return False
+        if self.sharder is not None:
+            self._shard_pending[symbol].append(ohlc)
+        return True
+
+    def _extend_candles(self, symbol, candles):
+        """
+        Añade un bloque de velas 1m dado por columnas (ver ticks_to_candles).
+        Sin shards va directo a los buffers con una sola reagregación; con
+        shards se envía fila a fila al worker del símbolo.
+        """
+        if self.sharder is None:
+            if self.correlation is not None:
+                rows = zip(candles["close"].tolist(), candles["epoch"].tolist())
+                for close, epoch in rows:
+                    self.correlation.update_price(symbol, close, epoch)
+            return self.buffers.extend_ohlc_1m(symbol, candles)
+
+        rows = zip(*(candles[k].tolist() for k in OHLC_KEYS))
+        return sum(self._push_candle(symbol, dict(zip(OHLC_KEYS, row))) for row in rows)
 
     def _evaluate_symbol(self, symbol):
+        """
+        Marca el símbolo para evaluar. Fuera del hilo de procesamiento se
+        evalúa en el acto; dentro, se difiere hasta vaciar la cola para
+        evaluar una sola vez con la última vela.
+        """
+        if threading.current_thread() is not self._processor_thread:
+            self._evaluate_now(symbol)
+            return
+        if symbol in self._eval_pending:
+            self.coalesced_evaluations += 1
+        self._eval_pending[symbol] = self._current_recv_ts
+
+    def flush_evaluations(self):
+        """Evalúa los símbolos pendientes; omite los de velas demasiado viejas"""
+        pending, self._eval_pending = self._eval_pending, {}
+        self._since_flush = 0
+        for symbol, recv_ts in pending.items():
+            if not self._is_stale(symbol, recv_ts):
+                self._evaluate_now(symbol, recv_ts)
+
+    def _is_stale(self, symbol, recv_ts):
+        """True (y se contabiliza) si la vela se recibió hace más de eval_max_age"""
+        if recv_ts is None:
+            return False
+        age = time.monotonic() - recv_ts
+        if age <= self.eval_max_age:
+            return False
+        self.stale_evaluations += 1
+        log_websocket("EVALUATION", f"Omitida {symbol}: vela de hace {age:.1f}s")
+        return True
+
+    def _evaluate_now(self, symbol, recv_ts=None):
         """Evaluación con debug"""
         self.evaluations += 1
         log_websocket("EVALUATION", f"Evaluando {symbol} (#{self.evaluations})")
 
-        # Verificar datos suficientes para todas las temporalidades
-        m1_ok = len(self.buffers.m1.get(symbol, [])) >= 35
-        m5_ok = len(self.buffers.m5.get(symbol, [])) >= 35
-        m15_ok = len(self.buffers.m15.get(symbol, [])) >= 35
+        if self.sharder is not None:
+            candles = self._shard_pending.pop(symbol, [])
+            self.sharder.submit(symbol, candles, ts=recv_ts)
+            return
 
-        if not all([m1_ok, m5_ok, m15_ok]):
+        if not self._has_enough_data(symbol):
+            return
+
+        try:
+            decision = self._compute_decision(symbol)
+            if decision is not None:
+                self._apply_decision(symbol, decision)
+        except Exception as e:
+            self.debug_print(f"❌ Error evaluando {symbol}: {e}", "ERROR")
+
+    def _has_enough_data(self, symbol):
+        """Verificar datos suficientes para todas las temporalidades"""
+        if not has_enough_data(self.buffers, symbol):
             if self.evaluations % 50 == 0:  # Loguear solo de vez en cuando
+                m1_ok = len(self.buffers.m1.get(symbol, [])) >= MIN_BARS
+                m5_ok = len(self.buffers.m5.get(symbol, [])) >= MIN_BARS
+                m15_ok = len(self.buffers.m15.get(symbol, [])) >= MIN_BARS
                 self.debug_print(
                     f"⚠️  {symbol}: Esperando datos suficientes (M1:{m1_ok}, M5:{m5_ok}, M15:{m15_ok})",
                     "WARNING",
                 )
-            return
+            return False
+        return True
+
+    def _compute_decision(self, symbol, features=None):
+        """
+        Parte de cálculo de la evaluación (features + score), sin tocar el
+        estado de trading. Retorna (score, direction, duration, signals,
+        feature_vector) o None.
+        """
+        feats = (features or self.features).compute_features(symbol)
+        if not all([feats["m1"], feats["m5"], feats["m15"]]):
+            self.debug_print(f"❌ {symbol}: Error calculando features", "ERROR")
+            return None
+
+        # Obtener score y duración dinámica
+        return self.strategy.score(feats)
+
+    def _on_shard_decision(self, symbol, decision, error, recv_ts):
+        """Decisión de un worker (hilo colector): aplicarla en el procesador"""
+        if error is not None:
+            self._call_on_processor(
+                self.debug_print, f"❌ Error evaluando {symbol}: {error}", "ERROR"
+            )
+        elif decision is not None:
+            self._call_on_processor(
+                self._apply_shard_decision, symbol, decision, recv_ts
+            )
 
+    def _apply_shard_decision(self, symbol, decision, recv_ts=None):
+        # Misma comprobación de antigüedad que antes de evaluar en proceso:
+        # la vela pudo envejecer en la cola del worker
+        if self._is_stale(symbol, recv_ts):
+            return
         try:
-            # Calcular features
-            feats = self.features.compute_features(symbol)
-            if not all([feats["m1"], feats["m5"], feats["m15"]]):
-                self.debug_print(f"❌ {symbol}: Error calculando features", "ERROR")
-                return
+            self._apply_decision(symbol, decision)
+        except Exception as e:
+            self.debug_print(f"❌ Error evaluando {symbol}: {e}", "ERROR")
+
+    def reload_strategy(self):
+        """Tras entrenar o cargar el modelo ML: envía la estrategia a los shards"""
+        if self.sharder is not None:
+            self.sharder.update_strategy(self.strategy)
+
+    def _apply_decision(self, symbol, decision):
+        """Aplica una decisión: señales, límites de riesgo y apertura de trade"""
+        score, direction, duration, signals, feature_vector = decision
+        prob = score * 100
+
+        # Actualizar variables globales
+        global ultima_accion, probabilities
+        probabilities["buy"] = prob if direction == "CALL" else 100 - prob
+        probabilities["sell"] = 100 - probabilities["buy"]
+        ultima_accion = f"{symbol} {direction} {prob:.1f}%"
+
+        # Log detallado cada cierto tiempo
+        if self.evaluations % 20 == 0 or prob > 75:
+            self.debug_print(f"🎯 {symbol}: Score={prob:.1f}%, Dir={direction}", "INFO")
+            self.debug_print(f"   Señales: {', '.join(signals[:3])}", "INFO")
+
+        # Verificar si se puede tradear
+        lim = self.risk.check_daily_limits(self.engine.balance)
+        if lim:
+            if lim == "tp":
+                self.debug_print("✅ Take Profit diario alcanzado", "SUCCESS")
+            else:
+                self.debug_print("🛑 Drawdown diario alcanzado", "WARNING")
+            return
+
+        can_open = self.engine.can_open(symbol) and self._uncorrelated(symbol)
+        can_trade = self.risk.can_trade_now(self.engine.balance)
 
-            # Obtener score y duración dinámica
-            (
-                score,
+        # Abrir trade si cumple condiciones
+        if score >= self.strategy.threshold and can_open and can_trade:
+            decided_at = time.perf_counter()
+            stake = self.risk.compute_stake(self.engine.balance)
+            if self.real_orders:
+                future, stake = self.proposals.buy(
+                    symbol, direction, duration, stake, decided_at=decided_at
+                )
+            trade_id = self.engine.open_trade(
+                symbol,
                 direction,
-                duration,
-                signals,
+                stake,
                 feature_vector,
-            ) = self.strategy.score(feats)
-            prob = score * 100
+                duration=duration,
+                entry_price=self._last_price(symbol),
+            )
 
-            # Actualizar variables globales
-            global ultima_accion, probabilities
-            probabilities["buy"] = prob if direction == "CALL" else 100 - prob
-            probabilities["sell"] = 100 - probabilities["buy"]
-            ultima_accion = f"{symbol} {direction} {prob:.1f}%"
+            self.trades_opened += 1
+
+            exportar_log(
+                [
+                    time.strftime("%Y-%m-%d %H:%M:%S"),
+                    symbol,
+                    direction,
+                    stake,
+                    prob,
+                    "OPEN",
+                ]
+            )
 
-            # Log detallado cada cierto tiempo
-            if self.evaluations % 20 == 0 or prob > 75:
-                self.debug_print(
-                    f"🎯 {symbol}: Score={prob:.1f}%, Dir={direction}", "INFO"
+            self.debug_print(
+                f"🚀 TRADE ABIERTO #{self.trades_opened}: {symbol} {direction}",
+                "SUCCESS",
+            )
+            self.debug_print(f"   Stake: {stake} USD, Score: {prob:.1f}%", "SUCCESS")
+
+            if self.real_orders:
+                future.add_done_callback(
+                    lambda f, t=trade_id: self._call_on_processor(self._on_buy, t, f)
                 )
-                self.debug_print(f"   Señales: {', '.join(signals[:3])}", "INFO")
-
-            # Verificar si se puede tradear
-            lim = self.risk.check_daily_limits(self.engine.balance)
-            if lim:
-                if lim == "tp":
-                    self.debug_print("✅ Take Profit diario alcanzado", "SUCCESS")
-                else:
-                    self.debug_print("🛑 Drawdown diario alcanzado", "WARNING")
-                return
+                # Si la liquidación no llega, el trade no queda abierto siempre
+                self._contract_timeouts[trade_id] = self.scheduler.schedule(
+                    duration * 60 + CONTRACT_SETTLE_GRACE,
+                    self._contract_timeout,
+                    trade_id,
+                    future,
+                )
+            else:
+                # Programar cierre al vencimiento del contrato
+                self.scheduler.schedule(duration * 60, self._simulate_close, trade_id)
+
+    def _uncorrelated(self, symbol):
+        """True si no hay trades abiertos en símbolos muy correlados"""
+        if self.correlation is None:
+            return True
+        open_symbols = {s for s, n in self.engine.open_per_symbol.items() if n > 0}
+        return self.correlation.can_open_trade(symbol, open_symbols)
+
+    def _last_price(self, symbol):
+        """Último precio conocido: tick más reciente o cierre de la última vela"""
+        ticks = self.tick_buffers.get(symbol)
+        if ticks is not None and ticks.count:
+            return ticks.last_price
+        m1 = self.buffers.m1.get(symbol)
+        if m1:
+            return float(m1[-1]["close"])
+        return None
+
+    def _on_buy(self, trade_id, future):
+        """Respuesta a un buy: seguir el contrato o descartar el trade"""
+        if future.exception() is not None:
+            self._release_contract(trade_id)
+            self.engine.cancel_trade(trade_id)
+            self.debug_print(
+                f"❌ Compra rechazada {trade_id}: {future.exception()}", "ERROR"
+            )
+            return
 
-            can_open = self.engine.can_open(symbol)
-            can_trade = self.risk.can_trade_now(self.engine.balance)
+        buy = future.result().get("buy", {})
+        contract_id = buy.get("contract_id")
+        self.engine.open_contracts[trade_id] = contract_id
+        self.debug_print(
+            f"🧾 Contrato {contract_id} comprado a {buy.get('buy_price')}", "SUCCESS"
+        )
 
-            # Abrir trade si cumple condiciones
-            if score >= self.strategy.threshold and can_open and can_trade:
-                stake = self.risk.compute_stake(self.engine.balance)
-                trade_id = self.engine.open_trade(
-                    symbol, direction, stake, feature_vector, duration=duration
-                )
+        self._track_contract(trade_id, contract_id)
 
-                self.trades_opened += 1
-
-                exportar_log(
-                    [
-                        time.strftime("%Y-%m-%d %H:%M:%S"),
-                        symbol,
-                        direction,
-                        stake,
-                        prob,
-                        "OPEN",
-                    ]
-                )
+    def _track_contract(self, trade_id, contract_id):
+        """Sigue un contrato comprado hasta su liquidación"""
 
-                self.debug_print(
-                    f"🚀 TRADE ABIERTO #{self.trades_opened}: {symbol} {direction}",
-                    "SUCCESS",
-                )
-                self.debug_print(
-                    f"   Stake: {stake} USD, Score: {prob:.1f}%", "SUCCESS"
-                )
+        def on_update(data):
+            self._on_contract_update(trade_id, data)
 
-                # Programar cierre
-                threading.Timer(120, self._simulate_close, args=(trade_id,)).start()
+        def on_first(future):
+            if future.exception() is None:
+                on_update(future.result())
 
-        except Exception as e:
-            self.debug_print(f"❌ Error evaluando {symbol}: {e}", "ERROR")
+        poc = self.rpc.request(
+            {"proposal_open_contract": 1, "contract_id": contract_id, "subscribe": 1},
+            on_update=on_update,
+        )
+        self._contract_polls[trade_id] = poc
+        poc.add_done_callback(on_first)
+
+    def _on_contract_update(self, trade_id, data):
+        contract = data.get("proposal_open_contract", {})
+        if not contract.get("is_sold") or trade_id not in self.engine.trades:
+            return
+        subscription = data.get("subscription", {}).get("id")
+        if subscription:
+            self.send({"forget": subscription})
+        self._close_trade(trade_id, float(contract.get("profit", 0)))
+
+    def _release_contract(self, trade_id):
+        """Cancela el vencimiento de un trade real y deja de seguir su contrato"""
+        self.scheduler.cancel(self._contract_timeouts.pop(trade_id, None))
+        poc = self._contract_polls.pop(trade_id, None)
+        if poc is not None:
+            self.rpc.forget(poc.req_id)
+        return poc
+
+    def _contract_timeout(self, trade_id, future):
+        """
+        Vencimiento + CONTRACT_SETTLE_GRACE sin liquidación: falla lo que
+        siga pendiente (buy o proposal_open_contract) y libera el trade
+        """
+        self._contract_timeouts.pop(trade_id, None)
+        if trade_id not in self.engine.trades:
+            return
+        error = TimeoutError(f"Sin liquidación del trade {trade_id}")
+        for pending in (future, self._release_contract(trade_id)):
+            if pending is not None and not pending.done():
+                try:
+                    pending.set_exception(error)
+                except InvalidStateError:
+                    pass  # resuelto entre tanto desde el hilo del socket
+        self.engine.cancel_trade(trade_id)
+        self.debug_print(
+            f"⏱️  Trade {trade_id} liberado: no llegó la liquidación", "WARNING"
+        )
 
     def _simulate_close(self, trade_id):
-        """Simula cierre de trade"""
+        """Simula cierre de trade liquidando el Rise/Fall con el precio actual"""
         if trade_id not in self.engine.trades:
             return
 
-        win = np.random.rand() < 0.55
         trade = self.engine.trades[trade_id]
-        stake = trade["amount"]
-        profit = round(stake * 0.9, 2) if win else -stake
+        stake = trade.amount
+        exit_price = self._last_price(trade.symbol)
+        if trade.entry_price is None or exit_price is None:
+            # Sin precios reales: resultado aleatorio como fallback
+            win = np.random.rand() < 0.55
+            profit = round(stake * 0.9, 2) if win else -stake
+        else:
+            profit = self.contracts.settle(
+                trade.contract_type,
+                trade.entry_price,
+                exit_price,
+                stake,
+                trade.duration,
+            )
+
+        self._close_trade(trade_id, profit)
 
+    def _close_trade(self, trade_id, profit):
+        self._release_contract(trade_id)
+        trade = self.engine.trades[trade_id]
+        stake = trade.amount
         self.engine.finalize_trade(trade_id, profit)
+        if self.real_orders:
+            # El balance cambió: suscribir los proposals con el stake nuevo
+            self._warm_proposals()
 
         exportar_log(
             [
                 time.strftime("%Y-%m-%d %H:%M:%S"),
-                trade["symbol"],
-                trade["contract_type"],
+                trade.symbol,
+                trade.contract_type,
                 stake,
                 profit,
                 "CLOSE",
@@ -550,43 +1000,86 @@ class DerivWS:
             f"📦 TRADE CERRADO: {trade_id} {result} {profit:+.2f}", "SUCCESS"
         )
 
+    def _schedule_reconnect(self, delay=None):
+        """Programa una única reconexión pendiente"""
+        if delay is None:
+            delay = self.reconnect_delay
+        if self._reconnect_call is not None and not self._reconnect_call.cancelled:
+            return
+        self._reconnect_call = self.scheduler.schedule(delay, self._reconnect)
+
     def _reconnect(self):
         """Intenta reconectar el WebSocket"""
+        self._reconnect_call = None
         self.debug_print("🔄 Iniciando proceso de reconexión...", "WARNING")
         try:
-            # Cerrar conexión existente si está abierta
-            if self.ws and self.ws.sock:
-                self.ws.close()
+            self._close_socket()
+
+            # Esperar un momento antes de reconectar (sin bloquear el planificador)
+            self.scheduler.schedule(2, self._connect_after_close)
+        except Exception as e:
+            self.debug_print(f"❌ Error en reconexión: {e}", "ERROR")
+            # Reintentar después de un delay
+            self._schedule_reconnect()
+
+    def _close_socket(self):
+        """
+        Cierra la conexión actual si está abierta. Se desvincula antes para
+        que sus callbacks tardíos (on_close/on_error) no programen otra
+        reconexión ni marquen como caída la conexión nueva, así que el
+        estado de la conexión se limpia aquí.
+        """
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            self._connection_lost()
+        if ws and ws.sock:
+            sock = ws.sock
+            ws.keep_running = False
+            try:
+                sock.send_close()
+            finally:
+                # close() desde otro hilo no despierta al select() de
+                # run_forever (tarda hasta WS_PING_TIMEOUT); abort() sí
+                sock.abort()
 
-            # Esperar un momento antes de reconectar
-            time.sleep(2)
+    def _connection_lost(self):
+        """Marca la conexión como caída y falla lo que esperaba respuesta"""
+        connection_status["connected"] = False
+        self.connected = False
+        self.rpc.fail_all(ConnectionError("Conexión cerrada"))
+        # Las suscripciones de proposal mueren con la conexión
+        self.proposals.reset()
 
-            # Reconectar
-            self.connect()
+    def _connect_after_close(self):
+        try:
+            self._open_socket()
             self.debug_print("✅ Reconexión iniciada", "SUCCESS")
         except Exception as e:
             self.debug_print(f"❌ Error en reconexión: {e}", "ERROR")
-            # Reintentar después de un delay
-            threading.Timer(WS_RECONNECT_DELAY, self._reconnect).start()
+            self._schedule_reconnect()
 
     def on_error(self, ws, error):
+        if ws is not self.ws:
+            return
         self.debug_print(f"❌ Error WebSocket: {error}", "ERROR")
         # Intentar reconexión en caso de error
         if "timed out" in str(error) or "ping" in str(error).lower():
             self.debug_print(
                 "🔄 Error de timeout detectado, intentando reconectar...", "WARNING"
             )
-            threading.Timer(WS_RECONNECT_DELAY, self._reconnect).start()
+            self._schedule_reconnect()
 
     def on_close(self, ws, code, msg):
+        # Una conexión cerrada por _close_socket ya se limpió allí
+        if ws is not self.ws:
+            return
         self.debug_print(f"🔌 Conexión cerrada: {code} - {msg}", "WARNING")
-        connection_status["connected"] = False
-        self.connected = False
+        self._connection_lost()
 
         # Intentar reconexión automática si no es un cierre intencional
         if code != 1000:  # 1000 es cierre normal
             self.debug_print(
-                f"🔄 Intentando reconectar en {WS_RECONNECT_DELAY} segundos...",
+                f"🔄 Intentando reconectar en {self.reconnect_delay} segundos...",
                 "WARNING",
             )
-            threading.Timer(WS_RECONNECT_DELAY, self._reconnect).start()
+            self._schedule_reconnect()
@@ -20,6 +20,7 @@ from core.correlation import CorrelationGuard
 from core.ml_adapter import MLAdvisor
 from core.backtester import Backtester
 from utils.logger import logger
+from config import CORRELATION_THRESHOLD, WS_ASYNC
 
 # Variables de entorno
 from dotenv import load_dotenv
@@ -46,10 +47,23 @@ def signal_handler(signum, frame):
             "\n🧠 [cyan]Entrenando modelo de ML con los datos de la sesión...[/cyan]"
         )
         try:
-            deriv_client.strategy.ml_advisor.train_from_csv()
+            # Las últimas filas pueden seguir en la cola del escritor
+            logger.flush()
+            deriv_client.strategy.ml_advisor.train_from_csv(
+                str(logger.training_data_csv)
+            )
+            deriv_client.reload_strategy()
         except Exception as e:
             console.print(f"❌ [red]Error durante el entrenamiento: {e}[/red]")
 
+    # Archivar trades cerrados retenidos en memoria
+    if deriv_client:
+        if WS_ASYNC:
+            deriv_client.stop()
+        elif deriv_client.sharder is not None:
+            deriv_client.sharder.stop()
+        deriv_client.engine.spill_closed()
+
     # Mostrar estadísticas finales
     if logger:
         stats = logger.stats
@@ -94,14 +108,10 @@ def render_layout(engine):
     table.add_column("Profit", justify="center")
     table.add_column("Estado", justify="center")
 
-    now_ts = time.time()
-    for trade in engine.trades.values():
-        elapsed = (
-            f"{int(now_ts - trade['_open_ts'])}s"
-            if trade["status"] == "Abierta"
-            else trade.get("elapsed", "-")
-        )
-        profit = trade.get("profit", 0)
+    now_ts = engine.clock.time()
+    for trade in engine.recent_trades():
+        elapsed = trade.elapsed(now_ts)
+        profit = trade.profit
 
         color = "green" if profit > 0 else "red" if profit < 0 else "white"
         profit_str = (
@@ -111,13 +121,13 @@ def render_layout(engine):
         )
 
         table.add_row(
-            trade.get("id", "")[:8],
-            trade.get("symbol", ""),
-            trade.get("contract_type", ""),
-            f"{trade.get('amount', 0):.2f}",
+            trade.id[:8],
+            trade.symbol,
+            trade.contract_type,
+            f"{trade.amount:.2f}",
             elapsed,
             profit_str,
-            trade.get("status", ""),
+            trade.status,
         )
 
     trades_panel = Panel(table, title="📋 Trades", padding=(1, 2))
@@ -207,6 +217,8 @@ def start_all():
     risk = RiskManager()
     engine = TradeEngine(risk)
     strategy = Strategy()
+    # Filtro de correlación alimentado con los cierres 1m del cliente
+    correlation = CorrelationGuard(correlation_threshold=CORRELATION_THRESHOLD)
 
     # Cargar modelo de ML existente al inicio
     if strategy.ml_advisor.ml_available:
@@ -214,8 +226,23 @@ def start_all():
         strategy.ml_advisor.load_model()
 
     # Crear cliente WebSocket
-    deriv_client = DerivWS(
-        APP_ID, TOKEN, symbols, engine, buffers, features_engine, strategy, risk
+    if WS_ASYNC:
+        # Import diferido: el cliente asyncio requiere websockets
+        from core.async_client import AsyncDerivWS
+
+        client_cls = AsyncDerivWS
+    else:
+        client_cls = DerivWS
+    deriv_client = client_cls(
+        APP_ID,
+        TOKEN,
+        symbols,
+        engine,
+        buffers,
+        features_engine,
+        strategy,
+        risk,
+        correlation=correlation,
     )
 
     console.print("🔌 [green]Conectando...[/green]")
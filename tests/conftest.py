@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from benchmarks.mock_deriv_server import WEBSOCKETS_AVAILABLE, MockDerivServer
+from core.correlation import CorrelationGuard
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.orders import TradeEngine
+from core.risk import RiskManager
+from core.strategy import Strategy
+from core.websocket_client_enhanced import DerivWS
+from utils.logger import logger
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _log_dir(tmp_path_factory):
+    """Los logs de las pruebas no van al logs/ del repo"""
+    logger.set_log_dir(tmp_path_factory.mktemp("logs"))
+
+
+def wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("la condición no se cumplió a tiempo")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    if not WEBSOCKETS_AVAILABLE:
+        pytest.skip("websockets no disponible")
+    server = MockDerivServer(["R_10", "R_100"], rate=5, history_ticks=500)
+    server.url = server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    """DerivWS conectado al servidor simulado y con el historial sincronizado"""
+    buffers = OHLCBuffers(maxlen=1000)
+    risk = RiskManager()
+    client = DerivWS(
+        "1",
+        "token",
+        server.symbols,
+        TradeEngine(risk),
+        buffers,
+        FeatureEngine(buffers),
+        Strategy(),
+        risk,
+        correlation=CorrelationGuard(),
+    )
+    client.ws_url = server.url
+    client.debug_mode = False
+    client.reconnect_delay = 0.1
+    client.connect()
+    wait_until(lambda: client.last_sync is not None)
+    yield client
+    client._close_socket()
+    client._ws_thread.join(timeout=5)
+    client.scheduler.stop()
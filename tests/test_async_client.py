@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from core.async_client import AsyncDerivWS, _BufferSnapshot
+from core.features import FEATURE_TAIL, SERIES, FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.orders import TradeEngine
+from core.risk import RiskManager
+from core.strategy import Strategy
+from core.synthetic import generate_candles
+from tests.conftest import wait_until
+
+
+def test_snapshot_evaluation_matches_the_shared_engine():
+    """Copias de FEATURE_TAIL velas + estado propio = FeatureEngine sobre los buffers"""
+    rng = np.random.default_rng(2)
+    buffers = OHLCBuffers(maxlen=300)
+    engine = FeatureEngine(buffers)
+    states = {}
+    checked = 0
+    for candle in generate_candles("R_100", 900, seed=2).to_dict("records"):
+        candle["epoch"] = int(candle["epoch"])
+        buffers.upsert_ohlc_1m("R_100", {**candle, "close": candle["open"]})
+        buffers.upsert_ohlc_1m("R_100", candle)
+        if rng.random() < 0.6:
+            continue  # varias velas nuevas entre evaluaciones
+
+        snapshot = _BufferSnapshot(buffers, "R_100", states)
+        got = FeatureEngine(snapshot, states=states).compute_features("R_100")
+        expected = engine.compute_features("R_100")
+        for tf in ("m1", "m5", "m15"):
+            if expected[tf] is None:
+                assert got[tf] is None
+                continue
+            for name in SERIES:
+                assert got[tf][name] == expected[tf][name]
+        if states:
+            assert len(snapshot.m1["R_100"]) <= FEATURE_TAIL
+            checked += 1
+    assert checked > 100
+
+
+def test_async_client_syncs_evaluates_and_resyncs_after_a_drop(server):
+    buffers = OHLCBuffers(maxlen=1000)
+    risk = RiskManager()
+    client = AsyncDerivWS(
+        "1",
+        "token",
+        server.symbols,
+        TradeEngine(risk),
+        buffers,
+        FeatureEngine(buffers),
+        Strategy(),
+        risk,
+    )
+    client.ws_url = server.url
+    client.debug_mode = False
+    client.reconnect_delay = 0.1
+    loop_thread = threading.Thread(target=asyncio.run, args=(client.run(),))
+    loop_thread.start()
+    try:
+        wait_until(lambda: client.last_sync is not None)
+        for symbol in server.symbols:
+            epochs = [c["epoch"] for c in buffers.m1[symbol]]
+            assert len(epochs) > 10 and epochs == sorted(set(epochs))
+        # velas en vivo desde los ticks: evaluadas en el executor
+        wait_until(lambda: client.evaluations > 0, timeout=20)
+        wait_until(lambda: not client._evaluating)
+
+        first = client.last_sync
+        server.call(server.drop)
+        wait_until(lambda: client.last_sync is not first)
+        assert client.reconnects == 1 and client.connected
+        future = asyncio.run_coroutine_threadsafe(asyncio.sleep(0), client.loop)
+        future.result(timeout=2)  # el loop sigue respondiendo
+        assert client.rpc.request({"ping": 1}).result(timeout=2)
+    finally:
+        client.stop()
+        loop_thread.join(timeout=10)
+    assert not loop_thread.is_alive()
@@ -0,0 +1,80 @@
+import bisect
+
+import numpy as np
+import pytest
+
+from core.contracts import ContractSimulator
+
+PAYOUTS = {1: 0.9, 2: 0.85, 5: 0.8}
+
+
+def resolve_one(epochs, prices, entry_epoch, direction, duration, sim, next_tick):
+    """Un contrato con bisect: referencia del resolve vectorizado"""
+    if next_tick:
+        i = bisect.bisect_right(epochs, entry_epoch)
+    else:
+        i = bisect.bisect_right(epochs, entry_epoch) - 1
+    expiry = entry_epoch + duration * sim.duration_unit
+    j = bisect.bisect_right(epochs, expiry) - 1
+    if i < 0 or i >= len(epochs) or j < i or expiry > epochs[-1]:
+        return None
+    move = prices[j] - prices[i]
+    win = move > 0 if direction == "CALL" else move < 0  # empate: pierde
+    payout = PAYOUTS.get(duration, sim.default_payout)
+    return prices[i], prices[j], win, round(payout, 2) if win else -1.0
+
+
+@pytest.mark.parametrize("next_tick", [False, True])
+def test_resolve_matches_per_contract_lookup(next_tick):
+    rng = np.random.default_rng(1)
+    # ticks irregulares con precios repetidos (empates frecuentes)
+    epochs = np.cumsum(rng.integers(1, 4, 3000)) + 1_700_000_000
+    prices = np.round(100 + np.cumsum(rng.choice([-0.01, 0.0, 0.01], 3000)), 2)
+    n = 2000
+    entry = rng.integers(epochs[0] - 30, epochs[-1] + 30, n)
+    directions = np.where(rng.random(n) < 0.5, "CALL", "PUT")
+    durations = rng.choice([1, 2, 3, 5], n)
+
+    sim = ContractSimulator(payout_table=PAYOUTS, default_payout=0.7)
+    res = sim.resolve(
+        epochs, prices, entry, directions, durations, entry_on_next_tick=next_tick
+    )
+
+    ties = 0
+    for k in range(n):
+        expected = resolve_one(
+            epochs.tolist(),
+            prices.tolist(),
+            int(entry[k]),
+            directions[k],
+            int(durations[k]),
+            sim,
+            next_tick,
+        )
+        if expected is None:
+            assert not res["valid"][k]
+            assert np.isnan(res["profit"][k])
+            continue
+        entry_price, exit_price, win, profit = expected
+        assert res["valid"][k]
+        assert res["entry_price"][k] == entry_price
+        assert res["exit_price"][k] == exit_price
+        assert res["win"][k] == win
+        assert res["profit"][k] == pytest.approx(profit)
+        assert sim.settle(
+            directions[k], entry_price, exit_price, 1.0, durations[k]
+        ) == (pytest.approx(profit))
+        ties += entry_price == exit_price
+    assert ties > 50
+    assert res["valid"].sum() > 1000 and (~res["valid"]).sum() > 10
+
+
+def test_tie_loses_and_expiry_uses_last_price_at_or_before():
+    sim = ContractSimulator(payout_table={1: 0.9})
+    epochs = [0, 30, 60, 61, 150]
+    prices = [10.0, 11.0, 10.0, 12.0, 13.0]
+    res = sim.resolve(epochs, prices, [0, 0, 0, 30], ["CALL", "PUT", "CALL", "CALL"], 1)
+    # Expira en 60: el tick de 60 cuenta, el de 61 no (empate, pierde)
+    assert res["exit_price"].tolist() == [10.0, 10.0, 10.0, 12.0]
+    assert res["win"].tolist() == [False, False, False, True]
+    assert res["profit"].tolist() == [-1.0, -1.0, -1.0, 0.9]
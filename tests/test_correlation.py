@@ -0,0 +1,92 @@
+import numpy as np
+
+from core.clock import VirtualClock
+from core.correlation import CorrelationGuard
+from tests.conftest import wait_until
+
+
+def full_matrix(guard):
+    """Cálculo completo sobre la ventana (matriz enmascarada de una vez)"""
+    n = len(guard.symbols)
+    valid = (guard._buckets > guard._latest_bucket - guard.maxlen) & (
+        guard._buckets >= 0
+    )
+    order = np.argsort(guard._buckets[valid], kind="stable")
+    buckets = guard._buckets[valid][order]
+    prices = guard._prices[valid][order][:, :n]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(prices), axis=0)
+    returns[np.diff(buckets) != 1] = np.nan
+
+    mask = np.isfinite(returns)
+    x = np.where(mask, returns, 0.0)
+    m = mask.astype(float)
+    count = m.T @ m
+    sum_x = x.T @ m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = x.T @ x - sum_x * sum_x.T / count
+        var_i = (x * x).T @ m - sum_x * sum_x / count
+        corr = cov / np.sqrt(var_i * var_i.T)
+    corr[(count < guard.min_points) | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def test_rolling_sums_match_full_recompute():
+    rng = np.random.default_rng(3)
+    guard = CorrelationGuard(maxlen=50, resolution=60)
+    symbols = [f"S_{i}" for i in range(12)]  # fuerza a ampliar columnas
+    prices = 1000 + np.cumsum(rng.normal(0, 1, (400, len(symbols))), axis=0)
+    prices[:, 1] = prices[:, 0] * 1.01  # un par muy correlado
+
+    bucket = 0
+    for k, row in enumerate(prices):
+        bucket += 1 if rng.random() > 0.05 else 3  # huecos
+        active = symbols[: 4 + k // 40]  # símbolos que llegan más tarde
+        for s, p in zip(active, row):
+            if rng.random() < 0.1:
+                continue  # intervalo sin precio de ese símbolo
+            guard.update_price(s, p, epoch=bucket * 60 + rng.integers(60))
+        if rng.random() < 0.2:
+            # precio tardío de un intervalo anterior
+            guard.update_price(active[2], row[2] + 0.5, epoch=(bucket - 1) * 60)
+        if k % 7 == 0:
+            np.testing.assert_allclose(
+                guard.correlation_array(), full_matrix(guard), atol=1e-9
+            )
+
+    np.testing.assert_allclose(guard.correlation_array(), full_matrix(guard), atol=1e-9)
+    assert guard.get_correlation("S_0", "S_1") > 0.99
+    assert not guard.can_open_trade("S_1", {"S_0"})
+
+
+def test_default_epoch_comes_from_the_clock():
+    clock = VirtualClock(start=600)
+    guard = CorrelationGuard(resolution=60, clock=clock)
+    guard.update_price("R_10", 100.0)
+    clock.advance(60)
+    guard.update_price("R_10", 101.0)
+    assert guard._latest_bucket == 11
+
+
+def test_live_candles_feed_the_guard(client):
+    guard = client.correlation
+    assert set(guard.symbols) == {"R_10", "R_100"}
+    latest = guard._latest_bucket
+    assert latest > 0
+
+    # Guard nuevo con minutos siguientes en que los dos índices van a la par
+    guard = client.correlation = CorrelationGuard()
+    moves = np.random.default_rng(5).normal(0, 0.01, 30)
+    for k, move in enumerate(np.cumsum(moves), start=1):
+        epoch = (latest + k) * guard.resolution
+        guard.update_price("R_10", 1000 * np.exp(move), epoch)
+        guard.update_price("R_100", 5000 * np.exp(move), epoch)
+    assert guard.get_correlation("R_10", "R_100") > 0.9
+
+    decision = (0.99, "CALL", 1, ["prueba"], [0.0] * 10)
+    client._call_on_processor(client._apply_decision, "R_10", decision)
+    wait_until(lambda: client.trades_opened == 1)
+    client._call_on_processor(client._apply_decision, "R_100", decision)
+    client._call_on_processor(client._apply_decision, "R_10", decision)
+    wait_until(lambda: client.engine.open_per_symbol["R_10"] == 2)
+    assert client.engine.open_per_symbol["R_100"] == 0
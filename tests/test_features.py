@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.synthetic import generate_candles
+from utils.indicators import calc_atr, calc_macd, calc_rsi
+
+SERIES = ("closes", "rsi", "macd", "signal", "hist", "atr")
+
+
+def full_recompute(candles):
+    """Series sobre la ventana completa, como antes del estado incremental"""
+    arr = list(candles)
+    closes = [float(x["close"]) for x in arr]
+    macd, signal, hist = calc_macd(closes, 12, 26, 9)
+    return {
+        "closes": closes,
+        "rsi": calc_rsi(closes, 14),
+        "macd": macd,
+        "signal": signal,
+        "hist": hist,
+        "atr": calc_atr(arr, 14),
+    }
+
+
+def replay(maxlen, minutes=1200, seed=4):
+    """Velas 1m con actualizaciones de la vela en curso; evalúa a saltos"""
+    rng = np.random.default_rng(seed)
+    buffers = OHLCBuffers(maxlen=maxlen)
+    features = FeatureEngine(buffers)
+    df = generate_candles("R_100", minutes, seed=seed)
+    for row in df.itertuples():
+        candle = {
+            "open": row.open,
+            "high": row.high,
+            "low": row.low,
+            "close": row.close,
+            "epoch": int(row.epoch),
+        }
+        if rng.random() < 0.3:
+            buffers.upsert_ohlc_1m("R_100", {**candle, "close": row.open})
+            features.compute_features("R_100")
+        buffers.upsert_ohlc_1m("R_100", candle)
+        if rng.random() < 0.2:
+            yield buffers, features.compute_features("R_100")
+
+
+@pytest.mark.parametrize("tf", ["m1", "m5", "m15"])
+def test_incremental_matches_full_recompute(tf):
+    checked = 0
+    for buffers, feats in replay(maxlen=5000):
+        if feats[tf] is None:
+            continue
+        expected = full_recompute(getattr(buffers, tf)["R_100"])
+        for name in SERIES:
+            got = feats[tf][name]
+            np.testing.assert_allclose(got, expected[name][-len(got) :], atol=1e-9)
+        checked += 1
+    assert checked > 10
+
+
+def test_sliding_window_keeps_rsi_and_atr_exact():
+    for buffers, feats in replay(maxlen=300):
+        if feats["m1"] is None:
+            continue
+        expected = full_recompute(buffers.m1["R_100"])
+        for name in ("closes", "rsi", "atr"):
+            # las primeras velas de la ventana recortada no tienen historia
+            got = feats["m1"][name][-100:]
+            np.testing.assert_allclose(got, expected[name][-100:], atol=1e-9)
+        # Las EMAs siguen desde la primera vela: difieren de reiniciarlas en
+        # la ventana solo por un término que decae con (1 - k)^300
+        np.testing.assert_allclose(
+            feats["m1"]["hist"][-1], expected["hist"][-1], atol=1e-6
+        )
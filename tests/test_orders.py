@@ -0,0 +1,129 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from config import CONTRACT_SETTLE_GRACE
+from core.orders import TradeEngine
+from core.risk import RiskManager
+from core.rpc import ProposalCache, stake_band
+from tests.conftest import wait_until
+from utils.logger import logger
+
+DECISION = (0.99, "CALL", 1, ["prueba"], [0.0] * 10)
+
+
+@pytest.fixture
+def trader(server, client):
+    """Cliente con órdenes reales; un minuto de contrato dura 0.5 s"""
+    server.minute = 0.5
+    client.real_orders = True
+    return client
+
+
+def open_trade(client):
+    client._call_on_processor(client._apply_decision, "R_10", DECISION)
+    wait_until(lambda: client.trades_opened == 1)
+
+
+def test_proposal_buy_and_settlement(server, trader):
+    stake = trader.risk.compute_stake(trader.engine.balance)
+    key = trader.proposals.warm("R_10", "CALL", 1, stake)
+    wait_until(lambda: trader.proposals.fresh(key) is not None)
+
+    open_trade(trader)
+    wait_until(lambda: trader.engine.open_contracts)
+    trade_id = next(iter(trader.engine.open_contracts))
+    # Se compra con el id del proposal pre-calentado, que queda consumido
+    assert trader.proposals.fresh(key) is None
+
+    wait_until(lambda: trade_id not in trader.engine.trades)
+    assert len(trader.engine.trades_today) == 1
+    assert not trader._contract_timeouts and not trader._contract_polls
+    assert server.stats()["open_contracts"] == 0
+
+
+def test_rejected_buy_releases_trade(server, trader):
+    server.balance = 0.0
+    open_trade(trader)
+    wait_until(lambda: trader.engine.open_total == 0)
+    assert not trader.engine.trades
+    assert not trader.engine.trades_today
+    assert not trader._contract_timeouts
+
+
+def test_missing_settlement_times_out(server, trader):
+    server.minute = 1e6  # el servidor no liquida
+    open_trade(trader)
+    wait_until(lambda: trader._contract_polls)
+    trade_id = next(iter(trader._contract_polls))
+    call = trader._contract_timeouts[trade_id]
+    assert call.when - trader.scheduler.time_fn() > 60 + CONTRACT_SETTLE_GRACE - 5
+
+    # Se adelanta el vencimiento programado
+    poc = trader._contract_polls[trade_id]
+    trader._call_on_processor(call.fn, *call.args)
+    wait_until(lambda: trade_id not in trader.engine.trades)
+    assert trader.engine.open_total == 0
+    assert not trader._contract_polls
+    assert poc.done()
+
+
+def test_closed_trades_spill_through_the_logger():
+    engine = TradeEngine(RiskManager(), closed_history=1)
+    ids = [engine.open_trade("R_10", "CALL", 1.0, None) for _ in range(3)]
+    for trade_id in ids:
+        engine.finalize_trade(trade_id, 0.9)
+    logger.flush()
+
+    with open(engine.archive_path) as f:
+        archived = [json.loads(line)["id"] for line in f]
+    assert archived[-2:] == ids[:2]
+    assert [t.id for t in engine.closed_trades] == ids[2:]
+
+
+class RecordingRPC:
+    """RequestMultiplexer mínimo: guarda los payloads y deja los Future abiertos"""
+
+    def __init__(self):
+        self.sent = []
+        self.forgotten = []
+
+    def request(self, payload, on_update=None):
+        future = Future()
+        future.req_id = len(self.sent) + 1
+        future.on_update = on_update
+        self.sent.append(payload)
+        return future
+
+    def forget(self, req_id):
+        self.forgotten.append(req_id)
+
+
+def test_buy_requotes_when_the_stake_moved_within_its_band():
+    rpc = RecordingRPC()
+    cache = ProposalCache(rpc, clock=lambda: 0.0)
+    key = cache.warm("R_10", "CALL", 1, 10.0)
+    subscription = cache._warming[key][1]
+    subscription.set_result(
+        {"proposal": {"id": "p1", "ask_price": 10.0}, "subscription": {"id": "s1"}}
+    )
+
+    # Mismo importe: se compra con el proposal pre-calentado
+    _, bought = cache.buy("R_10", "CALL", 1, 10.0)
+    assert bought == 10.0 and rpc.sent[-1] == {"buy": "p1", "price": 10.0}
+
+    # Otro stake de la misma banda: compra por el stake exacto, no la banda
+    subscription.on_update(
+        {"proposal": {"id": "p2", "ask_price": 10.0}, "subscription": {"id": "s1"}}
+    )
+    stake = 10.37
+    assert stake_band(stake) == key[3]
+    _, bought = cache.buy("R_10", "CALL", 1, stake)
+    buy = next(p for p in rpc.sent if p.get("buy") == 1)
+    assert bought == stake and buy["parameters"]["amount"] == stake
+    assert cache.requotes == 1
+    # La banda se vuelve a suscribir con el stake nuevo y se olvida la vieja
+    assert cache._warming[key][0] == stake
+    assert {"forget": "s1"} in rpc.sent
+    assert rpc.sent[-2]["proposal"] == 1 and rpc.sent[-2]["amount"] == stake
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import INITIAL_BALANCE
+from core.portfolio import PortfolioBacktester
+from core.results_io import load_table
+from core.risk import RiskManager
+from core.streaming_backtester import StreamingBacktester
+from core.synthetic import generate_candles
+
+START = 1_704_067_200
+FIELDS = ["symbol", "direction", "entry_epoch", "exit_epoch", "stake", "net_pnl"]
+
+
+def uneven_dataset(minutes=900):
+    """Tres símbolos: uno completo, uno que termina antes y otro con un hueco"""
+    full = generate_candles("R_10", minutes, seed=3)
+    short = generate_candles("R_50", minutes, seed=3).iloc[: minutes - 120]
+    gapped = generate_candles("R_100", minutes, seed=3)
+    gapped = gapped.drop(gapped.index[600:612]).reset_index(drop=True)
+    return {"R_10": full, "R_50": short, "R_100": gapped}
+
+
+def test_streaming_and_portfolio_agree_on_gaps_and_early_ends(tmp_path):
+    data = uneven_dataset()
+    paths = {}
+    for symbol, df in data.items():
+        paths[symbol] = str(tmp_path / f"{symbol}.csv")
+        df.to_csv(paths[symbol], index=False)
+
+    portfolio = PortfolioBacktester(threshold=0.0, workers=1, max_open_total=3)
+    expected_metrics = portfolio.run(data)
+    expected = pd.DataFrame(portfolio.backtester.trades)
+
+    streaming = StreamingBacktester(threshold=0.0, max_open_total=3, fmt="csv")
+    metrics = streaming.run(paths, str(tmp_path / "out"))
+    got = load_table(str(tmp_path / "out"), "trades")
+
+    assert len(expected) > 20
+    assert set(expected["symbol"]) == set(data)
+    pd.testing.assert_frame_equal(
+        got[FIELDS].reset_index(drop=True),
+        expected[FIELDS].reset_index(drop=True),
+        check_dtype=False,
+    )
+    assert metrics["final_balance"] == pytest.approx(expected_metrics["final_balance"])
+    assert metrics["total_trades"] == expected_metrics["total_trades"]
+
+
+def make_signals(closes, epochs=None, score=1.0, direction=1, duration=3):
+    """Señales precalculadas (ver compute_symbol_signals) para run(signals=)"""
+    closes = np.asarray(closes, dtype=float)
+    if epochs is None:
+        epochs = START + 60 * np.arange(len(closes))
+    n = len(closes)
+    return {
+        "epoch": np.asarray(epochs, dtype=np.int64),
+        "close": closes,
+        "score": np.broadcast_to(np.asarray(score, dtype=float), (n,)).copy(),
+        "direction": np.full(n, direction, dtype=np.int8),
+        "duration": np.full(n, duration, dtype=np.int16),
+    }
+
+
+def random_walk(rng, n):
+    return 1000 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+
+
+def overlapping(a, b):
+    """Pares de trades abiertos a la vez (intervalos [entrada, expiración))"""
+    return sum(
+        1
+        for ta in a
+        for tb in b
+        if ta is not tb
+        and ta["entry_epoch"] < tb["exit_epoch"]
+        and tb["entry_epoch"] < ta["exit_epoch"]
+    )
+
+
+def test_exposure_limits_per_symbol_and_total():
+    rng = np.random.default_rng(7)
+    signals = {s: make_signals(random_walk(rng, 300)) for s in ("A", "B", "C")}
+    bt = PortfolioBacktester(
+        max_open_per_symbol=1,
+        max_open_total=2,
+        correlation_threshold=1.0,
+        threshold=0.5,
+    )
+    bt.run({}, signals=signals)
+    trades = bt.backtester.trades
+
+    assert len(trades) > 50
+    for t in trades:
+        open_at_entry = [
+            o for o in trades if o["entry_epoch"] <= t["entry_epoch"] < o["exit_epoch"]
+        ]
+        assert len(open_at_entry) <= 2
+        assert sum(o["symbol"] == t["symbol"] for o in open_at_entry) == 1
+
+
+def test_correlated_symbols_never_open_together():
+    rng = np.random.default_rng(11)
+    base = random_walk(rng, 400)
+    score = np.where(np.arange(400) >= 30, 1.0, 0.0)  # historia para la guarda
+    signals = {
+        "A": make_signals(base, score=score),
+        "B": make_signals(2 * base, score=score),  # mismos retornos que A
+        "C": make_signals(random_walk(rng, 400), score=score),
+    }
+    bt = PortfolioBacktester(correlation_threshold=0.8, threshold=0.5)
+    bt.run({}, signals=signals)
+    by_symbol = {
+        s: [t for t in bt.backtester.trades if t["symbol"] == s] for s in signals
+    }
+
+    assert by_symbol["A"] and by_symbol["C"]
+    assert overlapping(by_symbol["A"], by_symbol["B"]) == 0
+    assert overlapping(by_symbol["A"], by_symbol["C"]) > 0
+
+
+def test_contracts_settle_globally_when_their_symbol_has_no_candle():
+    # B cae y deja de cotizar tras el minuto 3 hasta el 20; su contrato vence
+    # en el minuto 5 y se liquida entonces, antes de la entrada de A en el 6
+    b_epochs = START + 60 * np.array([0, 1, 2, 3, 20, 21, 22, 23])
+    b_score = [0, 0, 1, 0, 0, 0, 0, 0]
+    a_score = np.zeros(30)
+    a_score[6] = 1.0
+    signals = {
+        "A": make_signals(np.full(30, 100.0), score=a_score),
+        "B": make_signals([100, 99, 98, 97, 96, 95, 94, 93], b_epochs, score=b_score),
+    }
+    bt = PortfolioBacktester(correlation_threshold=1.0, threshold=0.5)
+    bt.run({}, signals=signals)
+    b_trade, a_trade = bt.backtester.trades
+
+    assert b_trade["symbol"] == "B" and b_trade["exit_epoch"] == START + 300
+    assert b_trade["exit_price"] == 97.0  # último cierre de B <= expiración
+    assert b_trade["net_pnl"] == -b_trade["stake"]
+    # la pérdida ya contaba al abrir A: balance y racha perdedora
+    risk = RiskManager()
+    risk.on_trade_result(b_trade["net_pnl"])
+    assert a_trade["entry_epoch"] == START + 360
+    assert a_trade["stake"] == risk.compute_stake(INITIAL_BALANCE + b_trade["net_pnl"])
@@ -0,0 +1,41 @@
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from core.websocket_client_enhanced import connection_status
+from tests.conftest import wait_until
+
+
+def test_own_reconnect_fails_pending_requests(server, client):
+    # Respuestas retenidas: la petición y el proposal quedan en vuelo
+    server.latency = 2.0
+    pending = client.rpc.request({"ping": 1})
+    key = client.proposals.warm("R_10", "CALL", 1, 1.0)
+    assert key in client.proposals._warming
+
+    # Reconexión iniciada por el cliente (monitor, ping o on_error)
+    client._schedule_reconnect(0)
+    with pytest.raises(ConnectionError):
+        pending.result(timeout=2)
+    assert not client.connected
+    assert not connection_status["connected"]
+    assert not client.proposals._warming
+
+    server.latency = 0.0
+    wait_until(lambda: client.connected)
+    assert server.stats()["connections"] == 2
+
+    # Tras reconectar warm() vuelve a suscribir la banda
+    client.proposals.warm("R_10", "CALL", 1, 1.0)
+    wait_until(lambda: client.proposals.fresh(key) is not None)
+
+
+def test_server_drop_resyncs(server, client):
+    first = client.last_sync
+    server.call(server.drop)
+    wait_until(lambda: client.last_sync is not first)
+    assert client.connected
+    try:
+        client.rpc.request({"ping": 1}).result(timeout=2)
+    except FutureTimeout:
+        pytest.fail("la conexión nueva no responde")
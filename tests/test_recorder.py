@@ -0,0 +1,87 @@
+import threading
+
+from benchmarks.bench_replay import record_session
+from core.clock import VirtualClock
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.orders import TradeEngine
+from core.recorder import FrameRecorder, FrameReplayer, read_frames
+from core.risk import RiskManager
+from core.strategy import Strategy
+from core.websocket_client_enhanced import DerivWS
+
+SYMBOLS = ["R_10", "R_50", "R_100"]
+
+
+def make_client():
+    clock = VirtualClock()
+    risk = RiskManager(clock=clock)
+    engine = TradeEngine(risk, clock=clock)
+    engine.set_balance(1000.0)
+    buffers = OHLCBuffers(maxlen=1000)
+    strategy = Strategy()
+    strategy.threshold = 0.3  # la sesión sintética debe abrir contratos
+    client = DerivWS(
+        "1",
+        "",
+        SYMBOLS,
+        engine,
+        buffers,
+        FeatureEngine(buffers),
+        strategy,
+        risk,
+        clock=clock,
+    )
+    client.debug_mode = False
+    return client
+
+
+def decisions(client):
+    engine = client.engine
+    trades = list(engine.closed_trades) + list(engine.trades.values())
+    return {
+        "evaluations": client.evaluations,
+        "trades": client.trades_opened,
+        "balance": engine.balance,
+        "trade_log": [
+            (t.id, t.symbol, t.contract_type, t.amount, t.open_ts, t.profit)
+            for t in trades
+        ],
+    }
+
+
+def live_session(source, path):
+    """
+    Sesión 'en vivo': cada frame entra por on_message (que lo graba) y lo
+    consume el hilo de procesamiento real; el reloj virtual sigue al ts.
+    """
+    client = make_client()
+    client.recorder = FrameRecorder(path)
+    processor = threading.Thread(target=client._message_processor, daemon=True)
+    processor.start()
+    for ts, frame in read_frames(source):
+        client.clock.set(ts)
+        client.scheduler.run_pending()
+        client.on_message(None, frame)
+        client.message_queue.join()  # el procesamiento sigue el ritmo
+    client.message_queue.put(None)
+    processor.join(timeout=5)
+    client.recorder.close()
+    return decisions(client)
+
+
+def test_max_speed_replay_reproduces_the_live_decisions(tmp_path):
+    source = str(tmp_path / "source.gz")
+    recorded = str(tmp_path / "live.gz")
+    frames = record_session(source, SYMBOLS, minutes=10)
+    live = live_session(source, recorded)
+
+    for _ in range(2):
+        client = make_client()
+        result = FrameReplayer(client, recorded).run()
+        assert result["frames"] == frames
+        assert decisions(client) == live
+
+    assert live["trades"] > 0 and len(live["trade_log"]) == live["trades"]
+    # vencimientos ejecutados por el planificador durante la sesión
+    assert live["balance"] != 1000.0
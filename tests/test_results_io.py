@@ -0,0 +1,47 @@
+import pytest
+
+from core.results_io import ARROW_AVAILABLE, FORMATS, TableWriter, load_table
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_later_blocks_widen_the_schema(tmp_path, fmt):
+    if fmt != "csv" and not ARROW_AVAILABLE:
+        pytest.skip("pyarrow no disponible")
+    writer = TableWriter(str(tmp_path / f"trades.{fmt}"), fmt, row_group_size=2)
+    rows = [
+        {"profit": 1, "note": None},
+        {"profit": 2, "note": None},
+        {"profit": 0.5, "note": "a"},  # int -> float, None -> str
+        {"profit": 3, "note": None},
+    ]
+    for row in rows:
+        writer.write(row)
+    writer.close()
+
+    table = load_table(str(tmp_path), "trades")
+    assert table["profit"].tolist() == [1.0, 2.0, 0.5, 3.0]
+    assert table["note"].tolist()[2] == "a"
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_columns_first_seen_in_later_rows_are_kept(tmp_path, fmt):
+    if fmt != "csv" and not ARROW_AVAILABLE:
+        pytest.skip("pyarrow no disponible")
+    writer = TableWriter(str(tmp_path / f"trades.{fmt}"), fmt, row_group_size=2)
+    rows = [
+        {"profit": 1.0},
+        {"profit": 2.0},
+        {"profit": 3.0, "exit_reason": "expiry"},
+        {"profit": 4.0},
+        {"profit": 5.0, "payout": 0.9},
+    ]
+    for row in rows:
+        writer.write(row)
+    writer.close()
+
+    table = load_table(str(tmp_path), "trades")
+    assert list(table.columns) == ["profit", "exit_reason", "payout"]
+    assert table["profit"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert table["exit_reason"].tolist()[2] == "expiry"
+    assert table["exit_reason"].isna().tolist() == [True, True, False, True, True]
+    assert table["payout"].tolist()[4] == 0.9
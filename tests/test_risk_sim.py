@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from core.clock import VirtualClock
+from core.risk import RiskManager
+from core.risk_sim import policy_grid, rank_policies, simulate_policies
+
+CONTRACT_SECONDS = 120  # un resultado por contrato de 2m, como en risk_sim
+
+
+def scalar_replay(unit_pnl, policy, initial_balance):
+    """
+    Cada resultado con un RiskManager real: el contrato t se abre en
+    t*120 s (can_trade_now, compute_stake) y se liquida 120 s después.
+    """
+    clock = VirtualClock()
+    risk = RiskManager(clock=clock)
+    for name, value in policy.items():
+        if name != "loss_pause_trades":
+            setattr(risk, name, value)
+    risk.loss_pause_seconds = policy["loss_pause_trades"] * CONTRACT_SECONDS
+
+    balance = peak = initial_balance
+    max_dd = 0.0
+    trades = 0
+    for t, r in enumerate(unit_pnl):
+        clock.set(t * CONTRACT_SECONDS)
+        if not risk.can_trade_now(balance):
+            continue
+        profit = risk.compute_stake(balance) * r
+        balance += profit
+        trades += 1
+        clock.set((t + 1) * CONTRACT_SECONDS)
+        risk.on_trade_result(profit)
+        peak = max(peak, balance)
+        max_dd = max(max_dd, (peak - balance) / peak)
+    return balance, trades, max_dd * 100
+
+
+def test_simulate_policies_matches_risk_manager_trade_by_trade():
+    rng = np.random.default_rng(5)
+    outcomes = rng.random((3, 400)) < 0.45  # rachas de pérdidas frecuentes
+    grid = policy_grid(
+        risk_per_trade=[0.002, 0.02],
+        win_streak_boost=[1.0, 1.5],
+        loss_streak_pause=[2, 4, 24],
+        loss_pause_trades=[1, 3],
+    )
+    result = simulate_policies(outcomes, grid, initial_balance=1000.0)
+    unit_pnl = np.where(outcomes, 0.9, -1.0)
+
+    n_policies = len(grid["risk_per_trade"])
+    paused = 0
+    for i in range(n_policies):
+        policy = {k: v[i] for k, v in grid.items()}
+        for s in range(len(outcomes)):
+            balance, trades, max_dd = scalar_replay(unit_pnl[s], policy, 1000.0)
+            assert result["final_balance"][s, i] == pytest.approx(balance)
+            assert result["total_trades"][s, i] == trades
+            assert result["max_drawdown_pct"][s, i] == pytest.approx(max_dd)
+            paused += trades < outcomes.shape[1]
+    assert paused > 0  # las pausas por racha se ejercitan
+
+
+def test_rank_policies_orders_by_return_over_drawdown():
+    rng = np.random.default_rng(9)
+    grid = policy_grid(
+        risk_per_trade=np.linspace(0.001, 0.02, 10),
+        win_streak_boost=np.linspace(1.0, 1.5, 10),
+        loss_streak_pause=np.arange(2, 12),
+    )
+    result = simulate_policies(rng.random((4, 200)) < 0.55, grid)
+    ranking = rank_policies(result)
+
+    assert len(ranking) == 1000
+    ratio = [r["total_return_pct"] / max(r["max_drawdown_pct"], 1e-9) for r in ranking]
+    assert ratio == sorted(ratio, reverse=True)
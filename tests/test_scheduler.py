@@ -0,0 +1,69 @@
+import threading
+
+import numpy as np
+
+from core.clock import VirtualClock
+from core.scheduler import ExpiryScheduler
+
+
+def test_fires_in_deadline_order_and_skips_cancelled():
+    """Mismo orden que ordenar la lista completa por (instante, alta)"""
+    rng = np.random.default_rng(4)
+    clock = VirtualClock()
+    scheduler = ExpiryScheduler(time_fn=clock.monotonic)
+    fired = []
+    calls = []
+    for i in range(2000):
+        # segundos enteros: muchos empates que se resuelven por orden de alta
+        delay = int(rng.integers(0, 300))
+        calls.append((delay, i, scheduler.schedule(delay, fired.append, i)))
+    cancelled = {i for _, i, _ in calls if rng.random() < 0.3}
+    for delay, i, call in calls:
+        if i in cancelled:
+            scheduler.cancel(call)
+    scheduler.cancel(None)
+    assert scheduler.pending() == len(calls) - len(cancelled)
+
+    expected = [i for delay, i, _ in sorted(calls) if i not in cancelled]
+    for t in range(0, 310, 7):
+        clock.set(t)
+        before = len(fired)
+        ran = scheduler.run_pending()
+        due = [i for d, i, _ in sorted(calls) if d <= t and i not in cancelled]
+        assert fired == due
+        assert ran == len(fired) - before
+    assert fired == expected
+    assert scheduler.pending() == 0
+
+
+def test_thread_wakes_for_an_earlier_deadline_and_honours_cancel():
+    scheduler = ExpiryScheduler()
+    done = threading.Event()
+    fired = []
+    scheduler.start()
+    try:
+        late = scheduler.schedule(30, fired.append, "late")
+        dropped = scheduler.schedule(0.05, fired.append, "dropped")
+        scheduler.cancel(dropped)
+        scheduler.schedule(0.1, lambda: (fired.append("early"), done.set()))
+        # el hilo dormía hasta el vencimiento de 30 s: debe despertar antes
+        assert done.wait(2)
+        assert fired == ["early"]
+        assert scheduler.pending() == 1
+        scheduler.cancel(late)
+    finally:
+        scheduler.stop()
+
+
+def test_dispatch_and_errors_do_not_stop_later_calls():
+    clock = VirtualClock()
+    dispatched = []
+    scheduler = ExpiryScheduler(
+        time_fn=clock.monotonic,
+        dispatch=lambda fn, *args: dispatched.append(args) or fn(*args),
+    )
+    scheduler.schedule(1, lambda: 1 / 0)
+    scheduler.schedule(2, dispatched.append, "after")
+    clock.advance(5)
+    assert scheduler.run_pending() == 2
+    assert dispatched == [(), ("after",), "after"]
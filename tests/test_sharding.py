@@ -0,0 +1,125 @@
+import threading
+import time
+
+from core.features import FeatureEngine
+from core.ohlc_buffers import OHLCBuffers
+from core.orders import TradeEngine
+from core.risk import RiskManager
+from core.sharding import ShardedEvaluator, shard_for
+from core.strategy import Strategy
+from core.synthetic import generate_candles
+from core.websocket_client_enhanced import DerivWS
+from tests.conftest import wait_until
+
+SYMBOLS = ["R_10", "R_25", "R_50", "R_75", "R_100"]
+
+
+def test_dead_worker_is_restarted_with_history():
+    history = {s: generate_candles(s, 800, seed=3).to_dict("records") for s in SYMBOLS}
+    decisions = {}
+    lock = threading.Lock()
+
+    def on_decision(symbol, decision, error, ts):
+        assert error is None
+        with lock:
+            decisions[symbol] = decisions.get(symbol, 0) + (decision is not None)
+
+    sharder = ShardedEvaluator(
+        Strategy(), on_decision, workers=2, history=lambda s: history[s][:-1]
+    )
+    sharder.start()
+    try:
+        for symbol in SYMBOLS:
+            sharder.submit(symbol, history[symbol][:-1])
+        wait_until(lambda: sharder.completed == len(SYMBOLS), timeout=60)
+
+        victim = shard_for("R_10", 2)
+        sharder._processes[victim].kill()
+        sharder._processes[victim].join()
+        decisions.clear()
+
+        # El siguiente lote relanza el worker y le recarga el historial
+        for symbol in SYMBOLS:
+            sharder.submit(symbol, history[symbol][-1:])
+        wait_until(lambda: sharder.completed == 2 * len(SYMBOLS), timeout=60)
+        assert sharder.restarts == 1
+        assert sharder._processes[victim].is_alive()
+        assert all(decisions[s] == 1 for s in SYMBOLS)
+    finally:
+        sharder.stop()
+
+
+class FixedStrategy(Strategy):
+    """Estrategia con score fijo (importable por los workers spawn)"""
+
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+    def score(self, feats):
+        return self.value, "CALL", 1, [], []
+
+
+def test_update_strategy_reaches_running_workers():
+    candles = generate_candles("R_10", 800, seed=3).to_dict("records")
+    scores = []
+
+    def on_decision(symbol, decision, error, ts):
+        assert error is None
+        scores.append((decision[0], ts))
+
+    sharder = ShardedEvaluator(FixedStrategy(0.1), on_decision, workers=2)
+    sharder.start()
+    try:
+        sharder.submit("R_10", candles[:-1], ts=1.0)
+        wait_until(lambda: sharder.completed == 1, timeout=60)
+        sharder.update_strategy(FixedStrategy(0.9))
+        sharder.submit("R_10", candles[-1:], ts=2.0)
+        wait_until(lambda: sharder.completed == 2, timeout=60)
+    finally:
+        sharder.stop()
+    assert scores == [(0.1, 1.0), (0.9, 2.0)]
+
+
+def make_client():
+    buffers = OHLCBuffers(maxlen=1000)
+    risk = RiskManager()
+    client = DerivWS(
+        "1",
+        "",
+        ["R_10"],
+        TradeEngine(risk),
+        buffers,
+        FeatureEngine(buffers),
+        Strategy(),
+        risk,
+    )
+    client.debug_mode = False
+    return client
+
+
+def test_stale_shard_decisions_are_dropped():
+    client = make_client()
+    applied = []
+    client._apply_decision = lambda symbol, decision: applied.append(symbol)
+    decision = (0.9, "CALL", 1, [], [])
+
+    client._apply_shard_decision("R_10", decision, time.monotonic() - 60)
+    assert applied == [] and client.stale_evaluations == 1
+    client._apply_shard_decision("R_10", decision, time.monotonic())
+    assert applied == ["R_10"]
+
+
+def test_sharded_push_keeps_higher_timeframes_up_to_date():
+    client = make_client()
+    client.sharder = ShardedEvaluator(Strategy(), lambda *a: None, workers=2)
+    for candle in generate_candles("R_10", 60, seed=1).to_dict("records"):
+        candle["epoch"] = int(candle["epoch"])
+        assert client._push_candle("R_10", candle)
+
+    reference = OHLCBuffers(maxlen=1000)
+    for candle in client.buffers.m1["R_10"]:
+        reference.push_ohlc_1m("R_10", candle)
+    assert list(client.buffers.m5["R_10"]) == list(reference.m5["R_10"])
+    assert list(client.buffers.m15["R_10"]) == list(reference.m15["R_10"])
+    assert len(client._shard_pending["R_10"]) == 60
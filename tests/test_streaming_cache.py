@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+
+import config
+from core.result_cache import ResultCache, code_files, fingerprint
+from core.streaming_backtester import StreamingBacktester
+from core.synthetic import write_dataset
+
+
+def test_cache_entry_ignores_leftovers_in_output_dir(tmp_path):
+    paths = write_dataset(str(tmp_path / "data"), ["R_10", "R_100"], days=1)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    (output_dir / "old_report.txt").write_text("de otro run")
+
+    cache = ResultCache(str(tmp_path / "cache"))
+    bt = StreamingBacktester(fmt="csv")
+    first = bt.run(paths, str(output_dir), cache=cache)
+    assert (output_dir / "metrics.json").exists()
+
+    restored = tmp_path / "restored"
+    assert bt.run(paths, str(restored), cache=cache) == first
+    assert cache.hits == 1
+    assert "old_report.txt" not in os.listdir(restored)
+
+
+def test_fingerprint_covers_result_code_and_ignores_logging(monkeypatch):
+    files = code_files()
+    for module in ("core/portfolio.py", "core/contracts.py", "core/results_io.py"):
+        assert module in files
+
+    data = {"R_10": pd.DataFrame({"epoch": [60, 120], "close": [1.0, 1.1]})}
+    key = fingerprint(data)
+    monkeypatch.setattr(config, "LOG_LEVEL", "WARNING")
+    monkeypatch.setattr(config, "EXPORT_FORMAT", "csv")
+    assert fingerprint(data) == key
+    monkeypatch.setattr(config, "BACKTEST_COMMISSION", 0.5)
+    assert fingerprint(data) != key
@@ -0,0 +1,120 @@
+import numpy as np
+
+from core.ohlc_buffers import OHLCBuffers
+from core.ticks import OHLC_KEYS, TickAccumulator, ticks_to_candles
+
+
+def make_ticks(n, seed=11):
+    """Ticks cada ~2 s con huecos de minutos y precios repetidos"""
+    rng = np.random.default_rng(seed)
+    times = 1_700_000_000 + np.cumsum(rng.choice([0, 1, 2, 3, 30, 200], n))
+    prices = np.round(100 + np.cumsum(rng.choice([-0.01, 0.0, 0.01], n)), 2)
+    return prices.tolist(), times.tolist()
+
+
+def minute_candle(ticks, minute):
+    """Vela de un minuto filtrando los ticks, como el build original por tick"""
+    prices = [p for p, e in ticks if int(e) // 60 == minute]
+    return {
+        "open": prices[0],
+        "high": max(prices),
+        "low": min(prices),
+        "close": prices[-1],
+        "epoch": minute * 60,
+    }
+
+
+def loop_ticks_to_candles(prices, times):
+    """Bucle original: ticks consecutivos agrupados por minuto"""
+    candles = []
+    for price, epoch in zip(prices, times):
+        minute = int(epoch) // 60
+        if candles and candles[-1]["epoch"] == minute * 60:
+            candle = candles[-1]
+            candle["high"] = max(candle["high"], price)
+            candle["low"] = min(candle["low"], price)
+            candle["close"] = price
+        else:
+            candles.append(minute_candle([(price, epoch)], minute))
+    return candles
+
+
+def test_ticks_to_candles_matches_the_loop():
+    prices, times = make_ticks(20_000)
+    got = ticks_to_candles(prices, times)
+    expected = loop_ticks_to_candles(prices, times)
+
+    assert len(expected) > 1000
+    rows = [dict(zip(OHLC_KEYS, row)) for row in zip(*(got[k] for k in OHLC_KEYS))]
+    assert rows == expected
+    assert all(len(v) == 0 for v in ticks_to_candles([], []).values())
+
+
+def test_extend_matches_upserting_candle_by_candle():
+    prices, times = make_ticks(30_000, seed=3)
+    split = 12_000  # el segundo bloque empieza dentro de la última vela
+    first = ticks_to_candles(prices[:split], times[:split])
+    second = ticks_to_candles(prices, times)
+
+    expected = OHLCBuffers(maxlen=500)
+    for candle in loop_ticks_to_candles(prices[:split], times[:split]):
+        expected.upsert_ohlc_1m("R_100", candle)
+    for candle in loop_ticks_to_candles(prices, times):
+        expected.upsert_ohlc_1m("R_100", candle)
+
+    got = OHLCBuffers(maxlen=500)
+    got.extend_ohlc_1m("R_100", first)
+    got.extend_ohlc_1m("R_100", second)
+
+    for tf in ("m1", "m5", "m15"):
+        assert list(getattr(got, tf)["R_100"]) == list(getattr(expected, tf)["R_100"])
+
+
+def test_accumulator_matches_filtering_the_tick_list():
+    prices, times = make_ticks(5000, seed=5)
+    acc = TickAccumulator(capacity=256)
+    ticks = []
+    closed = []
+    for price, epoch in zip(prices, times):
+        candle = acc.add(price, epoch)
+        if candle is not None:
+            # se cierra justo al llegar el primer tick del minuto siguiente
+            assert candle == minute_candle(ticks, ticks[-1][1] // 60)
+            closed.append(candle["epoch"])
+        ticks.append((price, epoch))
+        assert acc.candle() == minute_candle(ticks, epoch // 60)
+
+    minutes = sorted({e // 60 * 60 for e in times})
+    assert closed == minutes[:-1]
+    assert acc.last_price == prices[-1]
+    recent_prices, recent_epochs = acc.recent()
+    assert recent_prices.tolist() == prices[-256:]
+    assert recent_epochs.tolist() == times[-256:]
+
+
+def test_late_ticks_and_resume_keep_the_current_candle():
+    acc = TickAccumulator(capacity=8)
+    acc.add(10.0, 120)
+    acc.add(11.0, 150)
+    assert acc.add(12.0, 181) == {
+        "open": 10.0,
+        "high": 11.0,
+        "low": 10.0,
+        "close": 11.0,
+        "epoch": 120,
+    }
+    assert acc.add(99.0, 170) is None  # tick atrasado del minuto cerrado
+    assert acc.candle()["close"] == 12.0 and acc.candle()["high"] == 12.0
+    assert acc.last_price == 99.0
+
+    acc.resume({"epoch": 120, "open": 1, "high": 1, "low": 1, "close": 1})
+    assert acc.candle()["epoch"] == 180  # vela de un minuto anterior: ignorada
+    acc.resume({"epoch": 180, "open": 11.5, "high": 13, "low": 11, "close": 12})
+    acc.add(10.5, 190)
+    assert acc.candle() == {
+        "open": 11.5,
+        "high": 13.0,
+        "low": 10.5,
+        "close": 10.5,
+        "epoch": 180,
+    }
@@ -1,52 +1,167 @@
 # utils/logger.py
+import atexit
 import csv
-import time
+import gzip
+import io
+import json
 import os
-from datetime import datetime
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
+from queue import Empty, Full, Queue
+
+from config import LOG_FLUSH_INTERVAL, LOG_MAX_MB, LOG_QUEUE_SIZE
+
+TRADES_HEADER = [
+    "timestamp",
+    "symbol",
+    "direction",
+    "amount",
+    "score",
+    "action",
+    "profit",
+    "balance",
+]
+# El header debe coincidir con el número de features + 1 (para el outcome)
+TRAINING_HEADER = [f"feature_{i}" for i in range(10)] + ["outcome"]
+CONSOLE_WORDS = re.compile("ERROR|TRADE|CONECTADO|BALANCE", re.IGNORECASE)
+
+
+class LogFile:
+    """
+    Archivo de log con el handle abierto. Con daily=True el nombre lleva la
+    fecha (stem_YYYYMMDD.ext) y al cambiar de día el anterior se comprime;
+    con max_bytes se rota dentro del día a stem_YYYYMMDD.N.ext.gz.
+    Solo lo usa el hilo escritor de SimpleLogger.
+    """
+
+    def __init__(self, log_dir, stem, ext, header=None, daily=True, max_bytes=None):
+        self.log_dir = Path(log_dir)
+        self.stem = stem
+        self.ext = ext
+        self.header = header
+        self.daily = daily
+        self.max_bytes = max_bytes
+        self.day = None
+        self._day_end = None
+        self._file = None
+        self._size = 0
+
+    def path_for(self, day):
+        name = f"{self.stem}_{day}" if self.daily else self.stem
+        return self.log_dir / f"{name}{self.ext}"
+
+    @property
+    def path(self):
+        return self.path_for(self.day or datetime.now().strftime("%Y%m%d"))
+
+    def open(self, ts=None):
+        """Abre (o crea con header) el archivo del día de ts"""
+        moment = datetime.fromtimestamp(time.time() if ts is None else ts)
+        self.day = moment.strftime("%Y%m%d")
+        midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._day_end = (midnight + timedelta(days=1)).timestamp()
+        path = self.path_for(self.day)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", newline="", buffering=1 << 16)
+        self._size = self._file.tell()
+        if self._size == 0 and self.header:
+            self._write(self.header)
+
+    def write(self, ts, text):
+        if self._file is None:
+            self.open(ts)
+        elif self.daily and ts >= self._day_end:
+            previous = self.path
+            self._file.close()
+            self.open(ts)
+            compress(previous)
+        elif self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+        self._write(text)
+
+    def _write(self, text):
+        self._file.write(text)
+        self._size += len(text)
+
+    def _rotate(self):
+        """Rotación por tamaño: el archivo lleno pasa a .N.ext comprimido"""
+        self._file.close()
+        path = self.path
+        n = 1
+        while path.with_name(f"{path.stem}.{n}{self.ext}.gz").exists():
+            n += 1
+        rotated = path.with_name(f"{path.stem}.{n}{self.ext}")
+        os.replace(path, rotated)
+        compress(rotated)
+        self.open()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def csv_line(row):
+    """Fila CSV como texto, con el mismo formato que csv.writer"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
+
+
+def compress(path):
+    """Comprime path a path.gz y borra el original"""
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    path.unlink()
 
 
 class SimpleLogger:
-    def __init__(self):
-        # Crear directorio logs si no existe
-        self.log_dir = Path("logs")
-        self.log_dir.mkdir(exist_ok=True)
-
-        # Archivo CSV para trades
-        today = datetime.now().strftime("%Y%m%d")
-        self.trades_csv = self.log_dir / f"trades_{today}.csv"
-
-        # Archivo CSV para datos de entrenamiento de ML
-        self.training_data_csv = self.log_dir / "training_data.csv"
-
-        # Crear header si no existe
-        if not self.trades_csv.exists():
-            with open(self.trades_csv, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    [
-                        "timestamp",
-                        "symbol",
-                        "direction",
-                        "amount",
-                        "score",
-                        "action",
-                        "profit",
-                        "balance",
-                    ]
-                )
-
-        # Crear header para el archivo de entrenamiento si no existe
-        if not self.training_data_csv.exists():
-            with open(self.training_data_csv, "w", newline="") as f:
-                writer = csv.writer(f)
-                # El header debe coincidir con el número de features + 1 (para el outcome)
-                num_features = 10
-                header = [f"feature_{i}" for i in range(num_features)] + ["outcome"]
-                writer.writerow(header)
-
-        # Archivo de debug
-        self.debug_file = self.log_dir / f"debug_{today}.log"
+    """
+    Los métodos de registro solo encolan (instante, destino, dato); un hilo
+    escritor formatea, escribe por lotes con los handles abiertos y vuelca
+    a disco cada flush_interval. Si la cola se llena, las líneas de debug se
+    descartan (contadas en stats["log_dropped"]) antes que bloquear al
+    llamante; las filas de trades, de entrenamiento y los trades cerrados
+    archivados esperan hueco.
+    """
+
+    def __init__(
+        self,
+        log_dir="logs",
+        queue_size=LOG_QUEUE_SIZE,
+        flush_interval=LOG_FLUSH_INTERVAL,
+        max_bytes=LOG_MAX_MB * 2**20,
+    ):
+        # El directorio se crea al escribir el primer registro
+        self.log_dir = Path(log_dir)
+        self.flush_interval = flush_interval
+
+        self.files = {
+            # Trades y debug por día, rotados por tamaño
+            "trade": LogFile(
+                self.log_dir, "trades", ".csv", csv_line(TRADES_HEADER), True, max_bytes
+            ),
+            "debug": LogFile(self.log_dir, "debug", ".log", None, True, max_bytes),
+            # Trades cerrados que TradeEngine ya no retiene en memoria (JSONL)
+            "closed": LogFile(
+                self.log_dir, "closed_trades", ".jsonl", None, True, max_bytes
+            ),
+            # Datos de entrenamiento de ML: un único archivo acumulado
+            "training": LogFile(
+                self.log_dir, "training_data", ".csv", csv_line(TRAINING_HEADER), False
+            ),
+        }
 
         # Contadores
         self.stats = {
@@ -56,14 +171,62 @@ class SimpleLogger:
             "messages_received": 0,
             "candles_processed": 0,
             "evaluations_run": 0,
+            "log_dropped": 0,
         }
 
+        self._stats_lock = threading.Lock()
+        self._queue = Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def trades_csv(self):
+        return self.files["trade"].path
+
+    @property
+    def training_data_csv(self):
+        return self.files["training"].path
+
+    @property
+    def debug_file(self):
+        return self.files["debug"].path
+
+    @property
+    def closed_trades_file(self):
+        return self.files["closed"].path
+
+    def _put(self, kind, payload):
+        item = (kind, time.time(), payload)
+        try:
+            self._queue.put_nowait(item)
+            return
+        except Full:
+            pass
+        # Trades y datos de entrenamiento no se pierden: se espera al
+        # escritor mientras siga vivo
+        while kind != "debug" and self._thread.is_alive():
+            try:
+                self._queue.put(item, timeout=self.flush_interval)
+                return
+            except Full:
+                continue
+        with self._stats_lock:
+            self.stats["log_dropped"] += 1
+
+    def set_log_dir(self, log_dir):
+        """
+        Cambia el directorio de los logs: lo encolado antes se escribe en el
+        anterior y lo siguiente en log_dir (p.ej. un temporal en benchmarks)
+        """
+        self.log_dir = Path(log_dir)
+        self._queue.put(("redirect", None, self.log_dir))
+
     def log_trade(
         self, symbol, direction, amount, score_or_profit, action, balance=None
     ):
         """Registra un trade"""
-        data = [
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        row = (
             symbol,
             direction,
             amount,
@@ -71,11 +234,8 @@ class SimpleLogger:
             action,
             score_or_profit if action == "CLOSE" else 0,
             balance or 0,
-        ]
-
-        with open(self.trades_csv, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(data)
+        )
+        self._put("trade", row)
 
         if action == "OPEN":
             self.stats["trades_opened"] += 1
@@ -89,34 +249,97 @@ class SimpleLogger:
     def log_training_data(self, feature_vector, outcome):
         """Registra datos para el entrenamiento del modelo de ML."""
         try:
-            row = list(feature_vector) + [outcome]
-            with open(self.training_data_csv, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
+            self._put("training", list(feature_vector) + [outcome])
         except Exception as e:
             self.debug(f"ERROR al guardar datos de entrenamiento: {e}")
 
+    def log_closed_trades(self, records):
+        """Archiva trades cerrados (dicts); el JSON se genera en el escritor"""
+        self._put("closed", records)
+
     def debug(self, message):
         """Log de debug"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_line = f"[{timestamp}] {message}\n"
-
-        # Escribir a archivo
-        with open(self.debug_file, "a") as f:
-            f.write(log_line)
-
-        # También mostrar en consola si es importante
-        if any(
-            word in message.upper()
-            for word in ["ERROR", "TRADE", "CONECTADO", "BALANCE"]
-        ):
-            print(log_line.strip())
+        self._put("debug", message)
 
     def update_stat(self, stat_name):
         """Actualiza estadística"""
         if stat_name in self.stats:
             self.stats[stat_name] += 1
 
+    def _format(self, kind, ts, payload):
+        if kind == "debug":
+            line = f"[{time.strftime('%H:%M:%S', time.localtime(ts))}] {payload}"
+            # También mostrar en consola si es importante
+            if CONSOLE_WORDS.search(line):
+                print(line)
+            return line + "\n"
+        if kind == "trade":
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+            return csv_line((stamp,) + payload)
+        if kind == "closed":
+            return "".join(json.dumps(r, default=str) + "\n" for r in payload)
+        return csv_line(payload)
+
+    def _writer(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            stop = False
+            waiters = []
+            for item in batch:
+                if item is None:
+                    stop = True
+                    continue
+                kind, ts, payload = item
+                if kind == "flush":
+                    waiters.append(payload)
+                    continue
+                if kind == "redirect":
+                    for f in self.files.values():
+                        f.close()
+                        f.log_dir = payload
+                    continue
+                try:
+                    self.files[kind].write(ts, self._format(kind, ts, payload))
+                except Exception as e:
+                    print(f"❌ Error escribiendo log {kind}: {e}")
+
+            if stop:
+                for f in self.files.values():
+                    f.close()
+                for event in waiters:
+                    event.set()
+                return
+            if waiters or time.monotonic() >= next_flush:
+                for f in self.files.values():
+                    f.flush()
+                next_flush = time.monotonic() + self.flush_interval
+            for event in waiters:
+                event.set()
+
+    def flush(self, timeout=None):
+        """Espera a que lo encolado hasta ahora esté escrito en disco"""
+        if not self._thread.is_alive():
+            return
+        event = threading.Event()
+        self._queue.put(("flush", None, event))
+        event.wait(timeout)
+
+    def close(self):
+        """Escribe lo pendiente y cierra los archivos (idempotente)"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
 
 # Instancia global
 logger = SimpleLogger()
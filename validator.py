@@ -4,7 +4,6 @@ import time
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
-import numpy as np
 
 console = Console()
 
@@ -89,10 +88,11 @@ def test_indicators():
     console.print("🔍 [cyan]Probando indicadores...[/cyan]")
 
     try:
+        from core.synthetic import generate_candles
         from utils.indicators import calc_rsi, calc_macd
 
-        # Datos de prueba
-        test_prices = [100 + np.sin(i / 10) * 5 for i in range(50)]
+        # Datos de prueba: un día de velas 1m sintéticas de R_100
+        test_prices = generate_candles("R_100", 1440, seed=1)["close"].values
 
         rsi = calc_rsi(test_prices, 14)
         macd, signal, hist = calc_macd(test_prices, 12, 26, 9)